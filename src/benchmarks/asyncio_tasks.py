@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Compares a thread per concern with tasks of a single event loop (see
+:py:mod:`ev3dev.aio`), for the background activities of the grabber demo.
+
+Three concerns run concurrently for a few seconds on in-memory devices:
+
+- polling a touch sensor every 10 ms
+- scanning the buttons every 100 ms
+- a K2000 like animation of the LEDs, stepping every 50 ms
+
+They are implemented once with threads, and once with asyncio tasks. The number of
+threads, the CPU time used and the number of loops executed are reported. This script
+requires Python 3.5 or later.
+"""
+
+import asyncio
+import threading
+import time
+
+from ev3dev import aio
+from ev3dev.clock import get_clock
+from ev3dev.core import Led, MemoryBackend
+from ev3dev.ev3 import Buttons
+from ev3dev.sensors import TouchSensor
+from ev3dev.sim import add_sensor
+
+DURATION = 3.
+SENSOR_PERIOD = 0.01
+BUTTONS_PERIOD = 0.1
+LEDS_PERIOD = 0.05
+
+LED_NAMES = ('ev3-left0:red:ev3dev', 'ev3-right0:red:ev3dev')
+LED_ATTRIBUTES = {'brightness': '0', 'max_brightness': '255', 'trigger': 'none'}
+
+
+def make_devices():
+    backend = MemoryBackend()
+    # the touch sensor is pressed for 0.5 s every second
+    add_sensor(backend, 'lego-ev3-touch', 'in1', signals={
+        'TOUCH': lambda t: int(t % 1 < 0.5)
+    })
+    for name in LED_NAMES:
+        backend.add_device(Led.SYSTEM_CLASS_NAME, name, LED_ATTRIBUTES)
+
+    sensor = TouchSensor(port='in1', backend=backend)
+    leds = [Led(name, backend=backend) for name in LED_NAMES]
+    return sensor, Buttons(backend=backend), leds
+
+
+def run_threads(sensor, buttons, leds):
+    counts = [0, 0]
+    stop = threading.Event()
+    clock = get_clock()
+
+    def poll_sensor():
+        while not stop.is_set():
+            sensor.value()
+            counts[0] += 1
+            clock.sleep(SENSOR_PERIOD)
+
+    def animate_leds():
+        step = 0
+        while not stop.is_set():
+            for i, led in enumerate(leds):
+                led.brightness = 255 if i == step % len(leds) else 0
+            step += 1
+            counts[1] += 1
+            clock.sleep(LEDS_PERIOD)
+
+    buttons.on_change = lambda changes: None
+    threads = [threading.Thread(target=poll_sensor), threading.Thread(target=animate_leds)]
+    for thread in threads:
+        thread.start()
+    buttons.start_scanner()
+    thread_count = threading.active_count()
+
+    time.sleep(DURATION)
+    stop.set()
+    buttons.stop_scanner()
+    for thread in threads:
+        thread.join()
+    return thread_count, counts
+
+
+def run_tasks(sensor, buttons, leds):
+    counts = [0, 0]
+
+    async def poll_sensor():
+        async for _ in aio.SensorValues(sensor, period=SENSOR_PERIOD):
+            counts[0] += 1
+
+    async def scan_buttons():
+        async for _ in aio.ButtonEvents(buttons, period=BUTTONS_PERIOD):
+            pass
+
+    async def animate_leds():
+        step = 0
+        while True:
+            for i, led in enumerate(leds):
+                await aio.set_attribute(led, 'brightness', 255 if i == step % len(leds) else 0)
+            step += 1
+            counts[1] += 1
+            await asyncio.sleep(LEDS_PERIOD)
+
+    async def main():
+        tasks = [asyncio.ensure_future(coro) for coro in (poll_sensor(), scan_buttons(), animate_leds())]
+        thread_count = threading.active_count()
+        await asyncio.sleep(DURATION)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return thread_count
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main()), counts
+    finally:
+        loop.close()
+
+
+def main():
+    sensor, buttons, leds = make_devices()
+    for label, runner in (('threads', run_threads), ('asyncio', run_tasks)):
+        cpu = time.process_time()
+        thread_count, counts = runner(sensor, buttons, leds)
+        cpu = time.process_time() - cpu
+        print('%-8s : %d thread(s)  cpu %5.1f %%  %4d sensor reads  %3d LED steps' % (
+            label, thread_count, cpu / DURATION * 100, counts[0], counts[1]
+        ))
+
+
+if __name__ == '__main__':
+    main()
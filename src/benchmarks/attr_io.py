@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Compares the per-read latency of the two attribute I/O backends of ``FileCache``
+on a control loop polling the ``position`` and ``speed`` of a large motor.
+
+The motor connected to port B is used when running on the brick. Otherwise a fake
+``tacho-motor`` tree is created in a temporary directory, so that the script can be
+run on a development machine too (numbers are then only indicative, since the
+files are regular ones and not sysfs attributes).
+
+The same loop is run on an in-memory device too, which gives the cost of the library
+itself, without any syscall.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from ev3dev.core import Device, DirectoryBackend, MemoryBackend, SysfsBackend, set_device_backend
+from ev3dev.motors import LargeMotor
+
+LOOPS = 20000
+
+FAKE_MOTOR_ATTRIBUTES = {
+    'driver_name': 'lego-ev3-l-motor',
+    'port_name': 'outB',
+    'position': '1234',
+    'speed': '-56',
+    'duty_cycle_sp': '0',
+    'command': '',
+}
+
+
+def make_fake_tree():
+    root = tempfile.mkdtemp(prefix='ev3dev-bench-')
+    motor_dir = os.path.join(root, 'tacho-motor', 'motor0')
+    os.makedirs(motor_dir)
+    for name, value in FAKE_MOTOR_ATTRIBUTES.items():
+        with open(os.path.join(motor_dir, name), 'w') as fp:
+            fp.write(value + '\n')
+    return root
+
+
+def control_loop(motor, loops):
+    t0 = time.time()
+    for _ in range(loops):
+        motor.position
+        motor.speed
+    return (time.time() - t0) / (loops * 2)
+
+
+def measure(backend=None):
+    motor = LargeMotor(port='outB', backend=backend)
+    # warm-up, so that files are opened before measuring
+    control_loop(motor, 10)
+    return control_loop(motor, LOOPS)
+
+
+def main():
+    fake_root = None
+    if not os.path.isdir(os.path.join(SysfsBackend.ROOT_PATH, LargeMotor.SYSTEM_CLASS_NAME)):
+        fake_root = make_fake_tree()
+        set_device_backend(DirectoryBackend(fake_root))
+        print('not running on the brick, using fake tree in %s' % fake_root)
+
+    try:
+        results = {}
+        for raw_io in (False, True):
+            Device.RAW_IO = raw_io
+            results[raw_io] = measure()
+
+        for raw_io, label in ((False, 'file objects'), (True, 'raw pread')):
+            print('%-13s : %6.2f us/read' % (label, results[raw_io] * 1e6))
+        print('latency drop  : %6.1f %%' % ((1 - results[True] / results[False]) * 100))
+
+        memory = MemoryBackend()
+        memory.add_device(LargeMotor.SYSTEM_CLASS_NAME, 'motor0', FAKE_MOTOR_ATTRIBUTES)
+        print('%-13s : %6.2f us/read' % ('in memory', measure(memory) * 1e6))
+
+    finally:
+        if fake_root:
+            shutil.rmtree(fake_root)
+
+
+if __name__ == '__main__':
+    main()
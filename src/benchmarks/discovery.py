@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Compares the time needed for creating the devices of a typical robot (four motors
+and four sensors) with the discovery index and with the historical linear probing of
+the `/sys/class` directories.
+
+The real devices are used when running on the brick. Otherwise a fake tree is created
+in a temporary directory, with additional unused devices so that the probing has some
+work to do.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from ev3dev.core import Device, DirectoryBackend, SysfsBackend, get_device_index, set_device_backend
+from ev3dev.motors import LargeMotor
+from ev3dev.sensors import ColorSensor, TouchSensor, InfraredSensor, UltrasonicSensor
+
+ROUNDS = 200
+
+MOTOR_PORTS = ('outA', 'outB', 'outC', 'outD')
+SENSORS = (
+    (TouchSensor, 'in1'), (ColorSensor, 'in2'), (InfraredSensor, 'in3'), (UltrasonicSensor, 'in4')
+)
+
+
+def make_fake_tree():
+    root = tempfile.mkdtemp(prefix='ev3dev-bench-')
+
+    def add_device(class_name, name, attributes):
+        path = os.path.join(root, class_name, name)
+        os.makedirs(path)
+        for attr, value in attributes.items():
+            with open(os.path.join(path, attr), 'w') as fp:
+                fp.write(value + '\n')
+
+    for i, port in enumerate(MOTOR_PORTS):
+        add_device('tacho-motor', 'motor%d' % i, {
+            'driver_name': 'lego-ev3-l-motor', 'port_name': port, 'duty_cycle_sp': '0', 'command': ''
+        })
+    for i, (cls, port) in enumerate(SENSORS):
+        add_device('lego-sensor', 'sensor%d' % i, {'driver_name': cls.DRIVERS[0], 'port_name': port})
+    # devices connected to multiplexers, not used by the robot
+    for i in range(12):
+        add_device('lego-sensor', 'sensor%d' % (i + len(SENSORS)), {
+            'driver_name': 'lego-nxt-light', 'port_name': 'in1:mux%d' % i
+        })
+    return root
+
+
+def create_devices():
+    devices = [LargeMotor(port=port) for port in MOTOR_PORTS]
+    devices += [cls(port=port) for cls, port in SENSORS]
+    if not all(d.connected for d in devices):
+        raise RuntimeError('not all devices found')
+    return devices
+
+
+def measure(use_index, cold):
+    Device.USE_DISCOVERY_INDEX = use_index
+    index = get_device_index()
+    elapsed = 0
+    for _ in range(ROUNDS):
+        if cold:
+            index.refresh()
+        t0 = time.time()
+        devices = create_devices()
+        elapsed += time.time() - t0
+        del devices
+    return elapsed / ROUNDS
+
+
+def main():
+    fake_root = None
+    if not os.path.isdir(os.path.join(SysfsBackend.ROOT_PATH, LargeMotor.SYSTEM_CLASS_NAME)):
+        fake_root = make_fake_tree()
+        set_device_backend(DirectoryBackend(fake_root))
+        print('not running on the brick, using fake tree in %s' % fake_root)
+
+    try:
+        probing = measure(use_index=False, cold=False)
+        cold = measure(use_index=True, cold=True)
+        warm = measure(use_index=True, cold=False)
+
+        print('linear probing   : %8.2f ms' % (probing * 1e3))
+        print('index (cold)     : %8.2f ms' % (cold * 1e3))
+        print('index (warm)     : %8.2f ms' % (warm * 1e3))
+
+    finally:
+        if fake_root:
+            shutil.rmtree(fake_root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Measures the time needed for importing the ``ev3dev.ev3`` package and the number of
+modules it loads, as well as the time needed for binding the brick LEDs, which are
+resolved on their first access instead of at import time.
+
+Each measure is done in a fresh interpreter. When not running on the brick, a fake
+LEDs tree is created in a temporary directory.
+
+Usage::
+
+    import_time.py [--runs N] [--output results.json]
+
+The results can be recorded in a JSON file, for comparing library versions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+LED_NAMES = (
+    'ev3-left0:red:ev3dev', 'ev3-right0:red:ev3dev', 'ev3-left1:green:ev3dev', 'ev3-right1:green:ev3dev'
+)
+
+# executed in the child interpreter, with the fake tree root as argument (empty if none)
+CHILD_SCRIPT = """
+import sys, time
+modules_count = len(sys.modules)
+t0 = time.time()
+import ev3dev.core
+t1 = time.time()
+if sys.argv[1]:
+    ev3dev.core.Device._DEVICE_ROOT_PATH = sys.argv[1]
+t2 = time.time()
+import ev3dev.ev3
+t3 = time.time()
+modules_count = len(sys.modules) - modules_count
+ev3dev.ev3.Leds.ALL
+t4 = time.time()
+print('%f %f %d' % (t1 - t0 + t3 - t2, t4 - t3, modules_count))
+"""
+
+
+def make_fake_tree():
+    root = tempfile.mkdtemp(prefix='ev3dev-bench-')
+    for name in LED_NAMES:
+        path = os.path.join(root, 'leds', name)
+        os.makedirs(path)
+        for attr, value in (('max_brightness', '255'), ('brightness', '0'), ('trigger', 'none')):
+            with open(os.path.join(path, attr), 'w') as fp:
+                fp.write(value + '\n')
+    return root
+
+
+def run_child(root):
+    out = subprocess.check_output([sys.executable, '-c', CHILD_SCRIPT, root or ''])
+    import_time, leds_time, modules_count = out.split()
+    return float(import_time), float(leds_time), int(modules_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the import time of ev3dev.ev3')
+    parser.add_argument('--runs', type=int, default=20, help='number of measures (default: 20)')
+    parser.add_argument('--output', help='JSON file to record the results in')
+    args = parser.parse_args()
+
+    fake_root = None
+    if not os.path.isdir('/sys/class/leds'):
+        fake_root = make_fake_tree()
+        print('not running on the brick, using fake tree in %s' % fake_root)
+
+    try:
+        results = [run_child(fake_root) for _ in range(args.runs)]
+        import_times = sorted(r[0] for r in results)
+        import_time = sum(import_times) / args.runs
+        leds_time = sum(r[1] for r in results) / args.runs
+        modules_count = max(r[2] for r in results)
+
+        print('import ev3dev.ev3       : %8.2f ms (min: %.2f ms)' % (import_time * 1e3, import_times[0] * 1e3))
+        print('modules loaded          : %8d' % modules_count)
+        print('first access to the LEDs: %8.2f ms (no more paid at import time)' % (leds_time * 1e3))
+
+        if args.output:
+            with open(args.output, 'w') as fp:
+                json.dump({
+                    'python': platform.python_version(),
+                    'machine': platform.machine(),
+                    'runs': args.runs,
+                    'import_time_mean': import_time,
+                    'import_time_min': import_times[0],
+                    'modules_count': modules_count,
+                    'leds_binding_time': leds_time,
+                }, fp, indent=4, sort_keys=True)
+
+    finally:
+        if fake_root:
+            shutil.rmtree(fake_root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Runs the motor sequences of the demos on simulated motors, faster than real time.
+
+The sequences of `demos/motors.py` (two turns forward and back with two large motors)
+and of the gripper calibration of `demos/grabber.py` (medium motor running against
+its end stops) are executed on :py:class:`ev3dev.sim.TachoMotorSimulator` instances.
+
+The simulation is driven by a virtual clock, which sleeps return immediately, the
+polling period being kept. The simulated duration, the wall clock duration and the
+final positions are reported.
+"""
+
+import time
+
+from ev3dev.clock import VirtualClock
+from ev3dev.core import MemoryBackend
+from ev3dev.motors import LargeMotor, MediumMotor
+from ev3dev.sim import add_tacho_motor
+
+POLLING_PERIOD = 0.01
+
+
+def drive_sequence(clock, motors):
+    for m in motors:
+        m.reset()
+        m.duty_cycle_sp = 100
+        m.stop_command = LargeMotor.STOP_COMMAND_BRAKE
+        m.ramp_up_sp = 500
+        m.ramp_down_sp = 500
+
+    for turns in (2, -2):
+        for m in motors:
+            m.run_to_rel_pos(position_sp=360 * turns)
+        while any(m.state and 'holding' not in m.state for m in motors):
+            clock.sleep(POLLING_PERIOD)
+        clock.sleep(0.5)
+
+    return [m.position for m in motors]
+
+
+def gripper_calibration(clock, m):
+    def run_until_stalled(dc):
+        last_pos = m.position
+        m.run_forever(duty_cycle_sp=dc)
+        clock.sleep(0.5)
+        while m.position != last_pos:
+            last_pos = m.position
+            clock.sleep(0.1)
+        m.stop(stop_command='coast')
+
+    m.reset()
+    run_until_stalled(-30)
+    m.run_to_rel_pos(position_sp=100)
+    clock.sleep(0.5)
+    m.reset()
+
+    run_until_stalled(30)
+    m.run_to_rel_pos(position_sp=-100)
+    clock.sleep(0.5)
+    return [m.position]
+
+
+def main():
+    clock = VirtualClock()
+    backend = MemoryBackend()
+    add_tacho_motor(backend, 'outB', clock=clock)
+    add_tacho_motor(backend, 'outC', clock=clock)
+    # the gripper can travel over about 3/4 of a turn
+    add_tacho_motor(backend, 'outA', 'lego-ev3-m-motor', clock=clock, position_limits=(-150, 130))
+
+    wheels = [LargeMotor(port=port, backend=backend) for port in ('outB', 'outC')]
+    gripper = MediumMotor(port='outA', backend=backend)
+
+    for label, sequence in (
+        ('drive', lambda: drive_sequence(clock, wheels)),
+        ('gripper', lambda: gripper_calibration(clock, gripper)),
+    ):
+        start = clock.time()
+        t0 = time.time()
+        positions = sequence()
+        wall = time.time() - t0
+        simulated = clock.time() - start
+        print('%-8s : simulated %5.2f s  wall %6.3f s  (x%.0f)  positions: %s' % (
+            label, simulated, wall, simulated / wall, positions
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Records a control loop running on simulated devices, and replays it.
+
+The search loop of `demos/grabber.py` (the robot drives forward until the color sensor
+sees a brick) is run on simulated devices while the I/O is recorded with
+:py:class:`ev3dev.trace.TraceRecorder`. The same loop is then replayed on a
+:py:class:`ev3dev.replay.ReplayBackend`, and the replay throughput is reported, together
+with the divergences, which are expected to be none.
+
+A modified version of the loop, driving the wheels at a different duty cycle, is
+replayed last, to show how the divergent writes are reported.
+"""
+
+import os
+import tempfile
+import time
+
+from ev3dev.clock import VirtualClock
+from ev3dev.core import MemoryBackend
+from ev3dev.motors import LargeMotor
+from ev3dev.replay import ReplayBackend
+from ev3dev.sensors import ColorSensor
+from ev3dev.sim import SampledSignal, add_sensor, add_tacho_motor
+from ev3dev.trace import TraceRecorder
+
+BRICK_TIME = 2.53
+BRICK_COLOR = 5     # red
+POLLING_PERIOD = 0.01
+
+
+def drive_until_brick_found(clock, backend, duty_cycle=50):
+    wheels = [LargeMotor(port=port, backend=backend) for port in ('outB', 'outC')]
+    color_sensor = ColorSensor(port='in1', backend=backend)
+
+    color_sensor.mode = ColorSensor.MODE_COL_COLOR
+    for m in wheels:
+        m.run_forever(duty_cycle_sp=duty_cycle)
+
+    loops = 0
+    while color_sensor.value() == 0:
+        clock.sleep(POLLING_PERIOD)
+        loops += 1
+
+    for m in wheels:
+        m.stop(stop_command='brake')
+    return loops, wheels[0].position
+
+
+def record(path):
+    clock = VirtualClock()
+    backend = MemoryBackend()
+    add_tacho_motor(backend, 'outB', clock=clock)
+    add_tacho_motor(backend, 'outC', clock=clock)
+    add_sensor(backend, 'lego-ev3-color', 'in1', clock=clock, signals={
+        ColorSensor.MODE_COL_COLOR: SampledSignal([(0, 0), (BRICK_TIME, BRICK_COLOR)])
+    })
+
+    with TraceRecorder(path) as recorder:
+        t0 = time.time()
+        loops, position = drive_until_brick_found(clock, backend)
+        wall = time.time() - t0
+    print('recorded : %5d loops  travel %5d deg  %6d events  wall %6.3f s' % (
+        loops, position, recorder.recorded, wall
+    ))
+
+
+def replay(path, label, **kwargs):
+    backend = ReplayBackend(path)
+    t0 = time.time()
+    loops, position = drive_until_brick_found(VirtualClock(), backend, **kwargs)
+    wall = time.time() - t0
+    print('%-8s : %5d loops  travel %5d deg  %6.0f loops/s  %d divergences  %d overruns' % (
+        label, loops, position, loops / wall, len(backend.divergences), backend.overruns
+    ))
+    for divergence in backend.divergences:
+        print('           %s' % (divergence,))
+
+
+def main():
+    fd, path = tempfile.mkstemp(prefix='ev3dev-', suffix='.trace')
+    os.close(fd)
+    try:
+        record(path)
+        replay(path, 'replayed')
+        replay(path, 'modified', duty_cycle=60)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
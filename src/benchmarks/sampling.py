@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Compares the timing of a sensor polled by a loop sleeping between reads with the one
+of :py:class:`ev3dev.sampling.Sampler`.
+
+A simulated color sensor and motor are sampled every 10 ms for a few seconds, by the
+usual loop (read, then sleep for the period) and by a sampler. The mean period, the
+worst period and the drift with respect to the ideal schedule are reported.
+
+The cost of keeping a long history is compared next, between a list of `(timestamp, value)`
+tuples trimmed to its capacity and the :py:class:`ev3dev.sampling.RingBuffer` pair used by
+the sampler.
+"""
+
+import sys
+import time
+
+from ev3dev.clock import get_clock
+from ev3dev.core import MemoryBackend
+from ev3dev.motors import LargeMotor
+from ev3dev.sampling import RingBuffer, Sampler
+from ev3dev.sensors import ColorSensor
+from ev3dev.sim import add_sensor, add_tacho_motor
+
+PERIOD = 0.01
+DURATION = 2.
+HISTORY = 10000
+APPENDS = 100000
+
+
+def make_devices():
+    backend = MemoryBackend()
+    add_tacho_motor(backend, 'outB')
+    add_sensor(backend, 'lego-ev3-color', 'in1', signals={ColorSensor.MODE_COL_REFLECT: 42})
+    sensor = ColorSensor(port='in1', backend=backend)
+    sensor.mode = ColorSensor.MODE_COL_REFLECT
+    return sensor, LargeMotor(port='outB', backend=backend)
+
+
+def sleeping_loop(sensor, motor):
+    clock = get_clock()
+    timestamps = []
+    end = clock.time() + DURATION
+    while clock.time() < end:
+        timestamps.append(clock.time())
+        sensor.value()
+        motor.position
+        clock.sleep(PERIOD)
+    return timestamps
+
+
+def sampler(sensor, motor):
+    sampler = Sampler(period=PERIOD, capacity=int(DURATION / PERIOD) + 10)
+    sampler.add(sensor, 'value0')
+    sampler.add(motor, 'position')
+    with sampler:
+        time.sleep(DURATION)
+    return [t for t, _ in sampler.history('in1:value0')]
+
+
+def tuples_history():
+    history = []
+    t0 = time.time()
+    for i in range(APPENDS):
+        history.append((float(i), i))
+        if len(history) > HISTORY:
+            del history[0]
+    elapsed = time.time() - t0
+    # the list, the tuples and their float (the small ints are shared by the interpreter)
+    size = sys.getsizeof(history) + sum(sys.getsizeof(sample) + sys.getsizeof(sample[0]) for sample in history)
+    return elapsed, size
+
+
+def ring_history():
+    timestamps, values = RingBuffer(HISTORY, 'd'), RingBuffer(HISTORY, 'l')
+    t0 = time.time()
+    for i in range(APPENDS):
+        timestamps.append(float(i))
+        values.append(i)
+    elapsed = time.time() - t0
+    size = sum(sys.getsizeof(buf._data) for buf in (timestamps, values))
+    return elapsed, size
+
+
+def main():
+    sensor, motor = make_devices()
+    for label, run in (('sleeping loop', sleeping_loop), ('sampler', sampler)):
+        timestamps = run(sensor, motor)
+        periods = [b - a for a, b in zip(timestamps, timestamps[1:])]
+        drift = timestamps[-1] - timestamps[0] - PERIOD * len(periods)
+        print('%-13s : %4d samples  mean period %6.3f ms  max %6.3f ms  drift %6.1f ms' % (
+            label, len(timestamps), sum(periods) / len(periods) * 1000, max(periods) * 1000, drift * 1000
+        ))
+
+    for label, run in (('tuples list', tuples_history), ('ring buffers', ring_history)):
+        elapsed, size = run()
+        print('%-13s : %6.2f us/sample  %5d kB for %d samples' % (
+            label, elapsed / APPENDS * 1e6, size // 1024, HISTORY
+        ))
+
+
+if __name__ == '__main__':
+    main()
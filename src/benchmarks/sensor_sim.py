@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Runs the sensor polling loops of `demos/grabber.py` on simulated devices, faster
+than real time.
+
+The search loop of `Grabber.drive_until_brick_found` (the robot drives forward until the
+color sensor sees a brick) is executed with two simulated wheel motors and a simulated
+color sensor scripted to detect a brick after a given time. The detection latency (the
+delay between the brick showing up and the robot stopping) is reported for several
+polling periods, together with the loop throughput.
+
+A second loop alternates reads in two modes of the color sensor, to show the cost of the
+mode switch latency, compared to staying in the same mode.
+"""
+
+import time
+
+from ev3dev.clock import VirtualClock
+from ev3dev.core import MemoryBackend
+from ev3dev.motors import LargeMotor
+from ev3dev.sensors import ColorSensor
+from ev3dev.sim import SampledSignal, add_sensor, add_tacho_motor
+
+BRICK_TIME = 2.53
+BRICK_COLOR = 5     # red
+POLLING_PERIODS = (0.1, 0.05, 0.01)
+MODE_TOGGLE_READS = 200
+
+
+def drive_until_brick_found(clock, wheels, color_sensor, period):
+    color_sensor.mode = ColorSensor.MODE_COL_COLOR
+    for m in wheels:
+        m.run_forever(duty_cycle_sp=50)
+
+    loops = 0
+    while color_sensor.value() == 0:
+        clock.sleep(period)
+        loops += 1
+
+    for m in wheels:
+        m.stop(stop_command='brake')
+    return loops
+
+
+def mode_toggle(clock, color_sensor, modes, period=0.01):
+    zeros = 0
+    for i in range(MODE_TOGGLE_READS):
+        color_sensor.mode = modes[i % len(modes)]
+        if color_sensor.value() == 0:
+            zeros += 1
+        clock.sleep(period)
+    return zeros
+
+
+def main():
+    for period in POLLING_PERIODS:
+        clock = VirtualClock()
+        backend = MemoryBackend()
+        add_tacho_motor(backend, 'outB', clock=clock)
+        add_tacho_motor(backend, 'outC', clock=clock)
+        add_sensor(backend, 'lego-ev3-color', 'in1', clock=clock, signals={
+            ColorSensor.MODE_COL_COLOR: SampledSignal([(0, 0), (BRICK_TIME, BRICK_COLOR)])
+        })
+
+        wheels = [LargeMotor(port=port, backend=backend) for port in ('outB', 'outC')]
+        color_sensor = ColorSensor(port='in1', backend=backend)
+
+        t0 = time.time()
+        loops = drive_until_brick_found(clock, wheels, color_sensor, period)
+        wall = time.time() - t0
+        print('period %4.0f ms : detection latency %5.1f ms  travel %5d deg  %6.0f loops/s  (x%.0f)' % (
+            period * 1000, (clock.time() - BRICK_TIME) * 1000, wheels[0].position, loops / wall, clock.time() / wall
+        ))
+
+    clock = VirtualClock()
+    backend = MemoryBackend()
+    add_sensor(backend, 'lego-ev3-color', 'in1', clock=clock, signals={
+        ColorSensor.MODE_COL_REFLECT: 40,
+        ColorSensor.MODE_COL_AMBIENT: 10,
+    })
+    color_sensor = ColorSensor(port='in1', backend=backend)
+    for label, modes in (
+        ('same mode', (ColorSensor.MODE_COL_REFLECT,)),
+        ('toggling', (ColorSensor.MODE_COL_REFLECT, ColorSensor.MODE_COL_AMBIENT)),
+    ):
+        zeros = mode_toggle(clock, color_sensor, modes)
+        print('%-9s : %3d/%d reads returned stale zeros' % (label, zeros, MODE_TOGGLE_READS))
+
+
+if __name__ == '__main__':
+    main()
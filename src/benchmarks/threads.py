@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Checks that concurrent reads of a sensor attribute return consistent values, and
+measures how the reads throughput evolves with the number of threads, for the two
+attribute I/O backends of ``FileCache``.
+
+A coarse lock serializing all the reads is measured too, for reference. The throughput
+can only grow with the number of threads when the reads wait on the device, since the
+interpreter lock is released during the syscalls only.
+
+The infrared sensor connected to port 1 is used when running on the brick, and the
+values are then only checked for being valid integers. Otherwise a fake ``lego-sensor``
+tree is created in a temporary directory, and the values are checked against the
+content of the fake attribute.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from ev3dev.core import Device, DirectoryBackend, SysfsBackend, set_device_backend
+from ev3dev.sensors import InfraredSensor
+
+READS = 40000
+THREAD_COUNTS = (1, 2, 4, 8)
+
+FAKE_VALUE = 28
+FAKE_SENSOR_ATTRIBUTES = {
+    'driver_name': InfraredSensor.DRIVERS[0],
+    'port_name': 'in1',
+    'mode': 'IR-PROX',
+    'modes': 'IR-PROX IR-SEEK IR-REMOTE',
+    'num_values': '1',
+    'decimals': '0',
+    'units': 'pct',
+    'bin_data_format': 's8',
+    'value0': str(FAKE_VALUE),
+}
+
+
+def make_fake_tree():
+    root = tempfile.mkdtemp(prefix='ev3dev-bench-')
+    sensor_dir = os.path.join(root, 'lego-sensor', 'sensor0')
+    os.makedirs(sensor_dir)
+    for name, value in FAKE_SENSOR_ATTRIBUTES.items():
+        with open(os.path.join(sensor_dir, name), 'w') as fp:
+            fp.write(value + '\n')
+    return root
+
+
+def run_threads(sensor, thread_count, expected, lock=None):
+    """ Reads the sensor value from several threads, and returns the aggregated throughput
+    and the number of wrong values or errors.
+    """
+    errors = [0] * thread_count
+    reads = READS // thread_count
+
+    def reader(slot):
+        # `value()` returns 0 for empty or truncated values, which is counted as an error too
+        for _ in range(reads):
+            if lock:
+                with lock:
+                    value = sensor.value()
+            else:
+                value = sensor.value()
+            if expected is not None and value != expected:
+                errors[slot] += 1
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(thread_count)]
+    t0 = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - t0
+
+    return reads * thread_count / elapsed, sum(errors)
+
+
+def measure(label, expected, lock=None):
+    sensor = InfraredSensor(port='in1')
+    # warm-up, so that files are opened and the mode is known before measuring (`value()`
+    # would hide the errors of an unusable backend)
+    sensor.get_attr_int('value0')
+
+    for thread_count in THREAD_COUNTS:
+        throughput, errors = run_threads(sensor, thread_count, expected, lock)
+        print('%-13s %2d thread(s) : %8.0f reads/s  %5d errors' % (label, thread_count, throughput, errors))
+
+
+def main():
+    fake_root = None
+    expected = None
+    if not os.path.isdir(os.path.join(SysfsBackend.ROOT_PATH, InfraredSensor.SYSTEM_CLASS_NAME)):
+        fake_root = make_fake_tree()
+        expected = FAKE_VALUE
+        set_device_backend(DirectoryBackend(fake_root))
+        print('not running on the brick, using fake tree in %s' % fake_root)
+
+    try:
+        for raw_io, label in ((False, 'file objects'), (True, 'raw pread')):
+            Device.RAW_IO = raw_io
+            measure(label, expected)
+
+        Device.RAW_IO = True
+        measure('coarse lock', expected, lock=threading.Lock())
+
+    finally:
+        if fake_root:
+            shutil.rmtree(fake_root)
+
+
+if __name__ == '__main__':
+    main()
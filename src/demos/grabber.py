@@ -38,6 +38,7 @@ import threading
 import os
 
 from ev3dev import ev3
+from ev3dev.clock import get_clock
 from ev3dev.display import Screen, Image
 
 
@@ -52,6 +53,10 @@ class Grabber(object):
     DEPOSIT_DIST = 250          # mm
 
     def __init__(self):
+        # the sleeps go through the process-wide clock, so that the mission can be run
+        # in virtual time on simulated devices
+        self._clock = get_clock()
+
         self._motor_left = ev3.LargeMotor(port='outB')
         self._motor_right = ev3.LargeMotor(port='outC')
         self._motors = (self._motor_left, self._motor_right)
@@ -130,9 +135,9 @@ class Grabber(object):
 
                 self.display_image("smiley-asleep")
                 while not (self._start_btn.is_pressed or self._done):
-                    time.sleep(0.1)
+                    self._clock.sleep(0.1)
                 while self._start_btn.is_pressed and not self._done:
-                    time.sleep(0.1)
+                    self._clock.sleep(0.1)
 
                 if not self._done:
                     self.display_image("smiley-waiting")
@@ -233,8 +238,8 @@ class Grabber(object):
     def run_and_wait_for_completion(self, absolute=True):
         for m in self._motors:
             m.command = m.COMMAND_RUN_TO_ABS_POS if absolute else m.COMMAND_RUN_TO_REL_POS
-        while any((m.state and 'holding' not in m.state for m in self._motors)):
-            time.sleep(0.1)
+        for m in self._motors:
+            m.wait_until_idle()
 
     def stop(self, brake=True):
         for m in self._motors:
@@ -245,7 +250,7 @@ class Grabber(object):
         limit = m.position + max_dist / self._dist_per_pulse
         self.drive_for_ever(power_pct=power_pct)
         while m.position <= limit and not self._color_sensor.value():
-            time.sleep(0.1)
+            self._clock.sleep(0.1)
         self.stop()
         return self._color_sensor.value()
 
@@ -268,7 +273,7 @@ class Grabber(object):
         self._gripper.close()
 
         # leave some time to the sensor for updating its reading accurately
-        time.sleep(0.2)
+        self._clock.sleep(0.2)
 
         return self._color_sensor.value()
 
@@ -276,6 +281,7 @@ class Grabber(object):
 class Gripper(object):
     def __init__(self, motor):
         self._motor = motor
+        self._clock = get_clock()
         self._open_position = self._close_position = None
 
     def calibrate(self):
@@ -285,10 +291,10 @@ class Gripper(object):
         def run_until_stalled(dc):
             last_pos = m.position
             m.run_forever(duty_cycle_sp=dc)
-            time.sleep(0.5)
+            self._clock.sleep(0.5)
             while m.position != last_pos:
                 last_pos = m.position
-                time.sleep(0.1)
+                self._clock.sleep(0.1)
             m.stop(stop_command='coast')
 
         m.reset()
@@ -298,7 +304,7 @@ class Gripper(object):
         run_until_stalled(-calibration_duty_cycle)
         # go back a bit to avoid stressing the mechanics too much
         m.run_to_rel_pos(position_sp=100)
-        time.sleep(0.5)
+        self._clock.sleep(0.5)
 
         # remember this position as the opening set point
         m.reset()
@@ -307,7 +313,7 @@ class Gripper(object):
         # do the same to find the closing position
         run_until_stalled(calibration_duty_cycle)
         m.run_to_rel_pos(position_sp=-100)
-        time.sleep(0.5)
+        self._clock.sleep(0.5)
 
         # remember this position as the closing set point
         self._close_position = m.position
@@ -323,9 +329,7 @@ class Gripper(object):
             stop_command='brake',
             position_sp=self._open_position if open_it else self._close_position
         )
-        # wait while the motor is moving
-        while m.state:
-            time.sleep(0.1)
+        m.wait_until_idle()
 
     def open(self):
         self._actuate_gripper(open_it=True)
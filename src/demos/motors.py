@@ -56,9 +56,9 @@ for m in motors:
     m.run_to_rel_pos(position_sp=360 * 2)
 
 print('+ waiting for end...')
-while m.state and 'holding' not in m.state:
-    time.sleep(0.1)
-print('+ complete.')
+for m in motors:
+    m.wait_until_idle()
+print('+ complete (detected after %.0f ms).' % (m.last_wait.latency * 1000))
 p_b, p_c = [m.position for m in motors]
 print('pos: B=%d C=%d' % (p_b, p_c))
 
@@ -71,9 +71,9 @@ for m in motors:
     m.run_to_rel_pos(position_sp=-360 * 2)
 
 print('+ waiting for end...')
-while m.state and 'holding' not in m.state:
-    time.sleep(0.1)
-print('+ complete.')
+for m in motors:
+    m.wait_until_idle()
+print('+ complete (detected after %.0f ms).' % (m.last_wait.latency * 1000))
 p_b, p_c = [m.position for m in motors]
 print('pos: B=%d C=%d' % (p_b, p_c))
 
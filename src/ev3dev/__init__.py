@@ -1 +1,11 @@
-__import__('pkg_resources').declare_namespace(__name__)
\ No newline at end of file
+# namespace package declaration, which does not need the (costly to import) pkg_resources
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
+
+from ._lazy import install as _install
+
+# the sub-modules are imported on first access, so that for instance the display
+# module and its dependency on PIL are not loaded by programs not using the screen
+_install(__name__, submodules=(
+    'clock', 'core', 'motors', 'sensors', 'sound', 'display', 'hotplug', 'aio', 'sampling', 'trace',
+    'replay', 'sim', 'bench', 'ev3', 'brickpi'
+))
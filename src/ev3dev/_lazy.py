@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Support for importing sub-modules, and the names defined by other modules, on their
+first access as attributes of a package.
+
+This is used for keeping the import of the ``ev3dev`` packages as cheap as possible,
+since on the brick CPU it represents a noticeable part of programs startup time.
+"""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """ A module importing its lazy attributes on first access.
+
+    The lazy attributes are defined by :py:func:`install`.
+    """
+    _lazy_submodules = frozenset()
+    _lazy_modules = ()
+    _star_modules = ()
+
+    def __getattr__(self, name):
+        # only called when the attribute has not been found the usual way
+        if name in self._lazy_submodules:
+            value = importlib.import_module('.' + name, self.__name__)
+
+        elif name == '__all__' and self._lazy_modules:
+            # only needed by star-imports, which import all the names anyway
+            names = set(
+                n for n, v in self.__dict__.items()
+                if not n.startswith('_') and not isinstance(v, types.ModuleType)
+            )
+            for module_name in self._star_modules:
+                names.update(importlib.import_module(module_name, self.__name__).__all__)
+            value = sorted(names)
+
+        elif name.startswith('_'):
+            # private and special names are never exported
+            raise AttributeError("module '%s' has no attribute '%s'" % (self.__name__, name))
+
+        else:
+            errors = []
+            for module_name in self._lazy_modules:
+                try:
+                    module = importlib.import_module(module_name, self.__name__)
+                except ImportError as e:
+                    # e.g. the display module without PIL
+                    errors.append(str(e))
+                    continue
+                if name in module.__all__:
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError("module '%s' has no attribute '%s'%s" % (
+                    self.__name__, name, ' (%s)' % ', '.join(errors) if errors else ''
+                ))
+
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        names = set(self.__dict__) | self._lazy_submodules
+        for module_name in self._lazy_modules:
+            try:
+                names.update(importlib.import_module(module_name, self.__name__).__all__)
+            except ImportError:
+                pass
+        return sorted(names)
+
+
+def install(module_name, submodules=(), modules=(), star_modules=None):
+    """ Turns a module into a :py:class:`LazyModule`.
+
+    It must be called at the end of the module code, as in:
+
+        >>> install(__name__, submodules=('display',), modules=('.sound',))
+
+    Args:
+        module_name (str): the module name
+        submodules (Optional[iterable[str]]): the names of the sub-modules imported
+            on first access
+        modules (Optional[iterable[str]]): the modules, relative to the module being
+            installed, which names listed in ``__all__`` are exported by it. They are
+            imported in this order when looking for a name, on first access to it.
+        star_modules (Optional[iterable[str]]): the ones of `modules` which names are
+            part of the ``__all__`` list of the module, built on first access. Default
+            to all of them.
+    """
+    module = sys.modules[module_name]
+    module._lazy_submodules = frozenset(submodules)
+    module._lazy_modules = tuple(modules)
+    module._star_modules = module._lazy_modules if star_modules is None else tuple(star_modules)
+
+    try:
+        module.__class__ = LazyModule
+
+    except TypeError:
+        # Python 2 does not allow changing the class of a module. It is replaced instead in
+        # sys.modules (the import machinery takes the module from there once it has been
+        # executed), keeping a reference to the original one so that its globals are not
+        # cleared when it is deleted.
+        lazy = LazyModule(module_name)
+        lazy.__dict__.update(module.__dict__)
+        lazy._original_module = module
+        sys.modules[module_name] = lazy
+
+
+#: The modules exporting the definitions of the target packages (``ev3dev.ev3``,
+#: ``ev3dev.brickpi``) on top of their ``platform`` module, relative to these packages
+PLATFORM_MODULES = ('..motors', '..sensors', '..sound', '..display')
+
+#: The modules of :py:data:`PLATFORM_MODULES` which definitions are star-imported by the
+#: target packages (the display one requires PIL)
+PLATFORM_STAR_MODULES = ('..motors', '..sensors', '..sound')
+
+
+def install_platform(module_name):
+    """ Turns a target package into a :py:class:`LazyModule` exporting the definitions
+    of :py:data:`PLATFORM_MODULES`.
+
+    It must be called at the end of the package code, once the names of its ``platform``
+    module have been imported.
+
+    Args:
+        module_name (str): the package name
+    """
+    install(module_name, modules=PLATFORM_MODULES, star_modules=PLATFORM_STAR_MODULES)
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Asyncio API for the devices.
+
+This module provides coroutines and asynchronous iterators for the common needs of
+programs which would otherwise dedicate a thread to each concern (polling a sensor,
+scanning the buttons, animating the LEDs,...), so that they can all run as tasks of a
+single event loop.
+
+The sysfs attributes are read and written in the loop thread, since the drivers serve
+them from their own buffers and the calls return immediately. The few writes which are
+processed synchronously by the drivers (see :py:data:`BLOCKING_WRITES`), and the
+blocking calls of the application (e.g. waiting for the end of a sound) are run in a
+small thread pool instead (see :py:func:`run_blocking`).
+
+Example:
+
+    >>> async def watch_touch(sensor):
+    >>>     async for pressed in SensorValues(sensor, changes_only=True):
+    >>>         print('pressed' if pressed else 'released')
+    >>>
+    >>> async def watch_buttons(buttons):
+    >>>     async for button, pressed in ButtonEvents(buttons):
+    >>>         print(button, pressed)
+    >>>
+    >>> loop = asyncio.get_event_loop()
+    >>> loop.run_until_complete(asyncio.gather(watch_touch(sensor), watch_buttons(buttons)))
+
+.. note::
+
+    This module requires Python 3.5 or later. It is not imported by the package, and the
+    remainder of the library can thus still be used with Python 2.
+
+The delays are measured with the time of the event loop, and not with the process-wide
+clock of :py:mod:`ev3dev.clock`.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import threading
+
+from ev3dev.core import Led, LegoPort
+from ev3dev.sensors import Sensor
+
+__all__ = [
+    'EXECUTOR_WORKERS', 'BLOCKING_WRITES', 'get_executor', 'run_blocking',
+    'get_attribute', 'set_attribute', 'wait_until', 'wait_while', 'wait_until_idle',
+    'SensorValues', 'ButtonEvents',
+]
+
+#: The number of threads of the pool running the blocking calls
+EXECUTOR_WORKERS = 2
+
+#: The attributes which writes are processed synchronously by the drivers, by device class.
+#: Changing the mode of a port loads the driver of the new device, setting a LED trigger
+#: may load the trigger module, and the commands and modes of I2C sensors are transferred
+#: on the bus before the write returns.
+BLOCKING_WRITES = {
+    LegoPort.SYSTEM_CLASS_NAME: frozenset(('mode', 'set_device')),
+    Sensor.SYSTEM_CLASS_NAME: frozenset(('mode', 'command')),
+    Led.SYSTEM_CLASS_NAME: frozenset(('trigger',)),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """ Returns the thread pool running the blocking calls.
+
+    It is created on first use, with :py:data:`EXECUTOR_WORKERS` threads.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: the executor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(EXECUTOR_WORKERS)
+        return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """ Runs a blocking call in the thread pool, without blocking the event loop.
+
+    Example:
+
+        >>> await run_blocking(Sound.speak('Hello').wait)
+
+    Args:
+        func (callable): the function to be called
+        args: its positional arguments
+        kwargs: its keyword arguments
+
+    Returns:
+        the result of the call
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def get_attribute(device, attribute):
+    """ Reads an attribute of a device.
+
+    Args:
+        device (ev3dev.core.Device): the device
+        attribute (str): the attribute name
+
+    Returns:
+        str: the attribute value
+    """
+    return device.get_attr_string(attribute)
+
+
+async def set_attribute(device, attribute, value):
+    """ Writes an attribute of a device.
+
+    The write is run in the thread pool if it is listed in :py:data:`BLOCKING_WRITES`
+    for the class of the device.
+
+    Args:
+        device (ev3dev.core.Device): the device
+        attribute (str): the attribute name
+        value: the attribute value, which is converted to a string
+    """
+    if attribute in BLOCKING_WRITES.get(device.SYSTEM_CLASS_NAME, ()):
+        await run_blocking(device.set_attr_string, attribute, value)
+    else:
+        device.set_attr_string(attribute, value)
+
+
+async def _wait_for_state(motor, condition, timeout, period):
+    loop = asyncio.get_event_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while not condition(motor.state):
+        if deadline is not None and loop.time() >= deadline:
+            return False
+        await asyncio.sleep(period)
+    return True
+
+
+async def wait_until(motor, state, timeout=None, period=0.01):
+    """ Waits until a flag is present in the state of a motor.
+
+    Example:
+
+        >>> motor.run_to_rel_pos(position_sp=360)
+        >>> await wait_until(motor, 'holding')
+
+    Args:
+        motor (ev3dev.motors.BaseMotor): the motor
+        state (str): the state flag (e.g. `running`, `holding`,...)
+        timeout (Optional[float]): the maximum delay to wait for, in seconds. Default to None
+            (no limit)
+        period (Optional[float]): the polling period, in seconds. Default to 0.01.
+
+    Returns:
+        bool: True if the flag is present, False if the timeout expired before
+    """
+    return await _wait_for_state(motor, lambda flags: state in flags, timeout, period)
+
+
+async def wait_while(motor, state, timeout=None, period=0.01):
+    """ Waits while a flag is present in the state of a motor.
+
+    Example:
+
+        >>> motor.run_timed(time_sp=1000)
+        >>> await wait_while(motor, 'running')
+
+    Args:
+        motor (ev3dev.motors.BaseMotor): the motor
+        state (str): the state flag (e.g. `running`, `holding`,...)
+        timeout (Optional[float]): the maximum delay to wait for, in seconds. Default to None
+            (no limit)
+        period (Optional[float]): the polling period, in seconds. Default to 0.01.
+
+    Returns:
+        bool: True if the flag is not present anymore, False if the timeout expired before
+    """
+    return await _wait_for_state(motor, lambda flags: state not in flags, timeout, period)
+
+
+async def wait_until_idle(motor, timeout=None, period=0.01):
+    """ Waits until a motor is not running anymore (see
+    :py:meth:`ev3dev.motors.BaseMotor.wait_until_idle`).
+
+    Args:
+        motor (ev3dev.motors.BaseMotor): the motor
+        timeout (Optional[float]): the maximum delay to wait for, in seconds. Default to None
+            (no limit)
+        period (Optional[float]): the polling period, in seconds. Default to 0.01.
+
+    Returns:
+        bool: True if the motor is idle, False if the timeout expired before
+    """
+    return await _wait_for_state(
+        motor, lambda flags: 'running' not in flags or 'holding' in flags, timeout, period
+    )
+
+
+class _PeriodicPoller(object):
+    """ Base class of the asynchronous iterators polling a device periodically.
+
+    The polls are scheduled at absolute times, so that the time spent in the loop body
+    does not accumulate as a drift.
+    """
+
+    def __init__(self, period):
+        self._period = period
+        self._next_poll = None
+
+    async def _wait_next_poll(self):
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        if self._next_poll is None:
+            self._next_poll = now
+        else:
+            self._next_poll += self._period
+            if self._next_poll > now:
+                await asyncio.sleep(self._next_poll - now)
+            else:
+                # late: restart the schedule from now instead of issuing a burst of polls
+                self._next_poll = now
+
+    def __aiter__(self):
+        return self
+
+
+class SensorValues(_PeriodicPoller):
+    """ Asynchronous iterator over the values of a sensor.
+
+    The sensor is polled every `period` seconds. By default, every value read is
+    returned. With `changes_only`, only the ones differing from the previous one are,
+    the first value excepted.
+
+    The iteration never ends by itself. Break out of the loop, or cancel the task, to stop it.
+    """
+
+    def __init__(self, sensor, period=0.01, index=0, changes_only=False):
+        """
+        Args:
+            sensor (ev3dev.sensors.Sensor): the sensor
+            period (Optional[float]): the polling period, in seconds. Default to 0.01.
+            index (Optional[int]): the index of the value. Default to 0.
+            changes_only (Optional[bool]): if True, only the changes are returned. Default
+                to False.
+        """
+        super(SensorValues, self).__init__(period)
+        self._sensor = sensor
+        self._index = index
+        self._changes_only = changes_only
+        self._last_value = None
+
+    async def __anext__(self):
+        while True:
+            await self._wait_next_poll()
+            value = self._sensor.value(self._index)
+            if not self._changes_only or value != self._last_value:
+                self._last_value = value
+                return value
+
+
+class ButtonEvents(_PeriodicPoller):
+    """ Asynchronous iterator over the state changes of buttons.
+
+    The buttons are polled every `period` seconds, and each change is returned as a
+    `(button_name, pressed)` tuple. The buttons pressed when the iteration starts are
+    reported as changes too.
+
+    The handlers of the button manager (see
+    :py:meth:`ev3dev.core.ButtonManagerBase.process`) are not invoked. The iteration
+    never ends by itself.
+    """
+
+    def __init__(self, buttons, period=0.1):
+        """
+        Args:
+            buttons (ev3dev.core.ButtonManagerBase): the buttons
+            period (Optional[float]): the polling period, in seconds. Default to 0.1.
+        """
+        super(ButtonEvents, self).__init__(period)
+        self._buttons = buttons
+        self._state = set()
+        self._changes = collections.deque()
+
+    async def __anext__(self):
+        while not self._changes:
+            await self._wait_next_poll()
+            new_state = self._buttons.buttons_pressed
+            for button in sorted(new_state.symmetric_difference(self._state)):
+                self._changes.append((button, button in new_state))
+            self._state = new_state
+        return self._changes.popleft()
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Micro-benchmarks of the hot paths of the library.
+
+The suite is run with::
+
+    $ python -m ev3dev.bench [--backend {sysfs,memory}] [--output results.json]
+
+Each benchmark times a single operation (reading an attribute, creating a device,
+updating the screen,...), repeated many times. The best, median and mean durations
+per call are reported, in microseconds, and can be saved as JSON for being compared
+with the results of another version of the library or of another backend::
+
+    $ python -m ev3dev.bench --output new.json --compare old.json
+
+The `memory` backend measures the cost of the library itself, on simulated devices
+(see :py:mod:`ev3dev.sim`) which clock is frozen so that the results are reproducible.
+The `sysfs` backend measures the real cost on the brick, using the devices which are
+plugged. The benchmarks for which there is no suitable device are skipped.
+
+The screen updates are measured on an off-screen framebuffer, so that both the 1 bpp
+(EV3) and 16 bpp (BrickPi/PiStorm displays) conversions can be measured on any target.
+They require PIL.
+
+.. note::
+
+    The sound benchmark spawns real processes, whatever the backend.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import time
+from collections import namedtuple, OrderedDict
+from timeit import default_timer
+
+from ev3dev.clock import VirtualClock
+from ev3dev.core import Led, MemoryBackend, SysfsBackend, set_device_backend
+from ev3dev.motors import BaseMotor, RegulatedMotor
+from ev3dev.sensors import Sensor
+
+__all__ = [
+    'Benchmark', 'BenchmarkResult', 'SkipBenchmark', 'BenchmarkEnvironment', 'benchmark',
+    'BENCHMARKS', 'run_benchmark', 'run_suite', 'main'
+]
+
+#: A registered benchmark
+#:
+#: - `name`: the dotted name of the benchmark
+#: - `setup`: a function accepting the :py:class:`BenchmarkEnvironment` and returning the
+#:   operation to be timed, or a `(operation, cleanup)` pair when something must be done
+#:   after each repetition
+#: - `number`: the default number of calls per repetition
+Benchmark = namedtuple('Benchmark', 'name setup number')
+
+#: The result of a benchmark, durations being given in microseconds per call
+BenchmarkResult = namedtuple('BenchmarkResult', 'name number repeat best median mean')
+
+#: The registered benchmarks, by name
+BENCHMARKS = OrderedDict()
+
+
+class SkipBenchmark(Exception):
+    """ Raised by the setup of a benchmark which cannot run in the current environment.
+    """
+
+
+def benchmark(name, number=1000):
+    """ Decorator registering a benchmark setup function.
+
+    Args:
+        name (str): the name of the benchmark
+        number (Optional[int]): the default number of calls per repetition
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, number)
+        return setup
+    return decorator
+
+
+class _AnyTachoMotor(RegulatedMotor):
+    """ Any tacho motor.
+    """
+    DRIVERS = ['-motor', 'fi-l12-']
+
+
+class _BareTachoMotor(_AnyTachoMotor):
+    """ Any tacho motor, which creation and collection have no effect on the device (the
+    initial duty cycle setpoint is not written, and the motor is not stopped when collected).
+    """
+    def __init__(self, **kwargs):
+        BaseMotor.__init__(self, driver_name=self.DRIVERS, **kwargs)
+
+    def __del__(self):
+        pass
+
+
+class _AnySensor(Sensor):
+    """ Any LEGO compatible sensor.
+    """
+    DRIVERS = ['lego-', 'nxt-', 'ht-', 'ms-']
+
+
+class BenchmarkEnvironment(object):
+    """ The devices the benchmarks run on.
+
+    They are created on first use, and :py:class:`SkipBenchmark` is raised if there is
+    none available.
+    """
+
+    #: The supported backends
+    BACKENDS = ('sysfs', 'memory')
+
+    # the LEDs of the EV3, and the attributes of their simulation
+    _LED_NAMES = ('ev3-left0:red:ev3dev', 'ev3-right0:red:ev3dev', 'ev3-left1:green:ev3dev',
+                  'ev3-right1:green:ev3dev')
+    _LED_ATTRIBUTES = {
+        'brightness': '0',
+        'max_brightness': '255',
+        'trigger': 'none [default-on] timer heartbeat',
+        'delay_on': '500',
+        'delay_off': '500',
+    }
+
+    def __init__(self, backend_name):
+        """
+        Args:
+            backend_name (str): one of :py:attr:`BACKENDS`
+
+        Raises:
+            ValueError: if the backend is not supported
+        """
+        if backend_name == 'memory':
+            self.backend = self._memory_backend()
+        elif backend_name == 'sysfs':
+            self.backend = SysfsBackend()
+        else:
+            raise ValueError('unsupported backend: %s' % backend_name)
+        self.backend_name = backend_name
+        self._devices = {}
+
+    @staticmethod
+    def _memory_backend():
+        from ev3dev.sim import add_sensor, add_tacho_motor
+
+        # the clock is never advanced, so that the simulators do not integrate anything
+        clock = VirtualClock()
+        backend = MemoryBackend()
+        add_tacho_motor(backend, 'outA', clock=clock)
+        add_sensor(backend, 'lego-ev3-color', 'in1', clock=clock, signals={'COL-REFLECT': 42})
+        for name in BenchmarkEnvironment._LED_NAMES:
+            backend.add_device(Led.SYSTEM_CLASS_NAME, name, BenchmarkEnvironment._LED_ATTRIBUTES)
+        return backend
+
+    @staticmethod
+    def default_backend_name():
+        """ Returns the name of the backend used by default, which is `sysfs` when
+        running on the brick, and `memory` otherwise.
+
+        Returns:
+            str: the backend name
+        """
+        root = os.path.join(SysfsBackend.ROOT_PATH, RegulatedMotor.SYSTEM_CLASS_NAME)
+        return 'sysfs' if os.path.isdir(root) else 'memory'
+
+    def _device(self, key, factory, what):
+        try:
+            device = self._devices[key]
+        except KeyError:
+            try:
+                device = factory()
+            except (IOError, OSError) as e:
+                # the device class is not published at all
+                device = SkipBenchmark('no %s found: %s' % (what, e))
+            else:
+                if not device.connected:
+                    device = SkipBenchmark('no %s found' % what)
+            # the reason of the failure is remembered, to avoid searching again
+            self._devices[key] = device
+
+        if isinstance(device, SkipBenchmark):
+            raise device
+        return device
+
+    def motor(self):
+        """ Returns a tacho motor.
+
+        Returns:
+            RegulatedMotor: the motor
+        """
+        return self._device('motor', lambda: _AnyTachoMotor(backend=self.backend), 'tacho motor')
+
+    def sensor(self):
+        """ Returns a sensor.
+
+        Returns:
+            Sensor: the sensor
+        """
+        return self._device('sensor', lambda: _AnySensor(backend=self.backend), 'sensor')
+
+    def buttons(self):
+        """ Returns the EV3 buttons.
+
+        Returns:
+            ev3dev.ev3.Buttons: the buttons
+        """
+        from ev3dev.ev3 import Buttons
+
+        try:
+            return self._devices['buttons']
+        except KeyError:
+            buttons = Buttons(backend=self.backend)
+            try:
+                buttons.buttons_pressed
+            except (IOError, OSError) as e:
+                raise SkipBenchmark('buttons not available: %s' % e)
+            self._devices['buttons'] = buttons
+            return buttons
+
+
+def _offscreen_screen(xres, yres, bpp, line_length):
+    """ Returns a screen which framebuffer is a plain memory buffer.
+    """
+    from ev3dev.display import FbMem, Screen, Image, ImageDraw
+
+    class OffscreenScreen(Screen):
+        def __init__(self):
+            self.path = 'offscreen'
+            self.fid = None
+            self.var_info = FbMem.VarScreenInfo(xres=xres, yres=yres, bits_per_pixel=bpp)
+            self.fix_info = FbMem.FixScreenInfo(line_length=line_length)
+            self.mmap = bytearray(line_length * yres)
+            # same geometry as the one of Screen
+            self._img = Image.new('1' if bpp == 1 else 'RGB', (line_length * 8 // bpp, yres), 'white')
+            self._draw = ImageDraw.Draw(self._img)
+
+        def __del__(self):
+            pass
+
+    return OffscreenScreen()
+
+
+# ----------------------------------------------------------------------------------------
+# The benchmarks
+# ----------------------------------------------------------------------------------------
+
+@benchmark('attr.read_int', number=2000)
+def _attr_read_int(env):
+    m = env.motor()
+    return lambda: m.get_attr_int('position')
+
+
+@benchmark('attr.read_string', number=2000)
+def _attr_read_string(env):
+    m = env.motor()
+    return lambda: m.get_attr_string('stop_command')
+
+
+@benchmark('attr.read_set', number=2000)
+def _attr_read_set(env):
+    m = env.motor()
+    return lambda: m.get_attr_set('state')
+
+
+@benchmark('attr.write_int', number=2000)
+def _attr_write_int(env):
+    m = env.motor()
+    return lambda: m.set_attr_int('duty_cycle_sp', 0)
+
+
+@benchmark('attr.write_string', number=2000)
+def _attr_write_string(env):
+    m = env.motor()
+    return lambda: m.set_attr_string('stop_command', 'coast')
+
+
+@benchmark('device.init', number=200)
+def _device_init(env):
+    """ The discovery and binding cost of a device, without the writes done by the motor
+    classes on creation and collection.
+    """
+    port = env.motor().port_name
+    backend = env.backend
+    return lambda: _BareTachoMotor(port=port, backend=backend)
+
+
+@benchmark('device.init_refresh', number=50)
+def _device_init_refresh(env):
+    """ The discovery cost when the device index must be rebuilt, as after a hotplug event.
+    """
+    port = env.motor().port_name
+    backend = env.backend
+
+    def operation():
+        backend.index.refresh(RegulatedMotor.SYSTEM_CLASS_NAME)
+        _BareTachoMotor(port=port, backend=backend)
+
+    return operation
+
+
+@benchmark('sensor.value', number=2000)
+def _sensor_value(env):
+    s = env.sensor()
+    return s.value
+
+
+@benchmark('sensor.bin_data', number=2000)
+def _sensor_bin_data(env):
+    s = env.sensor()
+    return s.bin_data
+
+
+@benchmark('sensor.values', number=2000)
+def _sensor_values(env):
+    s = env.sensor()
+    return s.values
+
+
+@benchmark('buttons.pressed', number=2000)
+def _buttons_pressed(env):
+    buttons = env.buttons()
+    return lambda: buttons.buttons_pressed
+
+
+def _screen_update(xres, yres, bpp, line_length):
+    try:
+        screen = _offscreen_screen(xres, yres, bpp, line_length)
+    except ImportError as e:
+        raise SkipBenchmark(str(e))
+    screen.draw.rectangle((10, 10, 60, 40), fill='black')
+    return screen.update
+
+
+@benchmark('screen.update_1bpp', number=100)
+def _screen_update_1bpp(env):
+    # the EV3 LCD
+    return _screen_update(178, 128, 1, 24)
+
+
+@benchmark('screen.update_16bpp', number=20)
+def _screen_update_16bpp(env):
+    # the usual TFT displays of the Raspberry Pi based targets
+    return _screen_update(320, 240, 16, 640)
+
+
+@benchmark('leds.mix_colors', number=500)
+def _leds_mix_colors(env):
+    from ev3dev.ev3 import Leds
+
+    try:
+        connected = all(led.connected for led in Leds.ALL)
+    except (IOError, OSError) as e:
+        raise SkipBenchmark('EV3 LEDs not found: %s' % e)
+    if not connected:
+        raise SkipBenchmark('EV3 LEDs not found')
+    return lambda: Leds.mix_colors(red=1, green=0.5)
+
+
+@benchmark('sound.spawn', number=20)
+def _sound_spawn(env):
+    from ev3dev.sound import Sound
+
+    if not os.path.exists('/usr/bin/beep'):
+        raise SkipBenchmark('beep command not found')
+    processes = []
+
+    def cleanup():
+        for p in processes:
+            p.wait()
+        del processes[:]
+
+    return (lambda: processes.append(Sound.beep('-l 1'))), cleanup
+
+
+# ----------------------------------------------------------------------------------------
+# The runner
+# ----------------------------------------------------------------------------------------
+
+def run_benchmark(bench, env, number=None, repeat=5):
+    """ Runs a benchmark.
+
+    The garbage collector is disabled while timing, as :py:mod:`timeit` does.
+
+    Args:
+        bench (Benchmark): the benchmark
+        env (BenchmarkEnvironment): the environment it runs in
+        number (Optional[int]): the number of calls per repetition. Default to the one of
+            the benchmark.
+        repeat (Optional[int]): the number of repetitions. Default to 5.
+
+    Returns:
+        BenchmarkResult: the result
+
+    Raises:
+        SkipBenchmark: if the benchmark cannot run in this environment
+    """
+    operation = bench.setup(env)
+    cleanup = None
+    if isinstance(operation, tuple):
+        operation, cleanup = operation
+    number = number or bench.number
+
+    # warm-up, so that files are opened and caches are filled before timing
+    operation()
+    if cleanup:
+        cleanup()
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            loops = range(number)
+            gc.disable()
+            t0 = default_timer()
+            for _ in loops:
+                operation()
+            elapsed = default_timer() - t0
+            if gc_enabled:
+                gc.enable()
+            if cleanup:
+                cleanup()
+            timings.append(elapsed / number * 1e6)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    timings.sort()
+    return BenchmarkResult(
+        bench.name, number, repeat, timings[0], timings[len(timings) // 2], sum(timings) / repeat
+    )
+
+
+def run_suite(env, names=None, number=None, repeat=5, report=None):
+    """ Runs a set of benchmarks.
+
+    Args:
+        env (BenchmarkEnvironment): the environment they run in
+        names (Optional[iterable[str]]): the names, or name prefixes (e.g. `attr.`), of the
+            benchmarks to run. Default to all.
+        number (Optional[int]): the number of calls per repetition. Default to the one of
+            each benchmark.
+        repeat (Optional[int]): the number of repetitions. Default to 5.
+        report (Optional[callable]): a function called with each result, or with the name
+            and the reason of the benchmarks which are skipped
+
+    Returns:
+        tuple[list[BenchmarkResult], dict[str, str]]: the results, and the reason of the
+        skipped benchmarks, by name
+    """
+    results, skipped = [], OrderedDict()
+    for bench in BENCHMARKS.values():
+        if names and not any(bench.name.startswith(name) for name in names):
+            continue
+        try:
+            result = run_benchmark(bench, env, number, repeat)
+        except SkipBenchmark as e:
+            skipped[bench.name] = str(e)
+            if report:
+                report(bench.name, str(e))
+        else:
+            results.append(result)
+            if report:
+                report(result)
+    return results, skipped
+
+
+def _report(result, reason=None):
+    if reason is not None:
+        print('%-22s skipped: %s' % (result, reason))
+    else:
+        print('%-22s %10.2f %10.2f %10.2f  us/call' % (result.name, result.best, result.median, result.mean))
+
+
+def _compare(results, path):
+    with open(path) as fp:
+        reference = json.load(fp)
+    reference_results = reference.get('results', {})
+
+    print('\ncompared to %s (%s backend, %s):' % (
+        path, reference.get('backend'), reference.get('label') or reference.get('date')
+    ))
+    for result in results:
+        ref = reference_results.get(result.name)
+        if ref:
+            print('%-22s %10.2f -> %10.2f  us/call  %+7.1f %%' % (
+                result.name, ref['best'], result.best, (result.best / ref['best'] - 1) * 100
+            ))
+
+
+def main(args=None):
+    """ The command line entry point.
+
+    Args:
+        args (Optional[list[str]]): the command line arguments. Default to the ones of the process.
+    """
+    parser = argparse.ArgumentParser(prog='python -m ev3dev.bench', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='benchmarks to run, or name prefixes (default: all)')
+    parser.add_argument('-b', '--backend', choices=BenchmarkEnvironment.BACKENDS,
+                        help='device backend (default: sysfs on the brick, memory otherwise)')
+    parser.add_argument('-n', '--number', type=int, help='calls per repetition')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='repetitions (default: 5)')
+    parser.add_argument('-o', '--output', help='JSON file the results are written to')
+    parser.add_argument('-c', '--compare', metavar='JSON', help='results to compare with')
+    parser.add_argument('-l', '--label', help='label stored in the results (e.g. a version)')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    options = parser.parse_args(args)
+
+    if options.list:
+        for name in BENCHMARKS:
+            print(name)
+        return
+
+    env = BenchmarkEnvironment(options.backend or BenchmarkEnvironment.default_backend_name())
+    # the LEDs are bound to the process-wide backend
+    set_device_backend(env.backend)
+
+    print('backend: %s, python %s' % (env.backend_name, platform.python_version()))
+    print('%-22s %10s %10s %10s' % ('', 'best', 'median', 'mean'))
+    results, skipped = run_suite(env, options.names, options.number, options.repeat, _report)
+
+    if options.output:
+        data = OrderedDict((
+            ('label', options.label),
+            ('date', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('backend', env.backend_name),
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('machine', platform.machine()),
+            ('results', OrderedDict((r.name, OrderedDict((
+                ('number', r.number), ('repeat', r.repeat),
+                ('best', r.best), ('median', r.median), ('mean', r.mean),
+            ))) for r in results)),
+            ('skipped', skipped),
+        ))
+        with open(options.output, 'w') as fp:
+            json.dump(data, fp, indent=2)
+            fp.write('\n')
+
+    if options.compare:
+        _compare(results, options.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -49,8 +49,8 @@ class Leds(object):
 
 # ~autogen led-colors platforms.brickpi.led>currentClass
 
-    blue_one = Led(name='brickpi1:blue:ev3dev')
-    blue_two = Led(name='brickpi2:blue:ev3dev')
+    blue_one = LazyDevice(Led, name='brickpi1:blue:ev3dev')
+    blue_two = LazyDevice(Led, name='brickpi2:blue:ev3dev')
 
     @staticmethod
     def mix_colors(blue):
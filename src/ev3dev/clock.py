@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Time sources used by the library for its own polling loops and timestamps.
+
+The button scanner, the device snapshots, the waits and the simulated devices read the
+time and sleep through the process-wide clock returned by :py:func:`get_clock`. By default
+it is the :py:class:`SystemClock`, which uses the real time.
+
+When running on simulated devices, installing a :py:class:`VirtualClock` with
+:py:func:`set_clock` makes the sleeps return immediately while advancing the virtual time,
+so that a program polling its devices every 100ms runs as fast as the CPU allows, with
+exactly the same sequence of reads as in real time.
+
+Example:
+
+    >>> clock = VirtualClock()
+    >>> set_clock(clock)
+    >>> backend = MemoryBackend()
+    >>> add_tacho_motor(backend, 'outA')          # the simulator uses the process clock
+    >>> m = LargeMotor(port='outA', backend=backend)
+    >>> m.run_timed(time_sp=2000, duty_cycle_sp=50)
+    >>> while m.state:
+    >>>     clock.sleep(0.1)                      # returns immediately
+    >>> clock.time()
+    2.0
+"""
+
+import threading
+import time
+
+__all__ = ['Clock', 'SystemClock', 'VirtualClock', 'get_clock', 'set_clock', 'monotonic']
+
+#: Monotonic clock used for timestamping samples (Python 2 has no monotonic clock, and
+#: wall clock time is used instead)
+monotonic = getattr(time, 'monotonic', time.time)
+
+
+class Clock(object):
+    """ Abstract root class of the clocks.
+
+    A clock can be called as a function returning its time, so that it can be passed
+    wherever a time source callable is expected.
+    """
+
+    def time(self):
+        """ Returns the current time, in seconds.
+
+        Only differences between two values are meaningful.
+
+        Returns:
+            float: the time
+        """
+        raise NotImplementedError()
+
+    def __call__(self):
+        return self.time()
+
+    def sleep(self, delay):
+        """ Suspends the calling thread for a given delay.
+
+        Args:
+            delay (float): the delay, in seconds
+        """
+        raise NotImplementedError()
+
+    def sleep_until(self, deadline):
+        """ Suspends the calling thread until a given time.
+
+        Returns immediately if the time is already passed.
+
+        Args:
+            deadline (float): the time to wait for, in the clock reference
+        """
+        delay = deadline - self.time()
+        if delay > 0:
+            self.sleep(delay)
+
+
+class SystemClock(Clock):
+    """ The real time clock, based on the monotonic clock of the system when available.
+    """
+    # (sleep is defined first, since the time attribute hides the time module in the class body)
+    sleep = staticmethod(time.sleep)
+    time = __call__ = staticmethod(monotonic)
+
+
+class VirtualClock(Clock):
+    """ A clock which time only moves when told to.
+
+    In auto-advance mode (the default), a sleep returns immediately after having moved
+    the time forward by the requested delay. This is the mode for single-threaded programs,
+    which run faster than real time without any change.
+
+    When several threads sleep on the clock (e.g. with the buttons scanner running), each
+    of them would move the time forward on its own. The auto-advance mode must then be
+    disabled: sleeps block until the time is moved past their deadline by calls to
+    :py:meth:`advance` or :py:meth:`advance_to`, typically made by the test harness.
+    Note that a thread blocked in a sleep will only notice a stop request (e.g. the one
+    of :py:meth:`ev3dev.core.ButtonManagerBase.stop_scanner`) once the time is advanced.
+    """
+
+    def __init__(self, start=0.0, auto_advance=True):
+        """
+        Args:
+            start (Optional[float]): the initial time, in seconds. Default to 0.
+            auto_advance (Optional[bool]): if True (the default), sleeps advance the time
+        """
+        self._now = float(start)
+        self._auto_advance = auto_advance
+        self._changed = threading.Condition()
+
+    @property
+    def auto_advance(self):
+        """ Tells if the sleeps advance the time.
+
+        :type: bool
+        """
+        return self._auto_advance
+
+    def time(self):
+        return self._now
+
+    __call__ = time
+
+    def sleep(self, delay):
+        self.sleep_until(self._now + delay)
+
+    def sleep_until(self, deadline):
+        with self._changed:
+            if self._auto_advance:
+                self._advance_to(deadline)
+            else:
+                while self._now < deadline:
+                    self._changed.wait()
+
+    def advance(self, delay):
+        """ Moves the time forward and wakes up the threads which deadline is reached.
+
+        Args:
+            delay (float): the time increment, in seconds
+        """
+        with self._changed:
+            self._advance_to(self._now + delay)
+
+    def advance_to(self, t):
+        """ Moves the time forward up to a given time, and wakes up the threads which
+        deadline is reached.
+
+        Does nothing if the time is already passed.
+
+        Args:
+            t (float): the new time, in seconds
+        """
+        with self._changed:
+            self._advance_to(t)
+
+    def _advance_to(self, t):
+        if t > self._now:
+            self._now = t
+            self._changed.notify_all()
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """ Returns the process-wide clock.
+
+    Returns:
+        Clock: the clock
+    """
+    return _clock
+
+
+def set_clock(clock):
+    """ Selects the clock used by default by the library for the whole process.
+
+    The devices simulators and the button scanners read the clock when they are created
+    or started, so the clock must be selected before.
+
+    Args:
+        clock (Optional[Clock]): the clock, or None to restore the :py:class:`SystemClock`
+    """
+    global _clock
+    _clock = clock or SystemClock()
@@ -27,135 +27,1700 @@
 import array
 import fcntl
 import fnmatch
+import math
 import os
 import os.path
 import re
+import select
+import shutil
 from collections import namedtuple
+import heapq
+import itertools
 import threading
-import time
+import weakref
+
+# monotonic is imported for the modules using it from here
+from ev3dev.clock import get_clock, monotonic
 
 INPUT_AUTO = ''
 OUTPUT_AUTO = ''
 
 
-class FileCache(object):
-    """ Attribute reader/writer with cached file access
+# Maximum size of a sysfs attribute value (i.e. one page)
+_ATTRIBUTE_MAX_SIZE = 4096
+
+# Locks serializing the accesses to descriptors which offset is shared, indexed by descriptor
+_fd_locks = {}
+
+
+def _fd_lock(fd):
+    """ Returns the lock associated to a file descriptor.
+
+    Positional I/O does not use the offset of the descriptor and needs no lock. This one
+    is only used when an access is made of a seek followed by a read or a write, which
+    must not be interleaved with the ones of another thread.
+    """
+    try:
+        return _fd_locks[fd]
+    except KeyError:
+        # setdefault is atomic, and the same lock is returned to concurrent callers
+        return _fd_locks.setdefault(fd, threading.Lock())
+
+try:
+    _pread = os.pread
+    _pwrite = os.pwrite
+
+except AttributeError:
+    # Python 2 does not provide positional I/O. Calling the libc functions through
+    # ctypes costs more than the extra lseek syscall, so we emulate them this way.
+    def _pread(fd, size, offset):
+        with _fd_lock(fd):
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+    def _pwrite(fd, data, offset):
+        with _fd_lock(fd):
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.write(fd, data)
+
+if str is bytes:
+    def _decode(data):
+        return data
+
+    def _encode(value):
+        return value
+else:
+    def _decode(data):
+        return data.decode()
+
+    def _encode(value):
+        return value.encode()
+
+
+#: Statistics of a :py:class:`DescriptorPool`
+DescriptorPoolStats = namedtuple('DescriptorPoolStats', 'size max_size hits misses evictions')
+
+
+class DescriptorPool(object):
+    """ A bounded pool of raw attribute file descriptors, shared by the :py:class:`FileCache`
+    instances using the raw I/O backend.
+
+    Descriptors are indexed by file path, so that several caches accessing the same attribute
+    share the same descriptor. When the pool is full, the least recently used descriptor is
+    closed, and it will be opened again on demand. Hot attributes thus stay open, while the
+    number of descriptors held by long running programs remains bounded, whatever the number
+    of devices they created and dropped or the number of attributes they accessed.
+
+    A descriptor is pinned while it is being used for an I/O, so that it cannot be closed
+    in between by an eviction. The pool is temporarily allowed to grow beyond its maximum
+    size if all the descriptors are pinned.
+    """
+
+    #: The maximum size of the default pool, as a fraction of the descriptors limit
+    #: of the process (`RLIMIT_NOFILE`)
+    DEFAULT_LIMIT_FRACTION = 0.25
+
+    #: The maximum size of the default pool, whatever the descriptors limit is
+    DEFAULT_MAX_SIZE = 256
+
+    def __init__(self, max_size=None):
+        """
+        Args:
+            max_size (Optional[int]): the maximum number of open descriptors. Default to
+                :py:meth:`default_max_size`.
+        """
+        self._max_size = max_size or self.default_max_size()
+        self._entries = {}
+        self._lock = threading.Lock()
+        # the paths discarded by finalizers while the lock was held (see discard)
+        self._discarded = []
+        self._clock = itertools.count()
+        self._hits = self._misses = self._evictions = 0
+
+    @classmethod
+    def default_max_size(cls):
+        """ Returns the default maximum size of pools, based on the descriptors limit
+        of the process.
+
+        Returns:
+            int: the size
+        """
+        try:
+            import resource
+            soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        except (ImportError, ValueError):
+            return cls.DEFAULT_MAX_SIZE
+
+        if soft_limit == resource.RLIM_INFINITY:
+            return cls.DEFAULT_MAX_SIZE
+        return max(1, min(cls.DEFAULT_MAX_SIZE, int(soft_limit * cls.DEFAULT_LIMIT_FRACTION)))
+
+    @property
+    def max_size(self):
+        """ The maximum number of open descriptors.
+
+        :type: int
+        """
+        return self._max_size
+
+    @property
+    def stats(self):
+        """ The current size of the pool and its usage counters.
+
+        The hits are counted without locking, and a few of them may be missed when several
+        threads use the pool at the same time.
+
+        :type: DescriptorPoolStats
+        """
+        return DescriptorPoolStats(
+            len(self._entries), self._max_size, self._hits, self._misses, self._evictions
+        )
+
+    def reset_stats(self):
+        """ Resets the usage counters.
+        """
+        self._hits = self._misses = self._evictions = 0
+
+    # Pool entries are lists made of the descriptor, the pins list, the retired flag and
+    # the last use clock tick. Literal indexes and explicit lock calls are used, since these
+    # methods are on the path of every attribute access.
+    #
+    # Hits do not take the pool lock: appending to and popping from the pins list are atomic
+    # operations, and retiring an entry sets its flag before checking its pins. A thread
+    # pinning an entry while it is being retired thus either prevents it from being closed,
+    # or sees the flag and falls back to the locked path, which opens a new descriptor.
+    # The lock is only taken on misses, and for closing retired entries. It is released with
+    # _unlock, which retires first the entries discarded by finalizers in the meantime.
+
+    def _acquire(self, path):
+        """ Returns the entry of a path, opening it if needed, and pins it.
+        """
+        entry = self._entries.get(path)
+        if entry is not None:
+            entry[1].append(None)
+            if not entry[2]:
+                entry[3] = next(self._clock)
+                self._hits += 1
+                return entry
+            self._release(entry)
+
+        self._lock.acquire()
+        try:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._hits += 1
+                entry[1].append(None)
+            else:
+                self._misses += 1
+                self._entries[path] = entry = [FileCache._open_fd(path), [None], False, 0]
+                self._evict()
+            entry[3] = next(self._clock)
+            return entry
+        finally:
+            self._unlock()
+
+    def _release(self, entry):
+        entry[1].pop()
+        if entry[2]:
+            self._close_retired(entry)
+
+    def _close_retired(self, entry):
+        self._lock.acquire()
+        try:
+            if not entry[1] and entry[0] is not None:
+                os.close(entry[0])
+                entry[0] = None
+        finally:
+            self._unlock()
+
+    def _unlock(self):
+        while True:
+            while self._discarded:
+                path = self._discarded.pop()
+                if path in self._entries:
+                    self._retire(path)
+            self._lock.release()
+            # a finalizer may have discarded paths after the loop, and they would otherwise
+            # wait for the next locked operation
+            if not self._discarded or not self._lock.acquire(False):
+                return
+
+    def _retire(self, path):
+        entry = self._entries.pop(path)
+        entry[2] = True
+        if not entry[1]:
+            # otherwise, will be closed when released
+            os.close(entry[0])
+            entry[0] = None
+
+    def _evict(self):
+        # the usage clock of entries is only looked at here, which keeps hits cheap
+        excess = len(self._entries) - self._max_size
+        if excess <= 0:
+            return
+        victims = heapq.nsmallest(excess, (
+            (entry[3], path) for path, entry in self._entries.items() if not entry[1]
+        ))
+        for _, path in victims:
+            self._retire(path)
+            self._evictions += 1
+
+    def pread(self, path, size, offset=0):
+        """ Reads data from a file at a given position.
+
+        Args:
+            path (str): the file path
+            size (int): the maximum number of bytes to be read
+            offset (Optional[int]): the position in the file. Default to 0.
+
+        Returns:
+            bytes: the data
+
+        Raises:
+            ValueError: if the file does not exist
+        """
+        # hits are handled here rather than by _acquire and _release, saving two calls on
+        # the path of every attribute read
+        entry = self._entries.get(path)
+        if entry is not None:
+            entry[1].append(None)
+            if entry[2]:
+                self._release(entry)
+                entry = self._acquire(path)
+            else:
+                entry[3] = next(self._clock)
+                self._hits += 1
+        else:
+            entry = self._acquire(path)
+        try:
+            return _pread(entry[0], size, offset)
+        finally:
+            entry[1].pop()
+            if entry[2]:
+                self._close_retired(entry)
+
+    def pread_many(self, paths, size, offset=0):
+        """ Reads data from several files, all the descriptors being acquired before reading.
+
+        Args:
+            paths (iterable[str]): the files paths
+            size (int): the maximum number of bytes to be read in each file
+            offset (Optional[int]): the position in the files. Default to 0.
+
+        Returns:
+            list[bytes]: the data read in each file
+        """
+        entries = []
+        try:
+            for path in paths:
+                entries.append(self._acquire(path))
+            return [_pread(entry[0], size, offset) for entry in entries]
+        finally:
+            for entry in entries:
+                self._release(entry)
+
+    def pwrite(self, path, data, offset=0):
+        """ Writes data to a file at a given position.
+
+        Args:
+            path (str): the file path
+            data (bytes): the data
+            offset (Optional[int]): the position in the file. Default to 0.
+
+        Returns:
+            int: the number of written bytes
+
+        Raises:
+            ValueError: if the file does not exist
+        """
+        entry = self._acquire(path)
+        try:
+            return _pwrite(entry[0], data, offset)
+        finally:
+            self._release(entry)
+
+    def discard(self, paths, wait=True):
+        """ Closes the descriptors of a set of files, if open.
+
+        Args:
+            paths (iterable[str]): the files paths
+            wait (Optional[bool]): False for not waiting for the pool lock if it is held,
+                the descriptors being then closed when it is released. Finalizers must use
+                it, since they may be run by the garbage collector while the lock is held
+                by their own thread. Default to True.
+        """
+        if not wait:
+            # retired by _unlock, now or by the thread holding the lock
+            self._discarded.extend(paths)
+            if self._lock.acquire(False):
+                self._unlock()
+            return
+
+        self._lock.acquire()
+        try:
+            for path in paths:
+                if path in self._entries:
+                    self._retire(path)
+        finally:
+            self._unlock()
+
+    def clear(self):
+        """ Closes all the descriptors.
+        """
+        self._lock.acquire()
+        try:
+            for path in list(self._entries):
+                self._retire(path)
+        finally:
+            self._unlock()
+
+
+_descriptor_pool = None
+
+
+def get_descriptor_pool():
+    """ Returns the process-wide descriptor pool, used by default by :py:class:`FileCache`
+    instances using the raw I/O backend.
+
+    Returns:
+        DescriptorPool: the pool
+    """
+    global _descriptor_pool
+    if _descriptor_pool is None:
+        _descriptor_pool = DescriptorPool()
+    return _descriptor_pool
+
+
+class FileCache(object):
+    """ Attribute reader/writer with cached file access
+
+    Two I/O backends are available:
+
+        - the historical one, based on Python file objects opened unbuffered, for
+          which each access costs a seek followed by a read or a write
+        - the raw one, which keeps the descriptors returned by ``os.open`` and
+          accesses the attribute with a single positional read or write syscall
+          (``pread``/``pwrite``), without any intermediate file object. Python 2
+          lacks positional I/O, and a ``lseek`` is issued before the access in this case.
+
+    The descriptors of the raw backend are held by a bounded :py:class:`DescriptorPool`,
+    by default the process-wide one. File objects are kept open as long as the cache exists.
+
+    Both backends can be used concurrently by several threads. On Python 3, the raw one does
+    not depend on the file offsets, and its accesses to descriptors already held by the pool
+    take no lock (the pool lock is only taken for opening and closing descriptors). On
+    Python 2, and with file objects, the accesses to a given file are serialized, so that
+    the seek and the read (or write) of a thread are not interleaved with the ones of
+    another thread.
+    """
+    def __init__(self, raw_io=False, pool=None):
+        """
+        Args:
+            raw_io (Optional[bool]): True for using the raw descriptor backend for
+                :py:meth:`read` and :py:meth:`write`. Default to False.
+            pool (Optional[DescriptorPool]): the pool holding the raw descriptors. Default
+                to the process-wide one.
+        """
+        self._cache = {}
+        self._paths = {}
+        self._raw_io = raw_io
+        self._pool = pool or get_descriptor_pool()
+
+    def __del__(self):
+        self._close(wait=False)
+
+    def close(self):
+        """ Closes all the files opened so far, and the descriptors of the accessed files
+        held by the pool.
+        """
+        self._close(wait=True)
+
+    def _close(self, wait):
+        for f in self._cache.values():
+            f.close()
+        self._cache.clear()
+        self._pool.discard(list(self._paths.values()), wait=wait)
+        self._paths.clear()
+
+    @property
+    def raw_io(self):
+        """ Tells if the raw descriptor backend is used.
+
+        :type: bool
+        """
+        return self._raw_io
+
+    def _attribute_path(self, key):
+        """ Returns the path of the file identified by a cache key.
+
+        For this class, the key is the path itself.
+        """
+        return key
+
+    def file_handle(self, path, binary=False):
+        """ Manages the file handle cache and opening the files in the correct mode.
+
+        Args:
+            path (str): the file path of the attribute
+            binary (Optional[bool]): True if the attribute value is binary. Default to False
+
+        Returns:
+            file: the opened file object
+
+        Raises:
+            ValueError: if the provided path does not exist
+        """
+        try:
+            return self._cache[path]
+
+        except KeyError:
+            f = self._open_file(self._attribute_path(path), binary)
+            cached = self._cache.setdefault(path, f)
+            if cached is not f:
+                # opened concurrently by another thread
+                f.close()
+            return cached
+
+    def _file_path(self, key):
+        """ Returns the path of the file identified by a cache key, remembering it so that it is
+        computed only once.
+        """
+        try:
+            return self._paths[key]
+        except KeyError:
+            self._paths[key] = path = self._attribute_path(key)
+            return path
+
+    @staticmethod
+    def _access_modes(path):
+        if not os.path.exists(path):
+            raise ValueError('path not found: %s' % path)
+
+        return os.access(path, os.R_OK), os.access(path, os.W_OK)
+
+    @staticmethod
+    def _open_file(path, binary):
+        r_ok, w_ok = FileCache._access_modes(path)
+
+        if r_ok and w_ok:
+            mode = 'a+'
+        elif w_ok:
+            mode = 'a'
+        else:
+            mode = 'r'
+
+        # Python 3 refuses unbuffered text files, and values are thus decoded by the
+        # accessors in this case
+        if binary or str is not bytes:
+            mode += 'b'
+
+        # print('opening %s with mode %s' % (path, mode))
+        return open(path, mode, 0)
+
+    @staticmethod
+    def _open_fd(path):
+        r_ok, w_ok = FileCache._access_modes(path)
+
+        if r_ok and w_ok:
+            flags = os.O_RDWR
+        elif w_ok:
+            flags = os.O_WRONLY
+        else:
+            flags = os.O_RDONLY
+
+        return os.open(path, flags)
+
+    def read(self, path):
+        """ Gets the attribute value.
+
+        The type of the returned value depends on the value of the `binary` flag passed
+        to ``file_handle`` method.
+
+        Args:
+            path (str): the attribute file path
+
+        Returns:
+            the attribute value.
+        """
+        if self._raw_io:
+            return _decode(self._pool.pread(self._file_path(path), _ATTRIBUTE_MAX_SIZE).strip())
+
+        f = self.file_handle(path)
+
+        with _fd_lock(f.fileno()):
+            f.seek(0)
+            return _decode(f.read().strip())
+
+    def read_many(self, paths):
+        """ Gets the values of several attributes in a single pass.
+
+        With the raw backend, the files are all resolved (and opened if needed) before any
+        of them is read, so that the values are read as close as possible to each other.
+
+        Args:
+            paths (iterable[str]): the attribute file paths
+
+        Returns:
+            list: the attribute values, in the same order as the paths.
+        """
+        if self._raw_io:
+            return [_decode(data.strip()) for data in self._pool.pread_many(
+                [self._file_path(path) for path in paths], _ATTRIBUTE_MAX_SIZE
+            )]
+
+        return [self.read(path) for path in paths]
+
+    def read_bytes(self, path, size):
+        """ Gets the content of a binary attribute, such as the `bin_data` of sensors.
+
+        Args:
+            path (str): the attribute file path
+            size (int): the maximum number of bytes to be read
+
+        Returns:
+            bytes: the content
+        """
+        if self._raw_io:
+            return self._pool.pread(self._file_path(path), size)
+
+        f = self.file_handle(path, binary=True)
+
+        with _fd_lock(f.fileno()):
+            f.seek(0)
+            return f.read(size)
+
+    def write(self, path, value):
+        """ Sets the attribute value.
+        Args:
+            path (str): the attribute file path
+            value: the attribute value
+        """
+        if self._raw_io:
+            self._pool.pwrite(self._file_path(path), _encode(value))
+            return
+
+        f = self.file_handle(path)
+
+        with _fd_lock(f.fileno()):
+            f.seek(0)
+            f.write(_encode(value))
+
+
+class DeviceFileCache(FileCache):
+    """ A specialized file cache dealing with attributes file of a given device.
+
+    To avoid having the full path being computed by caller each time an attribute is
+    accessed, we factor it here when opening the file, and use the attribute name as
+    the cache key. Methods inherited from :py:class:`FileCache` thus take the attribute
+    name in place of the file path.
+    """
+    def __init__(self, device_classpath, raw_io=False, pool=None):
+        """
+        Args:
+            device_classpath (str): the absolute path of the `/sys/class` sub-directory
+                containing the device attribute files
+            raw_io (Optional[bool]): True for using the raw descriptor backend.
+                Default to False.
+            pool (Optional[DescriptorPool]): the pool holding the raw descriptors. Default
+                to the process-wide one.
+
+        Raises:
+            ValueError: if the provided path does not point to a directory
+        """
+        super(DeviceFileCache, self).__init__(raw_io=raw_io, pool=pool)
+
+        if not os.path.isdir(device_classpath):
+            raise ValueError('device sysfs not found')
+
+        self._device_classpath = device_classpath
+
+    def _attribute_path(self, attribute_name):
+        return os.path.join(self._device_classpath, attribute_name)
+
+
+class AttributeWatch(object):
+    """ Waits for the change notifications of an attribute.
+
+    Drivers can signal the changes of some attributes (e.g. the `state` of tacho motors)
+    with ``sysfs_notify``, which wakes up the processes polling the attribute file for
+    `POLLPRI`. The file has to be read before each wait, which is done here on a dedicated
+    descriptor, so that the attribute caches are not involved.
+
+    Waiting on an attribute which is never notified (or on a regular file) simply lasts
+    until the timeout.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): the path of the attribute file
+
+        Raises:
+            OSError: if the file cannot be opened
+        """
+        self._fd = os.open(path, os.O_RDONLY)
+        self._poll = select.poll()
+        self._poll.register(self._fd, select.POLLPRI | select.POLLERR)
+        self._acknowledge()
+
+    def _acknowledge(self):
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.read(self._fd, _ATTRIBUTE_MAX_SIZE)
+
+    def wait(self, timeout):
+        """ Waits for the next notification.
+
+        Args:
+            timeout (float): the maximum delay to wait for, in seconds
+
+        Returns:
+            bool: True if a notification has been received, False if the timeout expired
+        """
+        # rounded up, so that short delays do not turn into busy loops
+        if self._poll.poll(max(0, int(math.ceil(timeout * 1000)))):
+            self._acknowledge()
+            return True
+        return False
+
+    def close(self):
+        """ Closes the descriptor.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+#: An entry of the :py:class:`DeviceIndex`, describing an available device
+IndexedDevice = namedtuple('IndexedDevice', 'class_name name path attributes')
+
+
+def _matches_pattern(value, pattern):
+    """ Tells if a device attribute value matches a pattern, as documented in
+    :py:meth:`Device.__init__`.
+    """
+    if value is None:
+        return False
+    if isinstance(pattern, (list, tuple, set)):
+        return any([value.find(pat) >= 0 for pat in pattern])
+    else:
+        return value.find(pattern) >= 0
+
+
+class DeviceIndex(object):
+    """ A process-wide index of the devices provided by a :py:class:`DeviceBackend`.
+
+    Each device class directory is scanned once, on its first lookup, and the devices
+    are indexed by name and by the attributes listed in :py:attr:`INDEXED_ATTRIBUTES`.
+    Lookups are then done without any file system access, and the results of identical
+    lookups are memoized, so that creating many devices does not involve probing
+    all the candidates again and again.
+
+    The index is not updated automatically when devices are added or removed. Use
+    :py:meth:`refresh` in this case. :py:class:`Device` does it by itself for the class
+    of a device it cannot find.
+
+    The index of a backend is obtained with :py:func:`get_device_index`.
+    """
+
+    #: The attributes indexed for each device, if available for its class
+    INDEXED_ATTRIBUTES = ('port_name', 'driver_name')
+
+    def __init__(self, backend):
+        """
+        Args:
+            backend (DeviceBackend): the backend providing the devices
+        """
+        self._backend = backend
+        self._classes = {}
+        self._queries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """ The backend providing the devices.
+
+        :type: DeviceBackend
+        """
+        return self._backend
+
+    @property
+    def root_path(self):
+        """ The path of the indexed tree.
+
+        :type: str
+        """
+        return self._backend.root_path
+
+    def _scan_class(self, class_name):
+        backend = self._backend
+        entries = []
+        for name in backend.list_devices(class_name):
+            path = backend.device_path(class_name, name)
+            entries.append(IndexedDevice(class_name, name, path, dict(
+                (attr, backend.read_attribute(path, attr)) for attr in self.INDEXED_ATTRIBUTES
+            )))
+        return entries
+
+    def _class_entries(self, class_name):
+        try:
+            return self._classes[class_name]
+        except KeyError:
+            with self._lock:
+                if class_name not in self._classes:
+                    self._classes[class_name] = self._scan_class(class_name)
+                return self._classes[class_name]
+
+    def refresh(self, class_name=None):
+        """ Forgets what is known about a device class, or about all of them, so that the
+        directories are scanned again on next lookup.
+
+        Args:
+            class_name (Optional[str]): the device class. If not provided, the whole
+                index is refreshed.
+        """
+        with self._lock:
+            if class_name is None:
+                self._classes.clear()
+                self._queries.clear()
+            else:
+                self._classes.pop(class_name, None)
+                for key in [key for key in self._queries if key[0] == class_name]:
+                    del self._queries[key]
+
+    def devices(self, class_name):
+        """ Returns the devices of a given class.
+
+        Args:
+            class_name (str): the device class (e.g. `tacho-motor`)
+
+        Returns:
+            list[IndexedDevice]: the devices of the class, sorted by name
+        """
+        return list(self._class_entries(class_name))
+
+    def find(self, class_name, name='*', **criteria):
+        """ Returns the devices of a class matching a name pattern and the attributes
+        criteria, using the same rules as :py:meth:`Device.__init__`.
+
+        Only the criteria related to attributes listed in :py:attr:`INDEXED_ATTRIBUTES`
+        are used, the other ones being ignored.
+
+        Args:
+            class_name (str): the device class (e.g. `tacho-motor`)
+            name (str): the pattern the device name must match
+            \**criteria: the expected attribute values
+
+        Returns:
+            list[IndexedDevice]: the matching devices, sorted by name
+        """
+        criteria = tuple(sorted(
+            (attr, tuple(pattern) if isinstance(pattern, (list, tuple, set)) else pattern)
+            for attr, pattern in criteria.items() if attr in self.INDEXED_ATTRIBUTES
+        ))
+        key = (class_name, name, criteria)
+        try:
+            return self._queries[key]
+        except KeyError:
+            pass
+
+        entries = self._class_entries(class_name)
+        result = [
+            entry for entry in entries
+            if fnmatch.fnmatch(entry.name, name)
+            and all(_matches_pattern(entry.attributes[attr], pattern) for attr, pattern in criteria)
+        ]
+        # do not memoize the result if the class has been refreshed in between, nor an empty
+        # result, since a matching device may be plugged afterwards
+        with self._lock:
+            if result and self._classes.get(class_name) is entries:
+                self._queries[key] = result
+        return result
+
+
+class DeviceBackend(object):
+    """ Base class of device backends, which provide the devices and give access to
+    their attributes and to the device nodes used by the library (buttons and screen).
+
+    The backend used by devices is the process-wide one (see :py:func:`set_device_backend`),
+    unless another one is passed with the `backend` argument when creating them.
+
+    Devices are identified by a path, made of the root path of the backend, of the device
+    class and of the device name, as in the `/sys/class` tree.
+    """
+
+    def __init__(self, root_path):
+        """
+        Args:
+            root_path (str): the path of the tree containing the device class directories
+        """
+        self._root_path = root_path
+        self._index = None
+        self._lock = threading.Lock()
+
+    @property
+    def root_path(self):
+        """ The path of the device classes tree.
+
+        :type: str
+        """
+        return self._root_path
+
+    @property
+    def index(self):
+        """ The discovery index of the devices of this backend.
+
+        :type: DeviceIndex
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = DeviceIndex(self)
+        return self._index
+
+    def device_path(self, class_name, name):
+        """ Returns the path of a device.
+
+        Args:
+            class_name (str): the device class (e.g. `tacho-motor`)
+            name (str): the device name (e.g. `motor0`)
+
+        Returns:
+            str: the path
+        """
+        return os.path.join(self._root_path, class_name, name)
+
+    def list_devices(self, class_name):
+        """ Returns the names of the devices of a class.
+
+        Args:
+            class_name (str): the device class
+
+        Returns:
+            list[str]: the names, sorted
+        """
+        raise NotImplementedError()
+
+    def read_attribute(self, device_path, name):
+        """ Reads an attribute of a device, outside of any attribute cache.
+
+        Args:
+            device_path (str): the device path
+            name (str): the attribute name
+
+        Returns:
+            str: the attribute value, or None if it cannot be read
+        """
+        raise NotImplementedError()
+
+    def open_attributes(self, device_path, raw_io=False):
+        """ Returns the object giving access to the attributes of a device, which provides
+        the `read`, `read_many`, `read_bytes`, `write` and `close` methods of
+        :py:class:`FileCache`, keyed by attribute name.
+
+        Args:
+            device_path (str): the device path
+            raw_io (Optional[bool]): True for using the raw descriptors I/O if applicable.
+                Default to False.
+
+        Returns:
+            the attributes cache
+
+        Raises:
+            ValueError: if the device does not exist
+        """
+        raise NotImplementedError()
+
+    def read_keys(self, input_path, buffer):
+        """ Reads the state of the keys of an input device, as the `EVIOCGKEY` ioctl does.
+
+        Args:
+            input_path (str): the path of the input device node
+            buffer (array.array): the bit field receiving the keys state, a key being
+                pressed when its bit is set
+        """
+        raise NotImplementedError()
+
+    def device_node(self, path):
+        """ Returns the path to be used for opening a device node, such as the framebuffer.
+
+        Args:
+            path (str): the path of the node on the brick (e.g. `/dev/fb0`)
+
+        Returns:
+            str: the path of the node for this backend
+        """
+        raise NotImplementedError()
+
+    def watch_attribute(self, device_path, name):
+        """ Returns the object waiting for the change notifications of an attribute,
+        if the backend supports them.
+
+        Args:
+            device_path (str): the device path
+            name (str): the attribute name
+
+        Returns:
+            AttributeWatch: the watch, to be closed by the caller, or None if not supported
+        """
+        return None
+
+
+class DirectoryBackend(DeviceBackend):
+    """ A backend reading the devices from a `/sys/class` like tree of directories and files.
+
+    Besides the real `/sys/class` (see :py:class:`SysfsBackend`), this is used with a fake
+    tree, on tmpfs for instance, created with :py:meth:`add_device`. Device nodes paths are
+    relocated under the `dev_path` directory.
+    """
+
+    def __init__(self, root_path, dev_path='/dev', pool=None):
+        """
+        Args:
+            root_path (str): the path of the tree containing the device class directories
+            dev_path (Optional[str]): the path of the directory containing the device nodes.
+                Default to `/dev`.
+            pool (Optional[DescriptorPool]): the pool holding the raw descriptors. Default
+                to the process-wide one.
+        """
+        super(DirectoryBackend, self).__init__(root_path)
+        self._dev_path = dev_path
+        self._pool = pool
+        self._input_fds = {}
+
+    def list_devices(self, class_name):
+        return sorted(os.listdir(os.path.join(self._root_path, class_name)))
+
+    def read_attribute(self, device_path, name):
+        try:
+            with open(os.path.join(device_path, name)) as fp:
+                return fp.read().strip()
+        except (IOError, OSError):
+            return None
+
+    def open_attributes(self, device_path, raw_io=False):
+        return DeviceFileCache(device_path, raw_io=raw_io, pool=self._pool)
+
+    def device_node(self, path):
+        return os.path.join(self._dev_path, os.path.relpath(path, '/dev'))
+
+    def read_keys(self, input_path, buffer):
+        try:
+            fd = self._input_fds[input_path]
+        except KeyError:
+            fd = os.open(self.device_node(input_path), os.O_RDONLY)
+            fd = self._input_fds.setdefault(input_path, fd)
+        fcntl.ioctl(fd, ButtonManagerEVIO.EVIOCGKEY, buffer)
+
+    def watch_attribute(self, device_path, name):
+        if not hasattr(select, 'poll'):
+            return None
+        try:
+            return AttributeWatch(os.path.join(device_path, name))
+        except (IOError, OSError):
+            return None
+
+    def add_device(self, class_name, name, attributes):
+        """ Creates a device in the tree, and updates the index accordingly.
+
+        Args:
+            class_name (str): the device class
+            name (str): the device name
+            attributes (dict): the attribute values, by name
+
+        Returns:
+            str: the device path
+        """
+        path = self.device_path(class_name, name)
+        os.makedirs(path)
+        for attr, value in attributes.items():
+            with open(os.path.join(path, attr), 'w') as fp:
+                fp.write('%s\n' % value)
+        self.index.refresh(class_name)
+        return path
+
+    def remove_device(self, class_name, name):
+        """ Removes a device from the tree, and updates the index accordingly.
+
+        Args:
+            class_name (str): the device class
+            name (str): the device name
+        """
+        shutil.rmtree(self.device_path(class_name, name))
+        self.index.refresh(class_name)
+
+
+class SysfsBackend(DirectoryBackend):
+    """ The backend of the devices of the brick, published in `/sys/class`.
+    """
+
+    #: The root of the device classes tree
+    ROOT_PATH = '/sys/class'
+
+    def __init__(self, pool=None):
+        """
+        Args:
+            pool (Optional[DescriptorPool]): the pool holding the raw descriptors. Default
+                to the process-wide one.
+        """
+        super(SysfsBackend, self).__init__(self.ROOT_PATH, pool=pool)
+
+
+class MemoryDevice(object):
+    """ A device of the :py:class:`MemoryBackend`, which attributes are kept in a dictionary.
+
+    Attributes values are stored as strings. Sub-classes can override :py:meth:`read_attribute`
+    and :py:meth:`write_attribute` for simulating the behaviour of a real device.
+    """
+
+    def __init__(self, attributes=None):
+        """
+        Args:
+            attributes (Optional[dict]): the initial attribute values, by name
+        """
+        self.attributes = dict((k, str(v)) for k, v in (attributes or {}).items())
+
+    def read_attribute(self, name):
+        """ Returns the value of an attribute.
+
+        Args:
+            name (str): the attribute name
+
+        Returns:
+            str: the value
+
+        Raises:
+            ValueError: if the attribute does not exist
+        """
+        try:
+            return self.attributes[name]
+        except KeyError:
+            raise ValueError('attribute not found: %s' % name)
+
+    def write_attribute(self, name, value):
+        """ Changes the value of an attribute.
+
+        Args:
+            name (str): the attribute name
+            value (str): the value
+
+        Raises:
+            ValueError: if the attribute does not exist
+        """
+        if name not in self.attributes:
+            raise ValueError('attribute not found: %s' % name)
+        self.attributes[name] = value
+
+    def read_bytes(self, name, size):
+        """ Returns the content of a binary attribute.
+
+        Args:
+            name (str): the attribute name
+            size (int): the maximum number of bytes to be returned
+
+        Returns:
+            bytes: the content
+
+        Raises:
+            ValueError: if the attribute does not exist
+        """
+        return self.read_attribute(name).encode()[:size]
+
+
+class _MemoryAttributes(object):
+    """ The attributes cache returned by :py:meth:`MemoryBackend.open_attributes`.
+    """
+
+    raw_io = False
+
+    def __init__(self, device):
+        self._device = device
+
+    def close(self):
+        pass
+
+    def read(self, name):
+        return self._device.read_attribute(name).strip()
+
+    def read_many(self, names):
+        return [self.read(name) for name in names]
+
+    def write(self, name, value):
+        self._device.write_attribute(name, value)
+
+    def read_bytes(self, name, size):
+        return self._device.read_bytes(name, size)
+
+
+class MemoryBackend(DeviceBackend):
+    """ A backend which devices are kept in memory, without any file system access.
+
+    Devices are created with :py:meth:`add_device`, and the keys of input devices are
+    pressed and released with :py:meth:`press_key` and :py:meth:`release_key`. Device
+    nodes are not available, and the screen can thus not be used with this backend.
+    """
+
+    def __init__(self, root_path='/sys/class'):
+        """
+        Args:
+            root_path (Optional[str]): the path of the device classes in the virtual tree.
+                Default to `/sys/class`.
+        """
+        super(MemoryBackend, self).__init__(root_path)
+        self._classes = {}
+        self._devices = {}
+        self._pressed_keys = {}
+
+    def add_device(self, class_name, name, attributes):
+        """ Creates a device, and updates the index accordingly.
+
+        Args:
+            class_name (str): the device class
+            name (str): the device name
+            attributes (dict|MemoryDevice): the attribute values by name, or the device itself
+
+        Returns:
+            MemoryDevice: the device
+        """
+        device = attributes if isinstance(attributes, MemoryDevice) else MemoryDevice(attributes)
+        self._classes.setdefault(class_name, {})[name] = device
+        self._devices[self.device_path(class_name, name)] = device
+        self.index.refresh(class_name)
+        return device
+
+    def remove_device(self, class_name, name):
+        """ Removes a device, and updates the index accordingly.
+
+        Args:
+            class_name (str): the device class
+            name (str): the device name
+        """
+        del self._classes[class_name][name]
+        del self._devices[self.device_path(class_name, name)]
+        self.index.refresh(class_name)
+
+    def get_device(self, class_name, name):
+        """ Returns a device.
+
+        Args:
+            class_name (str): the device class
+            name (str): the device name
+
+        Returns:
+            MemoryDevice: the device, or None if it does not exist
+        """
+        return self._classes.get(class_name, {}).get(name)
+
+    def list_devices(self, class_name):
+        return sorted(self._classes.get(class_name, ()))
+
+    def read_attribute(self, device_path, name):
+        try:
+            return self._devices[device_path].read_attribute(name).strip()
+        except (KeyError, ValueError):
+            return None
+
+    def open_attributes(self, device_path, raw_io=False):
+        try:
+            return _MemoryAttributes(self._devices[device_path])
+        except KeyError:
+            raise ValueError('device not found: %s' % device_path)
+
+    def press_key(self, input_path, code):
+        """ Presses a key of an input device.
+
+        Args:
+            input_path (str): the path of the input device node
+            code (int): the key code
+        """
+        self._pressed_keys.setdefault(input_path, set()).add(code)
+
+    def release_key(self, input_path, code):
+        """ Releases a key of an input device.
+
+        Args:
+            input_path (str): the path of the input device node
+            code (int): the key code
+        """
+        self._pressed_keys.get(input_path, set()).discard(code)
+
+    def read_keys(self, input_path, buffer):
+        for i in range(len(buffer)):
+            buffer[i] = 0
+        for code in self._pressed_keys.get(input_path, ()):
+            buffer[code // 8] |= 1 << code % 8
+
+    def device_node(self, path):
+        raise NotImplementedError('device nodes are not available with the memory backend')
+
+
+# the process-wide backend, set by set_device_backend(), and the default ones, by root path
+_device_backend = None
+_default_backends = {}
+
+
+# the created devices, for being able to rebind them when devices are connected or
+# disconnected (see the hotplug module)
+_bound_devices = weakref.WeakSet()
+_bound_devices_lock = threading.Lock()
+
+
+def bound_devices():
+    """ Returns the :py:class:`Device` instances currently alive, connected or not.
+
+    Returns:
+        list[Device]: the devices
+    """
+    with _bound_devices_lock:
+        return list(_bound_devices)
+
+
+def set_device_backend(backend):
+    """ Sets the process-wide backend, used by the devices created afterwards.
+
+    Args:
+        backend (DeviceBackend): the backend, or None for restoring the default one
+    """
+    global _device_backend
+    _device_backend = backend
+
+
+def get_device_backend():
+    """ Returns the process-wide backend.
+
+    Unless another one has been set with :py:func:`set_device_backend`, this is a
+    :py:class:`SysfsBackend`.
+
+    Returns:
+        DeviceBackend: the backend
     """
-    def __init__(self):
-        self._cache = {}
+    if _device_backend is not None:
+        return _device_backend
+
+    # Device._DEVICE_ROOT_PATH is still honoured for the default backend
+    root_path = Device._DEVICE_ROOT_PATH
+    try:
+        return _default_backends[root_path]
+    except KeyError:
+        if root_path == SysfsBackend.ROOT_PATH:
+            backend = SysfsBackend()
+        else:
+            backend = DirectoryBackend(root_path)
+        return _default_backends.setdefault(root_path, backend)
 
-    def __del__(self):
-        for f in self._cache.values():
-            f.close()
 
-    def file_handle(self, path, binary=False):
-        """ Manages the file handle cache and opening the files in the correct mode.
+def get_device_index(backend=None):
+    """ Returns the process-wide device index of a backend.
 
-        Args:
-            path (str): the file path of the attribute
-            binary (Optional[bool]): True if the attribute value is binary. Default to False
+    Args:
+        backend (Optional[DeviceBackend]): the backend. Default to the process-wide one.
 
-        Returns:
-            file: the opened file object
+    Returns:
+        DeviceIndex: the index
+    """
+    return (backend or get_device_backend()).index
 
-        Raises:
-            ValueError: if the provided path does not exist
-        """
-        try:
-            return self._cache[path]
 
-        except KeyError:
-            self._cache[path] = f = self._open_file(path, binary)
-            return f
+# ----------------------------------------------------------------------------------------
+# Attributes I/O statistics
+# ----------------------------------------------------------------------------------------
 
-    @staticmethod
-    def _open_file(path, binary):
-        if not os.path.exists(path):
-            raise ValueError('path not found: %s' % path)
+#: The upper bounds of the buckets of the attributes I/O latency histograms, in microseconds.
+#: The bounds are powers of 2, and the last bucket also gathers all the longer accesses.
+IO_LATENCY_BUCKETS = tuple(2 ** n for n in range(24))
 
-        r_ok = os.access(path, os.R_OK)
-        w_ok = os.access(path, os.W_OK)
 
-        if r_ok and w_ok:
-            mode = 'a+'
-        elif w_ok:
-            mode = 'a'
-        else:
-            mode = 'r'
+class AttributeIOStats(namedtuple('AttributeIOStats', 'count errors bytes total_time max_time histogram')):
+    """ The I/O statistics of a device attribute, for a kind of operation.
 
-        if binary:
-            mode += 'b'
+    Attributes:
+        count (int): the number of accesses, including the failed ones
+        errors (int): the number of failed accesses
+        bytes (int): the number of bytes read or written, text values being counted UTF-8 encoded
+        total_time (float): the cumulated duration of the accesses, in seconds
+        max_time (float): the longest access, in seconds
+        histogram (tuple[int]): the number of accesses per latency bucket (see
+            :py:data:`IO_LATENCY_BUCKETS`)
+    """
+    __slots__ = ()
 
-        # print('opening %s with mode %s' % (path, mode))
-        return open(path, mode, 0)
+    @property
+    def mean_time(self):
+        """ The average duration of the accesses, in seconds.
 
-    def read(self, path):
-        """ Gets the attribute value.
+        :type: float
+        """
+        return self.total_time / self.count if self.count else 0.
 
-        The type of the returned value depends on the value of the `binary` flag passed
-        to ``file_handle`` method.
+    def percentile(self, fraction):
+        """ Returns an upper bound of the duration of a given fraction of the accesses,
+        based on the histogram.
 
         Args:
-            path (str): the attribute file path
+            fraction (float): the fraction, between 0 and 1 (e.g. 0.99)
 
         Returns:
-            the attribute value.
+            float: the duration, in seconds
         """
-        f = self.file_handle(path)
+        threshold = fraction * self.count
+        total = 0
+        for bound, count in zip(IO_LATENCY_BUCKETS, self.histogram):
+            total += count
+            if count and total >= threshold:
+                return bound * 1e-6
+        return 0.
 
-        f.seek(0)
-        return f.read().strip()
 
-    def write(self, path, value):
-        """ Sets the attribute value.
-        Args:
-            path (str): the attribute file path
-            value: the attribute value
-        """
-        f = self.file_handle(path)
+class IOStatsSnapshot(dict):
+    """ The I/O statistics of the device attributes at a given time.
 
-        f.seek(0)
-        f.write(value)
+    The keys are `(device_path, name, operation)` tuples, as notified to the
+    :py:class:`IOObserver` instances, and the values are :py:class:`AttributeIOStats`.
+    """
 
+    def diff(self, previous):
+        """ Returns the statistics of the accesses done since a previous snapshot.
 
-class DeviceFileCache(FileCache):
-    """ A specialized file cache dealing with attributes file of a given device.
+        The `max_time` of the attributes are the ones of the current snapshot, since the
+        maximum of the period cannot be known.
 
-    To avoid having the full path being computed by caller each time an attribute is
-    accessed, we factor it here when opening the file, and use the attribute name as
-    the cache key.
-    """
-    def __init__(self, device_classpath):
+        Args:
+            previous (IOStatsSnapshot): the previous snapshot of the same statistics
+
+        Returns:
+            IOStatsSnapshot: the differences, without the attributes not accessed since
         """
+        result = IOStatsSnapshot()
+        for key, current in self.items():
+            before = previous.get(key)
+            if before is None:
+                result[key] = current
+            elif current.count != before.count:
+                result[key] = AttributeIOStats(
+                    current.count - before.count,
+                    current.errors - before.errors,
+                    current.bytes - before.bytes,
+                    current.total_time - before.total_time,
+                    current.max_time,
+                    tuple(a - b for a, b in zip(current.histogram, before.histogram))
+                )
+        return result
+
+    def report(self, limit=None):
+        """ Formats the statistics as a table, sorted by decreasing cumulated duration.
+
         Args:
-            device_classpath (str): the absolute path of the `/sys/class` sub-directory
-            containing the device attribute files
+            limit (Optional[int]): the maximum number of lines. Default to all.
 
-        Raises:
-            ValueError: if the provided path does not point to a directory
+        Returns:
+            str: the table
         """
-        if not os.path.isdir(device_classpath):
-            raise ValueError('device sysfs not found')
+        items = sorted(self.items(), key=lambda item: item[1].total_time, reverse=True)[:limit]
+        lines = ['%-40s %-16s %-5s %8s %6s %10s %10s %10s' % (
+            'device', 'attribute', 'op', 'count', 'errors', 'mean(us)', 'p99(us)', 'max(us)'
+        )]
+        for (device_path, attribute, operation), stats in items:
+            lines.append('%-40s %-16s %-5s %8d %6d %10.1f %10.0f %10.1f' % (
+                device_path, attribute, operation, stats.count, stats.errors,
+                stats.mean_time * 1e6, stats.percentile(0.99) * 1e6, stats.max_time * 1e6
+            ))
+        return '\n'.join(lines)
+
+
+class IOObserver(object):
+    """ Abstract root class of the observers of the device I/O, registered with
+    :py:func:`add_io_observer`.
+
+    The observers are notified of:
+
+        - the reads and writes of device attributes (operations `read` and `write`)
+        - the key state queries of input devices (operation `ioctl`)
+        - the framebuffer updates (operation `fb`)
+        - the identity of the devices (operation `bind`, with `device` as name), notified
+          when they are bound and when the observer is registered. The value is made of
+          `<attribute>=<value>` lines, giving the static attributes known at that time
+          (e.g. the driver and port names).
+
+    They are called synchronously, in the thread doing the I/O, and must thus be as
+    fast as possible.
+    """
 
-        super(DeviceFileCache, self).__init__()
-        self._device_classpath = device_classpath
+    def on_io(self, timestamp, device_path, name, operation, value, elapsed, error):
+        """ Called after each I/O operation.
+
+        Args:
+            timestamp (float): the :py:func:`ev3dev.clock.monotonic` time of the start of the
+                operation
+            device_path (str): the path of the device (e.g. `/sys/class/tacho-motor/motor0`
+                or `/dev/fb0`)
+            name (str): the attribute name, or the name of the operation for the other
+                kinds of I/O (`EVIOCGKEY` or `framebuffer`)
+            operation (str): the kind of operation (`read`, `write`, `ioctl`, `fb` or `bind`)
+            value (str or bytes): the value read or written, None if the operation failed
+            elapsed (float): the duration of the operation, in seconds
+            error (bool): True if the operation has failed
+        """
+        raise NotImplementedError()
+
+
+class IOStats(IOObserver):
+    """ Collects the I/O statistics of device attributes, and of the other observed
+    operations.
+
+    The process-wide instance is managed with :py:func:`enable_io_stats`.
+    """
 
-    def file_handle(self, attribute_name, binary=False):
-        """ Returns the file handle for a given device attribute.
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def on_io(self, timestamp, device_path, name, operation, value, elapsed, error):
+        if operation == 'bind':
+            return
+        if not value:
+            size = 0
+        elif isinstance(value, (bytes, bytearray)):
+            size = len(value)
+        else:
+            # text values are transferred encoded
+            size = len(value.encode('utf-8'))
+        self.record(device_path, name, operation, size, elapsed, error)
+
+    def record(self, device_path, attribute, operation, size, elapsed, error=False):
+        """ Records an attribute access.
 
         Args:
-            attribute_name (str): the name of the attribute
-            binary (Optional[bool]): True if attribute value is binary. Default to False.
+            device_path (str): the path of the device
+            attribute (str): the attribute name
+            operation (str): the kind of operation (see :py:class:`IOObserver`)
+            size (int): the number of bytes read or written
+            elapsed (float): the duration of the access, in seconds
+            error (Optional[bool]): True if the access has failed
+        """
+        key = (device_path, attribute, operation)
+        bucket = min(int(elapsed * 1e6).bit_length(), len(IO_LATENCY_BUCKETS) - 1)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [0, 0, 0, 0., 0., [0] * len(IO_LATENCY_BUCKETS)]
+            entry[0] += 1
+            if error:
+                entry[1] += 1
+            entry[2] += size
+            entry[3] += elapsed
+            if elapsed > entry[4]:
+                entry[4] = elapsed
+            entry[5][bucket] += 1
+
+    def snapshot(self):
+        """ Returns the statistics collected so far.
 
         Returns:
-            file: the opened file object
+            IOStatsSnapshot: the statistics
+        """
+        with self._lock:
+            return IOStatsSnapshot(
+                (key, AttributeIOStats(*(entry[:5] + [tuple(entry[5])])))
+                for key, entry in self._entries.items()
+            )
+
+    def reset(self):
+        """ Discards the statistics collected so far.
         """
+        with self._lock:
+            self._entries.clear()
+
+
+class _InstrumentedAttributes(object):
+    """ A wrapper of an attributes cache, notifying the I/O observers of its accesses.
+    """
+
+    def __init__(self, cache, device_path, observers):
+        self.wrapped = cache
+        self._device_path = device_path
+        self._observers = observers
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def close(self):
+        self.wrapped.close()
+
+    def _notify(self, t0, name, operation, value, error=False):
+        elapsed = monotonic() - t0
+        for observer in self._observers:
+            observer.on_io(t0, self._device_path, name, operation, value, elapsed, error)
+
+    def read(self, name):
+        t0 = monotonic()
         try:
-            return self._cache[attribute_name]
-        except KeyError:
-            path = os.path.join(self._device_classpath, attribute_name)
-            self._cache[attribute_name] = f = self._open_file(path, binary)
-            return f
+            value = self.wrapped.read(name)
+        except Exception:
+            self._notify(t0, name, 'read', None, error=True)
+            raise
+        self._notify(t0, name, 'read', value)
+        return value
+
+    def write(self, name, value):
+        t0 = monotonic()
+        try:
+            self.wrapped.write(name, value)
+        except Exception:
+            self._notify(t0, name, 'write', value, error=True)
+            raise
+        self._notify(t0, name, 'write', value)
+
+    def read_bytes(self, name, size):
+        t0 = monotonic()
+        try:
+            value = self.wrapped.read_bytes(name, size)
+        except Exception:
+            self._notify(t0, name, 'read', None, error=True)
+            raise
+        self._notify(t0, name, 'read', value)
+        return value
+
+    def read_many(self, names):
+        names = list(names)
+        t0 = monotonic()
+        try:
+            values = self.wrapped.read_many(names)
+        except Exception:
+            self._notify_many(t0, names, [None] * len(names), error=True)
+            raise
+        self._notify_many(t0, names, values)
+        return values
+
+    def _notify_many(self, t0, names, values, error=False):
+        # the duration of the batch is shared by the attributes
+        elapsed = (monotonic() - t0) / max(len(names), 1)
+        for name, value in zip(names, values):
+            for observer in self._observers:
+                observer.on_io(t0, self._device_path, name, 'read', value, elapsed, error)
+
+
+# the registered I/O observers, replaced as a whole when modified so that it can be
+# iterated without locking
+_io_observers = ()
+_io_observers_lock = threading.Lock()
+
+
+def add_io_observer(observer):
+    """ Registers an observer of the device I/O.
+
+    The attribute caches of the devices are wrapped by a layer notifying the observers,
+    which is removed when the last observer is unregistered. There is thus no overhead
+    at all when there is no observer.
+
+    The values of static attributes memoized by the devices and the writes skipped by
+    write coalescing do not cost any I/O, and are thus not notified.
+
+    Args:
+        observer (IOObserver): the observer
+    """
+    global _io_observers
+    with _io_observers_lock:
+        _io_observers += (observer,)
+        _instrument_devices()
+
+    for device in bound_devices():
+        if device.connected:
+            device._describe((observer,))
+
+
+def remove_io_observer(observer):
+    """ Unregisters an observer of the device I/O.
+
+    Args:
+        observer (IOObserver): an observer previously registered
+    """
+    global _io_observers
+    with _io_observers_lock:
+        _io_observers = tuple(o for o in _io_observers if o is not observer)
+        _instrument_devices()
+
+
+def _instrument_devices():
+    for device in bound_devices():
+        device._instrument(_io_observers)
+
+
+def io_observed():
+    """ Tells if the device I/O is observed, for the code paths which must skip the
+    notification work when not.
+
+    Returns:
+        bool: True if there is at least one observer registered
+    """
+    return bool(_io_observers)
+
+
+def notify_io(device_path, name, operation, value, timestamp, error=False):
+    """ Notifies the registered observers of an I/O operation not done through the
+    attribute caches.
+
+    Args:
+        device_path (str): the path of the device
+        name (str): the name of the operation
+        operation (str): the kind of operation
+        value (str or bytes): the value read or written
+        timestamp (float): the :py:func:`ev3dev.clock.monotonic` time of the start of the
+            operation
+        error (Optional[bool]): True if the operation has failed
+    """
+    elapsed = monotonic() - timestamp
+    for observer in _io_observers:
+        observer.on_io(timestamp, device_path, name, operation, value, elapsed, error)
+
+
+# the process-wide statistics, when enabled
+_io_stats = None
+
+
+def enable_io_stats(enabled=True):
+    """ Enables or disables the recording of the device attributes I/O statistics.
+
+    When enabled, the process-wide :py:class:`IOStats` instance is registered as an I/O
+    observer (see :py:func:`add_io_observer`), and records the number of accesses, their
+    size and their latency histogram, per device and attribute. When disabled (the
+    default), nothing is recorded and there is no overhead at all.
+
+    Args:
+        enabled (Optional[bool]): True to enable the statistics. Default to True.
+
+    Returns:
+        IOStats: the process-wide statistics, or None if disabled
+
+    Example:
+
+        >>> stats = enable_io_stats()
+        >>> before = stats.snapshot()
+        >>> run_phase()
+        >>> print(stats.snapshot().diff(before).report(limit=10))
+    """
+    global _io_stats
+    if enabled:
+        if _io_stats is None:
+            _io_stats = IOStats()
+            add_io_observer(_io_stats)
+    elif _io_stats is not None:
+        remove_io_observer(_io_stats)
+        _io_stats = None
+    return _io_stats
+
+
+def get_io_stats():
+    """ Returns the process-wide I/O statistics.
+
+    Returns:
+        IOStats: the statistics, or None if they are not enabled
+    """
+    return _io_stats
 
 
 class Device(object):
@@ -173,14 +1738,62 @@ class Device(object):
     #: The name or pattern used to identify instances of this device.
     SYSTEM_DEVICE_NAME_CONVENTION = '*'
 
+    #: Tells if devices are searched with the process-wide :py:class:`DeviceIndex` rather
+    #: than by probing all the candidates each time.
+    USE_DISCOVERY_INDEX = True
+
+    #: Tells if attributes are accessed with the raw descriptor backend of :py:class:`FileCache`
+    #: (single ``pread``/``pwrite`` syscall per access) rather than with Python file objects.
+    #: Enabled by default when positional I/O is available, since its emulation on Python 2
+    #: makes the raw backend slower than file objects.
+    RAW_IO = hasattr(os, 'pread')
+
+    # root of the tree used by the default backend (see get_device_backend)
     _DEVICE_ROOT_PATH = '/sys/class'
 
     _DEVICE_INDEX = re.compile(r'^.*(?P<idx>\d+)$')
 
+    #: The attributes read by :py:meth:`snapshot` when called without argument, as a
+    #: sequence of `(name, type)` pairs, where type is one of `int`, `string` or `set`
+    #: (see :py:meth:`get_attr_int`, :py:meth:`get_attr_string` and :py:meth:`get_attr_set`).
+    SNAPSHOT_ATTRIBUTES = ()
+
+    _SNAPSHOT_CONVERTERS = {
+        'int': int,
+        'string': lambda value: value,
+        'set': lambda value: value.split()
+    }
+
+    # snapshot record types and converters, cached by class and attributes list
+    _snapshot_layouts = {}
+
+    #: The writable attributes for which unchanged values are not written again when
+    #: write coalescing is enabled (see :py:meth:`enable_write_coalescing`)
+    COALESCED_ATTRIBUTES = frozenset()
+
+    #: The commands resetting the device attributes to their default values, which thus
+    #: invalidate the values remembered for write coalescing
+    RESET_COMMANDS = frozenset()
+
+    #: The attributes which value does not change while the device is bound. They are read
+    #: only once, and their value is memoized afterwards (see :py:attr:`static_values`)
+    STATIC_ATTRIBUTES = frozenset(('driver_name', 'port_name', 'commands'))
+
+    # last written values of coalesced attributes (None if write coalescing is disabled)
+    _written_values = None
+    _writes_saved = 0
+
     def __init__(self, name=SYSTEM_DEVICE_NAME_CONVENTION, **kwargs):
         """ Spin through the Linux `sysfs` class for the device type and find
         a device that matches the provided name and attributes (if any).
 
+        Unless :py:attr:`USE_DISCOVERY_INDEX` is False, the candidates are looked up in the
+        process-wide :py:class:`DeviceIndex`, which avoids reading their attributes again for
+        each new device.
+
+        Devices are provided by the process-wide :py:class:`DeviceBackend`, unless another
+        one is passed with the `backend` keyword argument.
+
         Args:
             name (str): pattern that device name should match if different from
                 :py:attr:`SYSTEM_DEVICE_NAME_CONVENTION`.
@@ -206,28 +1819,165 @@ class Device(object):
             # => if here we are trying to instantiate an abstract one
             raise NotImplementedError()
 
-        sysclass_path = os.path.join(Device._DEVICE_ROOT_PATH, self.SYSTEM_CLASS_NAME)
+        self._backend = kwargs.pop('backend', None) or get_device_backend()
+        self._name_pattern = name
+        self._criteria = kwargs
+        self._bind()
 
-        for file_name in os.listdir(sysclass_path):
-            if fnmatch.fnmatch(file_name, name):
-                self._path = os.path.join(sysclass_path, file_name)
-                self._attribute_cache = DeviceFileCache(self._path)
+        with _bound_devices_lock:
+            _bound_devices.add(self)
 
-                # See if all the requested attributes exist for the candidate device
-                if all([self._matches(k, kwargs[k]) for k in kwargs]):
-                    self.connected = True
+    def _bind(self):
+        """ Searches the device matching the name pattern and the criteria provided at creation
+        time, and binds the instance to it.
 
-                    match = Device._DEVICE_INDEX.match(file_name)
-                    if match:
-                        self._device_index = int(match.group('idx'))
-                    else:
-                        self._device_index = None
+        Returns:
+            bool: True if a matching device has been found
+        """
+        name, kwargs = self._name_pattern, self._criteria
+
+        if self.USE_DISCOVERY_INDEX:
+            index = self._backend.index
+            # only the criteria not handled by the index must be checked by reading attributes
+            criteria = dict(
+                (k, v) for k, v in kwargs.items() if k not in DeviceIndex.INDEXED_ATTRIBUTES
+            )
+            if self._bind_candidates(index.find(self.SYSTEM_CLASS_NAME, name, **kwargs), criteria):
+                return True
+
+            # the device may have been plugged (or plugged again under another name) since the
+            # class has been scanned
+            index.refresh(self.SYSTEM_CLASS_NAME)
+            bound = self._bind_candidates(index.find(self.SYSTEM_CLASS_NAME, name, **kwargs), criteria)
+        else:
+            bound = self._bind_candidates(self._probe_candidates(name), kwargs)
 
-                    return
+        if not bound:
+            self._unbind()
+        return bound
+
+    def _bind_candidates(self, candidates, criteria):
+        """ Binds the instance to the first candidate device matching the criteria.
+
+        Args:
+            candidates (iterable[IndexedDevice]): the candidate devices
+            criteria (dict): the expected attribute values
+
+        Returns:
+            bool: True if a matching device has been found
+        """
+        for candidate in candidates:
+            try:
+                self._attribute_cache = self._backend.open_attributes(candidate.path, raw_io=self.RAW_IO)
+            except ValueError:
+                # the device has disappeared since the index was built
+                continue
+            self._path = candidate.path
+            if _io_observers:
+                self._instrument(_io_observers)
+            self._static_values = dict(
+                (k, v) for k, v in candidate.attributes.items()
+                if k in self.STATIC_ATTRIBUTES and v is not None
+            )
+
+            # See if all the requested attributes exist for the candidate device
+            if all([self._matches(k, criteria[k]) for k in criteria]):
+                self.connected = True
+                if _io_observers:
+                    self._describe(_io_observers)
+
+                match = Device._DEVICE_INDEX.match(candidate.name)
+                if match:
+                    self._device_index = int(match.group('idx'))
+                else:
+                    self._device_index = None
+
+                return True
+
+        return False
+
+    def _instrument(self, observers):
+        """ Wraps the attributes cache for notifying the I/O observers, or unwraps it.
+
+        Args:
+            observers (tuple[IOObserver]): the observers, or an empty tuple for unwrapping
+                the cache
+        """
+        cache = self._attribute_cache
+        if cache is None:
+            return
+        if isinstance(cache, _InstrumentedAttributes):
+            cache = cache.wrapped
+        self._attribute_cache = _InstrumentedAttributes(cache, self._path, observers) if observers else cache
+
+    def _describe(self, observers):
+        """ Notifies I/O observers of the identity of the device, made of the static
+        attribute values known so far.
+
+        Args:
+            observers (tuple[IOObserver]): the observers
+        """
+        value = '\n'.join('%s=%s' % item for item in sorted(self._static_values.items()))
+        timestamp = monotonic()
+        for observer in observers:
+            observer.on_io(timestamp, self._path, 'device', 'bind', value, 0., False)
 
+    def _unbind(self):
         self._path = ''
         self.connected = False
         self._attribute_cache = None
+        self._static_values = {}
+
+    def rebind(self):
+        """ Searches again the device matching the criteria provided at creation time, and
+        binds the instance to it.
+
+        This is used when the device has been disconnected and connected again, since
+        it is then most of the time published under a different `/sys/class` path. The
+        values remembered for write coalescing are discarded.
+
+        Returns:
+            bool: True if a matching device has been found
+        """
+        self.disconnect()
+        return self._bind()
+
+    def disconnect(self):
+        """ Unbinds the instance from its device, for instance because it has been
+        unplugged. The `connected` attribute is set to False.
+        """
+        if self._attribute_cache is not None:
+            self._attribute_cache.close()
+        self.invalidate_written_values()
+        self._unbind()
+
+    @property
+    def path(self):
+        """ The path of the device directory in the `/sys/class` tree, or an empty string
+        if the instance is not connected.
+
+        :type: str
+        """
+        return self._path
+
+    @property
+    def backend(self):
+        """ The backend providing the device.
+
+        :type: DeviceBackend
+        """
+        return self._backend
+
+    def _probe_candidates(self, name):
+        """ Yields the devices of the class which name matches the given pattern, by scanning
+        the class directory.
+        """
+        for device_name in self._backend.list_devices(self.SYSTEM_CLASS_NAME):
+            if fnmatch.fnmatch(device_name, name):
+                yield IndexedDevice(
+                    self.SYSTEM_CLASS_NAME, device_name,
+                    self._backend.device_path(self.SYSTEM_CLASS_NAME, device_name), {}
+                )
 
     def _matches(self, attribute, pattern):
         """Test if attribute value matches pattern (that is, if pattern is a
@@ -241,21 +1991,75 @@ class Device(object):
         Returns:
             True if matches
         """
-        value = self._get_attribute(attribute)
-        if isinstance(pattern, (list, tuple, set)):
-            return any([value.find(pat) >= 0 for pat in pattern])
-        else:
-            return value.find(pattern) >= 0
+        return _matches_pattern(self._get_attribute(attribute), pattern)
 
     def _get_attribute(self, attribute):
         """ Internal device attribute getter """
+        if attribute in self.STATIC_ATTRIBUTES:
+            try:
+                return self._static_values[attribute]
+            except KeyError:
+                self._static_values[attribute] = value = self._attribute_cache.read(attribute)
+                return value
+
         return self._attribute_cache.read(attribute)
 
     def _set_attribute(self, attribute, value):
         """ Internal device attribute setter """
         # print('_set_attribute(%s, %s)' % (attribute, value))
+        if attribute in self.STATIC_ATTRIBUTES:
+            # the value will be read again, in case the driver normalizes it
+            self._static_values.pop(attribute, None)
+
+        written_values = self._written_values
+        if written_values is not None:
+            if attribute in self.COALESCED_ATTRIBUTES:
+                if written_values.get(attribute) == value:
+                    self._writes_saved += 1
+                    return
+
+                self._attribute_cache.write(attribute, value)
+                written_values[attribute] = value
+                return
+
+            if attribute == 'command' and value in self.RESET_COMMANDS:
+                written_values.clear()
+
         self._attribute_cache.write(attribute, value)
 
+    def enable_write_coalescing(self, enabled=True):
+        """ Enables or disables the coalescing of writes for the attributes listed in
+        :py:attr:`COALESCED_ATTRIBUTES`.
+
+        When enabled, the last value written to each of these attributes is remembered, and
+        writing the same value again is skipped. This saves a lot of sysfs writes in control
+        loops which set all the parameters of a command each time they issue it.
+
+        The remembered values are discarded when one of the :py:attr:`RESET_COMMANDS` is sent.
+        If the attributes are modified by other means (another process for instance),
+        :py:meth:`invalidate_written_values` must be called. For the same reason, each
+        coalesced attribute should be written by a single thread.
+
+        Args:
+            enabled (Optional[bool]): True to enable coalescing. Default to True.
+        """
+        self._written_values = {} if enabled else None
+
+    def invalidate_written_values(self):
+        """ Forgets the values remembered for write coalescing, so that the next writes
+        are all done whatever their value.
+        """
+        if self._written_values is not None:
+            self._written_values.clear()
+
+    @property
+    def writes_saved(self):
+        """ The number of writes skipped by write coalescing since the device creation.
+
+        :type: int
+        """
+        return self._writes_saved
+
     # TODO do we really need these get/set_attr_xxx methods in Python ?
     def get_attr_int(self, attribute):
         """ Gets the value of an integer type attribute.
@@ -318,7 +2122,74 @@ class Device(object):
         Returns:
             list: attribute value
         """
-        return self._attribute_cache.read(attribute).split()
+        return self._get_attribute(attribute).split()
+
+    @property
+    def static_values(self):
+        """ The values of :py:attr:`STATIC_ATTRIBUTES` memoized so far, for debugging purpose.
+
+        :type: dict[str, str]
+        """
+        return dict(self._static_values)
+
+    def invalidate_static_values(self):
+        """ Forgets the memoized values of :py:attr:`STATIC_ATTRIBUTES`, so that they
+        are read again on next access.
+        """
+        self._static_values.clear()
+
+    def read_many(self, attributes):
+        """ Gets the raw values of several attributes in a single pass.
+
+        This avoids the dispatch overhead of going through the individual properties,
+        and reads the values as close as possible to each other.
+
+        Args:
+            attributes (iterable[str]): attribute names
+
+        Returns:
+            list[str]: attribute values, in the same order as the names
+        """
+        return self._attribute_cache.read_many(attributes)
+
+    def snapshot(self, attributes=None):
+        """ Reads a set of attributes in a single pass and returns them as a typed record.
+
+        The record is a named tuple, with a `timestamp` field holding the time of the sample
+        given by the process-wide clock (see :py:func:`ev3dev.clock.get_clock`), followed by a
+        field per attribute, containing its converted value.
+        Characters not allowed in field names (as in `speed_pid/Kp`) are replaced by underscores.
+
+        Args:
+            attributes (Optional[sequence[tuple[str, str]]]): the `(name, type)` pairs of the
+                attributes to be read. Default to :py:attr:`SNAPSHOT_ATTRIBUTES`.
+
+        Returns:
+            namedtuple: the record
+
+        Example:
+
+            >>> m = LargeMotor(port='outA')
+            >>> s = m.snapshot()
+            >>> s.position, s.speed
+            (1234, 56)
+        """
+        attributes = tuple(attributes or self.SNAPSHOT_ATTRIBUTES)
+        key = (self.__class__, attributes)
+        try:
+            record_type, names, converters = self._snapshot_layouts[key]
+        except KeyError:
+            names = tuple(name for name, _ in attributes)
+            converters = tuple(self._SNAPSHOT_CONVERTERS[kind] for _, kind in attributes)
+            record_type = namedtuple(
+                self.__class__.__name__ + 'Snapshot',
+                ['timestamp'] + [re.sub(r'\W', '_', name) for name in names]
+            )
+            self._snapshot_layouts[key] = record_type, names, converters
+
+        timestamp = get_clock().time()
+        values = self._attribute_cache.read_many(names)
+        return record_type(timestamp, *[convert(value) for convert, value in zip(converters, values)])
 
     @property
     def device_index(self):
@@ -369,6 +2240,78 @@ class Device(object):
         return self.get_attr_string('driver_name')
 
 
+class LazyDevice(object):
+    """ A descriptor creating a device on its first access.
+
+    It allows declaring devices as class attributes without the cost of their discovery
+    and binding at import time. The device is shared by all the instances of the owner
+    class, and is accessible at class level too.
+
+    Example:
+
+        >>> class Robot(object):
+        >>>     left_motor = LazyDevice(LargeMotor, port='outB')
+        >>>     sensor = LazyDevice(ColorSensor)
+        >>>
+        >>> Robot.left_motor.run_forever()      # the motor is searched and bound here
+    """
+    def __init__(self, device_class, *args, **kwargs):
+        """
+        Args:
+            device_class (type): the class of the device
+            \*args: positional arguments passed to its constructor
+            \**kwargs: keyword arguments passed to its constructor
+        """
+        self._device_class = device_class
+        self._args = args
+        self._kwargs = kwargs
+        self._device = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance, owner):
+        device = self._device
+        if device is None:
+            with self._lock:
+                if self._device is None:
+                    self._device = self._device_class(*self._args, **self._kwargs)
+                device = self._device
+        return device
+
+    @property
+    def is_bound(self):
+        """ Tells if the device has been created yet.
+
+        :type: bool
+        """
+        return self._device is not None
+
+
+class LazyDeviceGroup(object):
+    """ A descriptor returning as a tuple the devices held by other attributes of its owner
+    class, typically :py:class:`LazyDevice` ones. The devices are resolved on first access.
+
+    Example:
+
+        >>> class Robot(object):
+        >>>     left_motor = LazyDevice(LargeMotor, port='outB')
+        >>>     right_motor = LazyDevice(LargeMotor, port='outC')
+        >>>     MOTORS = LazyDeviceGroup('left_motor', 'right_motor')
+    """
+    def __init__(self, *names):
+        """
+        Args:
+            \*names: the names of the owner class attributes holding the devices
+        """
+        self._names = names
+        self._devices = None
+
+    def __get__(self, instance, owner):
+        devices = self._devices
+        if devices is None:
+            self._devices = devices = tuple(getattr(owner, name) for name in self._names)
+        return devices
+
+
 class PluggedDevice(Device):
     """ Abstract model for any external device connected to the brick using one of its ports,
     which can be identified by its name (e.g. `in1`, `outA`).
@@ -395,6 +2338,8 @@ class Led(Device):
 
     SYSTEM_CLASS_NAME = 'leds'
 
+    STATIC_ATTRIBUTES = Device.STATIC_ATTRIBUTES | frozenset(('max_brightness',))
+
     TRIGGER_ON = 'default-on'
     TRIGGER_TIMER = 'timer'
     TRIGGER_HEARTBEAT = 'heartbeat'
@@ -626,7 +2571,8 @@ class ButtonManagerBase(object):
         """ The threading buttons polling loop.
 
         It takes care of processing the buttons every 0.1s until the stop flag
-        has been set by a :py:meth:`stop_scan` call.
+        has been set by a :py:meth:`stop_scan` call. The delay is measured with the
+        process-wide clock (see :py:func:`ev3dev.clock.get_clock`).
 
         .. Important::
 
@@ -636,10 +2582,11 @@ class ButtonManagerBase(object):
             ones), protecting the accesses with the appropriate synchronisation mechanisms
             (semaphore, locks,...)
         """
+        clock = get_clock()
         self._stop_scan = False
         while not self._stop_scan:
             self.process()
-            time.sleep(0.1)
+            clock.sleep(0.1)
 
 
 class ButtonManagerEVIO(ButtonManagerBase):
@@ -657,16 +2604,17 @@ class ButtonManagerEVIO(ButtonManagerBase):
 
     _buttons = {}
 
-    def __init__(self):
-        self._file_cache = FileCache()
+    def __init__(self, backend=None):
+        """
+        Args:
+            backend (Optional[DeviceBackend]): the backend giving access to the input devices.
+                Default to the process-wide one.
+        """
+        self._backend = backend or get_device_backend()
         self._buffer_cache = {}
-        for btn_props in self._buttons.itervalues():
-            self._button_file(btn_props.input_path)
+        for btn_props in self._buttons.values():
             self._button_buffer(btn_props.input_path)
 
-    def _button_file(self, name):
-        return self._file_cache.file_handle(name)
-
     def _button_buffer(self, name):
         if name not in self._buffer_cache:
             self._buffer_cache[name] = array.array('B', [0] * self.KEY_BUF_LEN)
@@ -678,17 +2626,30 @@ class ButtonManagerEVIO(ButtonManagerBase):
 
         :type: set[str]
         """
-        for b in self._buffer_cache:
-            fcntl.ioctl(self._button_file(b), self.EVIOCGKEY, self._buffer_cache[b])
+        observed = _io_observers
+        for path, buf in self._buffer_cache.items():
+            if observed:
+                self._read_keys_observed(path, buf)
+            else:
+                self._backend.read_keys(path, buf)
 
         pressed = set()
         for btn_name, btn_props in self._buttons.items():
             buf = self._buffer_cache[btn_props.input_path]
             bit = btn_props.mask
-            if not bool(buf[int(bit / 8)] & 1 << bit % 8):
+            if bool(buf[int(bit / 8)] & 1 << bit % 8):
                 pressed.add(btn_name)
         return pressed
 
+    def _read_keys_observed(self, path, buf):
+        t0 = monotonic()
+        try:
+            self._backend.read_keys(path, buf)
+        except Exception:
+            notify_io(path, 'EVIOCGKEY', 'ioctl', None, t0, error=True)
+            raise
+        notify_io(path, 'EVIOCGKEY', 'ioctl', bytes(bytearray(buf)), t0)
+
 
 class PowerSupply(Device):
     """ A generic interface to read data from the system's power_supply class.
@@ -697,6 +2658,10 @@ class PowerSupply(Device):
 
     SYSTEM_CLASS_NAME = 'power_supply'
 
+    STATIC_ATTRIBUTES = Device.STATIC_ATTRIBUTES | frozenset((
+        'voltage_max_design', 'voltage_min_design', 'technology', 'type'
+    ))
+
     @property
     def measured_current(self):
         """ The measured current that the battery is supplying (in microamps)
@@ -793,6 +2758,8 @@ class LegoPort(PluggedDevice):
 
     SYSTEM_CLASS_NAME = 'lego_port'
 
+    STATIC_ATTRIBUTES = PluggedDevice.STATIC_ATTRIBUTES | frozenset(('modes',))
+
     @property
     def modes(self):
         """ The list of the available modes of the port.
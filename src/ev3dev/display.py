@@ -6,11 +6,16 @@ import mmap
 import os
 from struct import pack
 
+from ev3dev.clock import monotonic
+from ev3dev.core import get_device_backend, io_observed, notify_io
+
 try:
     from PIL import Image, ImageDraw
 except ImportError:
     raise ImportError('PIL (or Pillow) library is required for screen usage')
 
+__all__ = ['FbMem', 'Screen']
+
 
 class FbMem(object):
     """ The framebuffer memory object.
@@ -37,7 +42,7 @@ class FbMem(object):
     # http://sam.zoy.org/wtfpl/COPYING for more details.
     # ------------------------------------------------------------------
 
-    __slots__ = ('fid', 'fix_info', 'var_info', 'mmap')
+    __slots__ = ('path', 'fid', 'fix_info', 'var_info', 'mmap')
 
     FBIOGET_VSCREENINFO = 0x4600
     FBIOGET_FSCREENINFO = 0x4602
@@ -97,7 +102,8 @@ class FbMem(object):
 
     def __init__(self, fbdev=None):
         """Create the FbMem framebuffer memory object."""
-        fid = FbMem._open_fbdev(fbdev)
+        self.path = FbMem._fbdev_path(fbdev)
+        fid = FbMem._open_fbdev(self.path)
         fix_info = FbMem._get_fix_info(fid)
         fbmmap = FbMem._map_fb_memory(fid, fix_info)
         self.fid = fid
@@ -111,15 +117,19 @@ class FbMem(object):
         FbMem._close_fbdev(self.fid)
 
     @staticmethod
-    def _open_fbdev(fbdev=None):
-        """Return the framebuffer file descriptor.
+    def _fbdev_path(fbdev=None):
+        """Return the framebuffer device path.
 
         Try to use the FRAMEBUFFER
-        environment variable if fbdev is not given. Use '/dev/fb0' by
-        default.
+        environment variable if fbdev is not given. Use '/dev/fb0' of the
+        process-wide device backend by default.
         """
-        dev = fbdev or os.getenv('FRAMEBUFFER', '/dev/fb0')
-        fbfid = os.open(dev, os.O_RDWR)
+        return fbdev or os.getenv('FRAMEBUFFER') or get_device_backend().device_node('/dev/fb0')
+
+    @staticmethod
+    def _open_fbdev(fbdev=None):
+        """Return the framebuffer file descriptor."""
+        fbfid = os.open(FbMem._fbdev_path(fbdev), os.O_RDWR)
         return fbfid
 
     @staticmethod
@@ -229,12 +239,17 @@ class Screen(FbMem):
 
         Nothing will be drawn on the screen until this function is called.
         """
+        t0 = monotonic()
         if self.var_info.bits_per_pixel == 1:
-            self.mmap[:] = self._img.tobytes("raw", "1;IR")
+            data = self._img.tobytes("raw", "1;IR")
         elif self.var_info.bits_per_pixel == 16:
-            self.mmap[:] = self._img_to_rgb565_bytes()
+            data = self._img_to_rgb565_bytes()
         else:
             raise Exception("Not supported")
+        self.mmap[:] = data
+
+        if io_observed():
+            notify_io(self.path, 'framebuffer', 'fb', data, t0)
 
     @staticmethod
     def hide_cursor():
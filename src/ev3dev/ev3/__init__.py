@@ -1,7 +1,8 @@
-from platform import *
+from .platform import *
 
 # convenience imports so that module users will have all the definition available without having to
-# care about in which the module they are
-from ..motors import *
-from ..sensors import *
-from ..sound import *
+# care about in which the module they are. The modules are imported on first access to one of their
+# definitions, keeping the import of this package cheap.
+
+from .._lazy import install_platform as _install_platform
+_install_platform(__name__)
@@ -46,27 +46,30 @@ class Leds(object):
     This class is not supposed to be instantiated since there is a single set of
     LEDs on the brick. All its attributes and methods are defined either as
     static or class level.
+
+    The LEDs are bound on their first access, so that importing the module does
+    not cost anything to programs not using them.
     """
 
     #: The red LED on the left side of the brick
-    red_left = Led(name='ev3-left0:red:ev3dev')
+    red_left = LazyDevice(Led, name='ev3-left0:red:ev3dev')
     #: The red LED on the right side of the brick
-    red_right = Led(name='ev3-right0:red:ev3dev')
+    red_right = LazyDevice(Led, name='ev3-right0:red:ev3dev')
     #: The green LED on the left side of the brick
-    green_left = Led(name='ev3-left1:green:ev3dev')
+    green_left = LazyDevice(Led, name='ev3-left1:green:ev3dev')
     #: The green LED on the right side of the brick
-    green_right = Led(name='ev3-right1:green:ev3dev')
+    green_right = LazyDevice(Led, name='ev3-right1:green:ev3dev')
 
     #: The group containing the red LEDs
-    RED = (red_left, red_right)
+    RED = LazyDeviceGroup('red_left', 'red_right')
     #: The group containing the green LEDs
-    GREEN = (green_left, green_right)
+    GREEN = LazyDeviceGroup('green_left', 'green_right')
     #: The group containing the left side LEDs
-    LEFT = (red_left, green_left)
+    LEFT = LazyDeviceGroup('red_left', 'green_left')
     #: The group containing the right side LEDs
-    RIGHT = (red_right, green_right)
+    RIGHT = LazyDeviceGroup('red_right', 'green_right')
     #: The group containing all the LEDs
-    ALL = RED + GREEN
+    ALL = LazyDeviceGroup('red_left', 'red_right', 'green_left', 'green_right')
 
     @staticmethod
     def set_attributes(group, **kwargs):
@@ -182,9 +185,9 @@ class Leds(object):
             l.brightness = 0
 
     @classmethod
-    def blink(cls, leds=ALL, on=500, off=500):
+    def blink(cls, leds=None, on=500, off=500):
         cls.all_off()
-        for l in leds:
+        for l in leds or cls.ALL:
             l.trigger = 'timer'
             # TODO make this work
             # l.delay_on = on
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Devices hotplug support, based on the kernel uevents.
+
+When a sensor or a motor is unplugged and plugged again, it is published under a new
+`/sys/class` path (e.g. `sensor0` becomes `sensor1`). The :py:class:`HotplugMonitor`
+listens to the kernel uevents and takes care of:
+
+    - keeping the :py:class:`ev3dev.core.DeviceIndex` up to date
+    - marking the devices which have been unplugged as disconnected
+    - binding the disconnected devices to the matching new ones
+    - notifying the subscribers of the changes
+
+Example:
+
+    >>> def on_change(event, devices):
+    >>>     print(event.action, event.device_name, devices)
+    >>>
+    >>> monitor = HotplugMonitor()
+    >>> monitor.subscribe(on_change)
+    >>> monitor.start()
+
+For testing purpose, the netlink socket can be replaced by the receiving end of
+:py:func:`uevent_socketpair`, the other end being used to inject the events created
+with :py:func:`encode_uevent`.
+"""
+
+import os
+import select
+import socket
+import threading
+from collections import namedtuple
+
+from ev3dev.core import bound_devices, get_device_index
+
+#: The netlink protocol of kernel uevents
+NETLINK_KOBJECT_UEVENT = 15
+
+# the multicast group of the events sent by the kernel
+_KERNEL_EVENTS_GROUP = 1
+
+_UEVENT_MAX_SIZE = 8192
+
+
+class UEvent(namedtuple('UEvent', 'action devpath subsystem properties')):
+    """ A kernel uevent.
+
+    Attributes:
+        action (str): the event action (`add`, `remove`, `change`,...)
+        devpath (str): the path of the device in the `/sys` tree
+        subsystem (str): the subsystem of the device, which is also its class (e.g. `lego-sensor`)
+        properties (dict): all the properties carried by the event
+    """
+    __slots__ = ()
+
+    @property
+    def device_name(self):
+        """ The name of the device in its class (e.g. `sensor0`).
+
+        :type: str
+        """
+        return os.path.basename(self.devpath)
+
+
+def parse_uevent(data):
+    """ Decodes a uevent message, as sent by the kernel.
+
+    Args:
+        data (bytes): the message
+
+    Returns:
+        UEvent: the event, or None if the message is not a kernel uevent
+    """
+    fields = data.decode('utf-8', 'replace').split('\0')
+    if '@' not in fields[0]:
+        # not sent by the kernel (e.g. udev messages)
+        return None
+
+    properties = dict(field.split('=', 1) for field in fields[1:] if '=' in field)
+    action, devpath = fields[0].split('@', 1)
+    return UEvent(
+        properties.get('ACTION', action),
+        properties.get('DEVPATH', devpath),
+        properties.get('SUBSYSTEM', ''),
+        properties
+    )
+
+
+def encode_uevent(action, devpath, subsystem, **properties):
+    """ Builds a uevent message formatted as the kernel does.
+
+    Args:
+        action (str): the event action
+        devpath (str): the path of the device in the `/sys` tree
+        subsystem (str): the subsystem of the device
+        \**properties: additional properties
+
+    Returns:
+        bytes: the message
+    """
+    properties.update(ACTION=action, DEVPATH=devpath, SUBSYSTEM=subsystem)
+    fields = ['%s@%s' % (action, devpath)] + ['%s=%s' % item for item in sorted(properties.items())]
+    return ('\0'.join(fields) + '\0').encode('utf-8')
+
+
+def open_uevent_socket():
+    """ Opens a netlink socket receiving the kernel uevents.
+
+    Returns:
+        socket.socket: the socket
+    """
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+    sock.bind((0, _KERNEL_EVENTS_GROUP))
+    return sock
+
+
+def uevent_socketpair():
+    """ Creates a pair of connected datagram sockets standing for the netlink one.
+
+    Returns:
+        tuple[socket.socket, socket.socket]: the socket to be passed to the monitor, and
+        the one used for sending it the events
+    """
+    return socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+
+class HotplugMonitor(object):
+    """ Keeps the device discovery state and the device instances up to date, based
+    on the kernel uevents.
+
+    Events can be processed in a background thread (see :py:meth:`start`) or by calling
+    :py:meth:`process_pending` from the application loop.
+
+    Subscribers are called with the event and the list of the :py:class:`ev3dev.core.Device`
+    instances which have been disconnected or re-bound because of it. As for the buttons
+    scanner, they are executed in the context of the monitor thread when it is used.
+    """
+
+    #: The device classes which events are handled
+    SUBSYSTEMS = frozenset((
+        'tacho-motor', 'lego-sensor', 'dc-motor', 'servo-motor', 'leds', 'power_supply', 'lego_port'
+    ))
+
+    def __init__(self, sock=None, index=None):
+        """
+        Args:
+            sock (Optional[socket.socket]): the socket delivering the uevents. Default to
+                a new netlink socket.
+            index (Optional[DeviceIndex]): the device index to be maintained. Default to
+                the one of the process-wide device backend. Only the devices provided by
+                the backend of the index are handled.
+        """
+        self._sock = sock or open_uevent_socket()
+        self._index = index or get_device_index()
+        self._subscribers = []
+        self._thread = None
+        self._stop = False
+
+    def close(self):
+        """ Stops the monitor thread if running and closes the socket.
+        """
+        self.stop()
+        self._sock.close()
+
+    def subscribe(self, callback):
+        """ Registers a callback invoked for each handled event.
+
+        Args:
+            callback (callable): a function accepting the event and the list of affected devices
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """ Unregisters a callback.
+
+        Args:
+            callback (callable): a callback previously registered
+        """
+        self._subscribers.remove(callback)
+
+    def handle_event(self, event):
+        """ Updates the index and the devices according to an event, and notifies the subscribers.
+
+        Events of devices classes not listed in :py:attr:`SUBSYSTEMS` are ignored.
+
+        Args:
+            event (UEvent): the event
+
+        Returns:
+            list[Device]: the devices which have been disconnected or re-bound
+        """
+        if event.subsystem not in self.SUBSYSTEMS:
+            return []
+
+        affected = []
+        if event.action in ('add', 'remove', 'move'):
+            backend = self._index.backend
+            self._index.refresh(event.subsystem)
+            devices = [device for device in bound_devices() if device.backend is backend]
+
+            if event.action in ('remove', 'move'):
+                path = backend.device_path(event.subsystem, event.device_name)
+                for device in devices:
+                    if device.connected and device.path == path:
+                        device.disconnect()
+                        affected.append(device)
+
+            if event.action in ('add', 'move'):
+                for device in devices:
+                    if not device.connected and device.SYSTEM_CLASS_NAME == event.subsystem:
+                        if device.rebind():
+                            affected.append(device)
+
+        for callback in list(self._subscribers):
+            callback(event, affected)
+
+        return affected
+
+    def process_pending(self, timeout=0):
+        """ Processes the events received so far.
+
+        Args:
+            timeout (Optional[float]): how long to wait for a first event, in seconds.
+                Default to 0 (do not wait).
+
+        Returns:
+            int: the number of processed events
+        """
+        count = 0
+        while select.select([self._sock], [], [], timeout)[0]:
+            event = parse_uevent(self._sock.recv(_UEVENT_MAX_SIZE))
+            if event:
+                self.handle_event(event)
+                count += 1
+            timeout = 0
+        return count
+
+    def start(self):
+        """ Starts processing the events in a background thread, if not yet running.
+
+        Returns:
+            bool: True if the thread has been started, False if it was already running
+        """
+        if self._thread:
+            return False
+
+        self._stop = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """ Stops the background thread if running.
+
+        Returns:
+            bool: True if the thread has been stopped, False if it was not running
+        """
+        if not self._thread:
+            return False
+
+        self._stop = True
+        self._thread.join(10)
+        self._thread = None
+        return True
+
+    def _run(self):
+        while not self._stop:
+            self.process_pending(timeout=0.5)
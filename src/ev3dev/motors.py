@@ -22,8 +22,28 @@
 # THE SOFTWARE.
 # -----------------------------------------------------------------------------
 
+from collections import namedtuple
+
+from ev3dev.clock import SystemClock, get_clock
 from ev3dev.core import PluggedDevice
 
+__all__ = [
+    'MotorWait', 'BaseMotor', 'PositionControlMixin', 'DcMotor', 'RegulatedMotor', 'LargeMotor',
+    'MediumMotor', 'ServoMotor',
+]
+
+#: The outcome of the last wait of a motor (see :py:attr:`BaseMotor.last_wait`)
+#:
+#: - `satisfied`: True if the awaited state was reached, False if the wait timed out
+#: - `duration`: the duration of the wait, in seconds
+#: - `latency`: the maximum delay between the state change and its detection, in seconds.
+#:   When woken up by a notification of the driver, this is the delay between the wake-up
+#:   and the end of the read confirming the state. When polling, this is the delay since
+#:   the previous read. It is 0 if the state was reached when the wait started.
+#: - `reads`: the number of reads of the `state` attribute
+#: - `notified`: True if a notification of the driver has woken up the wait
+MotorWait = namedtuple('MotorWait', 'satisfied duration latency reads notified')
+
 
 class BaseMotor(PluggedDevice):
     """ The root class containing definitions shared by the different types of motors
@@ -60,6 +80,131 @@ class BaseMotor(PluggedDevice):
         """
         return self.get_attr_set('state')
 
+    #: The initial period of the `state` polling done by the waits, in seconds. It is
+    #: doubled after each read not woken up by a notification, up to :py:attr:`WAIT_POLL_MAX_PERIOD`.
+    WAIT_POLL_MIN_PERIOD = 0.002
+
+    #: The maximum period of the `state` polling done by the waits, in seconds
+    WAIT_POLL_MAX_PERIOD = 0.05
+
+    #: The period of the `state` reads done by the waits once the driver has notified a
+    #: change, in seconds. The notifications are trusted then, and the reads are only a safety net.
+    WAIT_NOTIFIED_PERIOD = 0.5
+
+    _last_wait = None
+
+    @property
+    def last_wait(self):
+        """ The outcome of the last call to :py:meth:`wait_until`, :py:meth:`wait_while` or
+        :py:meth:`wait_until_idle`, or None if there was none.
+
+        :type: MotorWait
+        """
+        return self._last_wait
+
+    def wait_until(self, state, timeout=None):
+        """ Waits until a flag is present in the motor state.
+
+        The changes of state are waited for with ``poll()`` on the `state` attribute, if
+        the backend and the driver support it. The state is polled otherwise, with a period
+        growing from :py:attr:`WAIT_POLL_MIN_PERIOD` to :py:attr:`WAIT_POLL_MAX_PERIOD`, so
+        that short moves are detected early without reading the state too often during
+        the long ones. The delays are measured with the process-wide clock (see
+        :py:func:`ev3dev.clock.get_clock`). Since ``poll()`` waits in real time, the state
+        is always polled when another clock than the system one is installed.
+
+        The details of the wait, including the measured wake-up latency, are available in
+        :py:attr:`last_wait` afterwards.
+
+        Example:
+
+            >>> motor.run_to_rel_pos(position_sp=360, stop_command='hold')
+            >>> motor.wait_until('holding', timeout=5)
+
+        Args:
+            state (str): the state flag (e.g. `running`, `holding`,...)
+            timeout (Optional[float]): the maximum delay to wait for, in seconds. Default
+                to None (no limit)
+
+        Returns:
+            bool: True if the flag is present, False if the timeout expired before
+        """
+        return self._wait(lambda flags: state in flags, timeout)
+
+    def wait_while(self, state, timeout=None):
+        """ Waits while a flag is present in the motor state.
+
+        See :py:meth:`wait_until` for details.
+
+        Args:
+            state (str): the state flag (e.g. `running`, `holding`,...)
+            timeout (Optional[float]): the maximum delay to wait for, in seconds. Default
+                to None (no limit)
+
+        Returns:
+            bool: True if the flag is not present anymore, False if the timeout expired before
+        """
+        return self._wait(lambda flags: state not in flags, timeout)
+
+    def wait_until_idle(self, timeout=None):
+        """ Waits until the motor is not running anymore, i.e. its current command has
+        completed. A motor holding its position is idle, even if the driver still reports
+        it as running.
+
+        See :py:meth:`wait_until` for details.
+
+        Args:
+            timeout (Optional[float]): the maximum delay to wait for, in seconds. Default
+                to None (no limit)
+
+        Returns:
+            bool: True if the motor is idle, False if the timeout expired before
+        """
+        return self._wait(lambda flags: 'running' not in flags or 'holding' in flags, timeout)
+
+    def _wait(self, condition, timeout):
+        clock = get_clock()
+        start = last_read = clock.time()
+        deadline = None if timeout is None else start + timeout
+        period = self.WAIT_POLL_MIN_PERIOD
+        reads = 0
+        latency = 0.
+        woken_at = None
+        notified = False
+
+        # the watch waits in real time, and would not make a virtual clock advance
+        watch = self.backend.watch_attribute(self._path, 'state') if isinstance(clock, SystemClock) else None
+        try:
+            while True:
+                satisfied = condition(self.state)
+                reads += 1
+                now = clock.time()
+                if satisfied:
+                    if reads > 1:
+                        latency = now - (woken_at if woken_at is not None else last_read)
+                    break
+                if deadline is not None and now >= deadline:
+                    break
+
+                last_read = now
+                delay = period if deadline is None else min(period, deadline - now)
+                if watch and watch.wait(delay):
+                    woken_at = clock.time()
+                    notified = True
+                    period = self.WAIT_NOTIFIED_PERIOD
+                else:
+                    if not watch:
+                        clock.sleep(delay)
+                    woken_at = None
+                    if not notified:
+                        period = min(period * 2, self.WAIT_POLL_MAX_PERIOD)
+        finally:
+            if watch:
+                watch.close()
+
+        self._last_wait = MotorWait(satisfied, clock.time() - start, latency, reads, notified)
+        return satisfied
+
 
 class PositionControlMixin(object):
     """ Mixin class defining position related properties which are shared by several implementations.
@@ -108,19 +253,38 @@ class DcMotor(BaseMotor):
 
     The duty cycle is initialized to 75 so that instances are ready to use after
     their instantiation.
+
+    Control loops issuing commands at a high rate can avoid rewriting unchanged setpoints
+    by enabling write coalescing (see :py:meth:`enable_write_coalescing`).
     """
 
     SYSTEM_CLASS_NAME = 'dc-motor'
     SYSTEM_DEVICE_NAME_CONVENTION = 'motor*'
 
+    SNAPSHOT_ATTRIBUTES = (
+        ('duty_cycle', 'int'),
+        ('state', 'set'),
+    )
+
+    STATIC_ATTRIBUTES = BaseMotor.STATIC_ATTRIBUTES | frozenset(('stop_commands',))
+
+    COALESCED_ATTRIBUTES = frozenset((
+        'duty_cycle_sp', 'ramp_up_sp', 'ramp_down_sp', 'stop_command', 'time_sp', 'polarity'
+    ))
+
     def __init__(self, **kwargs):
         super(DcMotor, self).__init__(**kwargs)
         if 'duty_cycle_sp' not in kwargs:
             self.duty_cycle_sp = 75
 
     def __del__(self):
-        # ensure the motor is stopped in all cases when we get it out of sight
-        self.stop()
+        # ensure the motor is stopped in all cases when we get it out of sight, which is
+        # possible only if it is bound and still reachable
+        if getattr(self, 'connected', False):
+            try:
+                self.stop()
+            except (IOError, OSError, ValueError):
+                pass
 
     @property
     def duty_cycle(self):
@@ -344,6 +508,19 @@ class RegulatedMotor(DcMotor, PositionControlMixin):
     SYSTEM_CLASS_NAME = 'tacho-motor'
     SYSTEM_DEVICE_NAME_CONVENTION = 'motor*'
 
+    SNAPSHOT_ATTRIBUTES = (
+        ('position', 'int'),
+        ('speed', 'int'),
+        ('duty_cycle', 'int'),
+        ('state', 'set'),
+    )
+
+    STATIC_ATTRIBUTES = DcMotor.STATIC_ATTRIBUTES | frozenset(('count_per_rot',))
+
+    COALESCED_ATTRIBUTES = DcMotor.COALESCED_ATTRIBUTES | frozenset((
+        'speed_sp', 'position_sp', 'speed_regulation', 'encoder_polarity'
+    ))
+
     DRIVERS = None
 
     def __init__(self, **kwargs):
@@ -521,6 +698,8 @@ class RegulatedMotor(DcMotor, PositionControlMixin):
     #: This will also have the effect of stopping the motor.
     COMMAND_RESET = 'reset'
 
+    RESET_COMMANDS = frozenset((COMMAND_RESET,))
+
     #: Sets the normal polarity of the rotary encoder.
     ENCODER_POLARITY_NORMAL = 'normal'
 
@@ -570,6 +749,8 @@ class RegulatedMotor(DcMotor, PositionControlMixin):
     def reset(self):
         """ Resets all of the motor parameter attributes to their default value.
         This will also have the effect of stopping the motor.
+
+        If write coalescing is enabled, the remembered setpoints are discarded.
         """
         self.command = self.COMMAND_RESET
 
@@ -601,6 +782,10 @@ class ServoMotor(BaseMotor, PositionControlMixin):
     SYSTEM_CLASS_NAME = 'servo-motor'
     SYSTEM_DEVICE_NAME_CONVENTION = 'motor*'
 
+    COALESCED_ATTRIBUTES = frozenset((
+        'position_sp', 'max_pulse_sp', 'mid_pulse_sp', 'min_pulse_sp', 'rate_sp', 'polarity'
+    ))
+
     @property
     def max_pulse_sp(self):
         """ The pulse size in milliseconds for the signal that tells the
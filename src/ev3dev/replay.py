@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Deterministic replay of recorded device I/O.
+
+A :py:class:`ReplayBackend` is built from a trace recorded with
+:py:class:`ev3dev.trace.TraceRecorder`. It publishes the devices of the recording, and
+serves the recorded attribute values and key states back to unmodified application code,
+in the order they have been read, as fast as the code reads them.
+
+The writes issued by the code under test are compared with the recorded ones, device by
+device, and the differences are reported as :py:class:`Divergence` instances. In strict
+mode, a :py:class:`ReplayDivergenceError` is raised on the first one instead.
+
+Example:
+
+    >>> backend = ReplayBackend('incident.trace')
+    >>> robot = Robot(backend=backend)         # the code which ran when recording
+    >>> robot.run()
+    >>> for divergence in backend.divergences:
+    >>>     print(divergence)
+
+.. note::
+
+    Replaying is meaningful only if the code under test reads the attributes in the same
+    order as the recorded one. Once the recorded values of an attribute are exhausted, the
+    last one is held, and the read is counted in :py:attr:`ReplayBackend.overruns`.
+"""
+
+import collections
+import errno
+import threading
+from collections import namedtuple
+
+from ev3dev.core import MemoryBackend, MemoryDevice
+from ev3dev.trace import read_trace
+
+__all__ = ['Divergence', 'ReplayDivergenceError', 'ReplayBackend']
+
+#: A difference between the writes issued during a replay and the recorded ones
+#:
+#: - `kind`: `value` if a recorded attribute is written with a different value,
+#:   `unexpected` for a write which has not been recorded, and `missing` for a recorded
+#:   write which has not been issued
+#: - `device`: the device path
+#: - `attribute`: the attribute name
+#: - `expected`: the recorded value (None for unexpected writes)
+#: - `actual`: the written value (None for missing writes)
+Divergence = namedtuple('Divergence', 'kind device attribute expected actual')
+
+
+class ReplayDivergenceError(Exception):
+    """ Raised by strict replays when the code under test diverges from the recording.
+    """
+    def __init__(self, divergence):
+        super(ReplayDivergenceError, self).__init__(
+            '%s write of %s/%s: expected %r, got %r' % divergence
+        )
+        self.divergence = divergence
+
+
+class _ReplayDevice(MemoryDevice):
+    """ A device of the replay backend.
+
+    Its :py:attr:`attributes` hold the identity of the device, as recorded when it was bound,
+    and the values of the attributes are taken from the recorded reads.
+    """
+
+    def __init__(self, backend, path, attributes):
+        super(_ReplayDevice, self).__init__(attributes)
+        self._backend = backend
+        self._path = path
+        # the recorded reads, by attribute, and the last value served for each one
+        self._reads = collections.defaultdict(collections.deque)
+        self._last_values = {}
+        # the recorded writes, and the position of the next expected one
+        self._writes = []
+        self._next_write = 0
+
+    def read_attribute(self, name):
+        value = self._backend._next_read(self, name)
+        return value.decode() if isinstance(value, bytes) and str is not bytes else value
+
+    def read_bytes(self, name, size):
+        value = self._backend._next_read(self, name)
+        return (value if isinstance(value, bytes) else value.encode())[:size]
+
+    def write_attribute(self, name, value):
+        self._backend._check_write(self, name, value)
+
+
+class ReplayBackend(MemoryBackend):
+    """ A backend replaying a recorded trace.
+    """
+
+    def __init__(self, trace, strict=False, lookahead=8, root_path='/sys/class'):
+        """
+        Args:
+            trace (str or iterable[ev3dev.trace.TraceRecord]): the path of the trace file,
+                or its records
+            strict (Optional[bool]): if True, a :py:class:`ReplayDivergenceError` is raised
+                on the first divergence. Default to False.
+            lookahead (Optional[int]): how many recorded writes are searched ahead for
+                the one issued by the code under test, before considering it as unexpected.
+                Default to 8.
+            root_path (Optional[str]): the path of the device classes in the recording.
+                Default to `/sys/class`.
+        """
+        super(ReplayBackend, self).__init__(root_path)
+        self._strict = strict
+        self._lookahead = lookahead
+        self._replay_lock = threading.Lock()
+        self._divergences = []
+        self._overruns = 0
+        self._keys = collections.defaultdict(collections.deque)
+
+        if isinstance(trace, str):
+            trace = read_trace(trace)
+        self._load(trace)
+
+    def _load(self, records):
+        devices = {}
+
+        def get_device(path):
+            device = devices.get(path)
+            if device is None:
+                device = devices[path] = _ReplayDevice(self, path, {})
+            return device
+
+        for record in records:
+            if record.operation == 'bind':
+                attributes = get_device(record.device).attributes
+                for line in record.value.splitlines():
+                    name, _, value = line.partition('=')
+                    attributes[name] = value
+            elif record.operation == 'read':
+                get_device(record.device)._reads[record.name].append((record.value, record.error))
+            elif record.operation == 'write':
+                get_device(record.device)._writes.append((record.name, record.value, record.error))
+            elif record.operation == 'ioctl':
+                self._keys[record.device].append(record.value)
+
+        prefix = self.root_path.rstrip('/') + '/'
+        for path, device in devices.items():
+            if path.startswith(prefix) and path.count('/', len(prefix)) == 1:
+                class_name, name = path[len(prefix):].split('/')
+                self.add_device(class_name, name, device)
+
+    @property
+    def divergences(self):
+        """ The divergences detected so far.
+
+        :type: list[Divergence]
+        """
+        with self._replay_lock:
+            return list(self._divergences)
+
+    @property
+    def overruns(self):
+        """ The number of reads done after the recorded values of the attribute were
+        exhausted.
+
+        :type: int
+        """
+        return self._overruns
+
+    def pending_writes(self):
+        """ Returns the recorded writes which have not been issued yet.
+
+        Returns:
+            list[tuple[str, str, str]]: the device path, attribute name and value of the writes
+        """
+        with self._replay_lock:
+            return [
+                (device._path, name, value)
+                for device in self._devices.values()
+                for name, value, _ in device._writes[device._next_write:]
+            ]
+
+    def read_attribute(self, device_path, name):
+        # used for the discovery, which is not part of the recording
+        device = self._devices.get(device_path)
+        return device.attributes.get(name) if device else None
+
+    def read_keys(self, input_path, buffer):
+        with self._replay_lock:
+            states = self._keys.get(input_path)
+            if states and len(states) > 1:
+                state = states.popleft()
+            elif states:
+                # the last state is held
+                state = states[0]
+                self._overruns += 1
+            else:
+                state = b''
+        state = bytearray(state)
+        for i in range(len(buffer)):
+            buffer[i] = state[i] if i < len(state) else 0
+
+    def _next_read(self, device, name):
+        with self._replay_lock:
+            reads = device._reads.get(name)
+            if reads:
+                value, error = reads.popleft()
+                if error:
+                    raise IOError(errno.EIO, 'replayed failure of %s/%s' % (device._path, name))
+                device._last_values[name] = value
+                return value
+
+            try:
+                value = device._last_values[name]
+            except KeyError:
+                try:
+                    return device.attributes[name]
+                except KeyError:
+                    raise ValueError('attribute not recorded: %s' % name)
+            self._overruns += 1
+            return value
+
+    def _check_write(self, device, name, value):
+        with self._replay_lock:
+            writes, position = device._writes, device._next_write
+            window = writes[position:position + self._lookahead + 1]
+            for offset, (expected_name, expected_value, error) in enumerate(window):
+                if expected_name == name and expected_value == value:
+                    for skipped_name, skipped_value, _ in window[:offset]:
+                        self._diverge(Divergence('missing', device._path, skipped_name, skipped_value, None))
+                    device._next_write = position + offset + 1
+                    if error:
+                        raise IOError(errno.EIO, 'replayed failure of %s/%s' % (device._path, name))
+                    return
+
+            if window and window[0][0] == name:
+                device._next_write += 1
+                self._diverge(Divergence('value', device._path, name, window[0][1], value))
+            else:
+                self._diverge(Divergence('unexpected', device._path, name, None, value))
+
+    def _diverge(self, divergence):
+        self._divergences.append(divergence)
+        if self._strict:
+            raise ReplayDivergenceError(divergence)
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Background sampling of sensor values and motor attributes.
+
+A :py:class:`Sampler` reads a declared set of integer attributes (the `value<N>` of
+sensors, the `position` or `speed` of motors,...) at a fixed rate, from a single
+dedicated thread, and stores the timestamped samples in preallocated circular buffers.
+Consumers get the latest values or a window of the history from memory, without any
+device access, and all the attributes of a device are read in a single pass at each
+period.
+
+Example:
+
+    >>> sampler = Sampler(period=0.01, capacity=500)
+    >>> sampler.add(color_sensor, 'value0', name='light')
+    >>> sampler.add(motor, 'position')
+    >>> with sampler:
+    >>>     ...
+    >>>     t, light = sampler.latest('light')
+    >>>     recent = sampler.history('outA:position', count=50)
+
+The samples are scheduled at absolute times (`start + n * period`), measured with the
+clock of the sampler, so that the time spent reading does not accumulate as a drift.
+Periods which could not be honored (because the reads took longer than the period, or
+the thread was not scheduled in time) are skipped, and counted in :py:attr:`Sampler.overruns`.
+
+The history is kept in :py:class:`RingBuffer` instances, which can also be used on their
+own, for logging motor attributes for instance.
+"""
+
+import array
+import threading
+
+from ev3dev.clock import get_clock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ['RingBuffer', 'Sampler']
+
+
+def _supports_views():
+    try:
+        memoryview(array.array('d'))
+    except TypeError:
+        # Python 2 arrays do not implement the buffer protocol of memoryview
+        return False
+    return True
+
+_MEMORYVIEWS = _supports_views()
+
+
+class RingBuffer(object):
+    """ A fixed capacity circular buffer of numbers, stored in an `array.array`.
+
+    The buffer is mirrored: each value is stored twice, `capacity` items apart, so that
+    the latest values are always contiguous in memory, whatever the position of the
+    buffer wrap. Appending is O(1), and windows over the latest values are returned as
+    views of the storage (memoryviews, or NumPy arrays with :py:meth:`to_numpy`), without
+    any copy.
+
+    Views reflect the storage, and not a copy of it. A window of `n` values is guaranteed
+    to stay unchanged during the next `capacity - n` appends only.
+
+    Example:
+
+        >>> positions = RingBuffer(1000, 'l')
+        >>> positions.append(motor.position)
+        >>> ...
+        >>> last_ten = positions.window(10)
+    """
+
+    def __init__(self, capacity, typecode='d'):
+        """
+        Args:
+            capacity (int): the number of values kept
+            typecode (Optional[str]): the type of the values, as an `array` module type
+                code (e.g. `l` for integers, `d` for floats). Default to `d`.
+
+        Raises:
+            ValueError: if the capacity is not positive, or the type code is invalid
+        """
+        if capacity < 1:
+            raise ValueError('invalid capacity: %s' % capacity)
+        self._capacity = capacity
+        self._data = array.array(typecode, [0]) * (2 * capacity)
+        self._count = 0
+
+    @property
+    def capacity(self):
+        """ The number of values kept.
+
+        :type: int
+        """
+        return self._capacity
+
+    @property
+    def typecode(self):
+        """ The type code of the values.
+
+        :type: str
+        """
+        return self._data.typecode
+
+    @property
+    def count(self):
+        """ The number of values appended since the creation of the buffer, or its last clear.
+
+        :type: int
+        """
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def append(self, value):
+        """ Appends a value, overwriting the oldest one if the buffer is full.
+
+        Args:
+            value: the value
+        """
+        slot = self._count % self._capacity
+        self._data[slot] = self._data[slot + self._capacity] = value
+        self._count += 1
+
+    def clear(self):
+        """ Empties the buffer.
+        """
+        self._count = 0
+
+    def latest(self):
+        """ Returns the last appended value.
+
+        Returns:
+            the value
+
+        Raises:
+            IndexError: if the buffer is empty
+        """
+        if not self._count:
+            raise IndexError('empty buffer')
+        return self._data[(self._count - 1) % self._capacity]
+
+    def _bounds(self, count):
+        available = len(self)
+        count = available if count is None else max(0, min(count, available))
+        # the mirror copy of the latest values ends just before the next slot + capacity
+        end = self._count % self._capacity + self._capacity
+        return end - count, end
+
+    def window(self, count=None):
+        """ Returns the latest values, oldest first, without copying them.
+
+        With Python 2, which arrays cannot be viewed by memoryviews, a copy is returned.
+
+        Args:
+            count (Optional[int]): the maximum number of values. Default to all the values kept.
+
+        Returns:
+            memoryview: the values
+        """
+        start, end = self._bounds(count)
+        if _MEMORYVIEWS:
+            return memoryview(self._data)[start:end]
+        return self._data[start:end]
+
+    def tolist(self, count=None):
+        """ Returns a copy of the latest values, oldest first.
+
+        Args:
+            count (Optional[int]): the maximum number of values. Default to all the values kept.
+
+        Returns:
+            list: the values
+        """
+        start, end = self._bounds(count)
+        return self._data[start:end].tolist()
+
+    def to_numpy(self, count=None):
+        """ Returns the latest values, oldest first, as a NumPy array sharing the storage
+        of the buffer.
+
+        Args:
+            count (Optional[int]): the maximum number of values. Default to all the values kept.
+
+        Returns:
+            numpy.ndarray: the values
+
+        Raises:
+            ImportError: if NumPy is not available
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for NumPy views')
+        start, end = self._bounds(count)
+        return numpy.frombuffer(
+            self._data, dtype=self._data.typecode, count=end - start, offset=start * self._data.itemsize
+        )
+
+
+class Sampler(object):
+    """ Samples device attributes at a fixed rate in a background thread.
+    """
+
+    def __init__(self, period=0.01, capacity=1000, clock=None):
+        """
+        Args:
+            period (Optional[float]): the sampling period, in seconds. Default to 0.01.
+            capacity (Optional[int]): the number of samples kept for each attribute.
+                Default to 1000.
+            clock (Optional[ev3dev.clock.Clock]): the clock used for the timestamps and the
+                scheduling. Default to the process-wide one (see :py:func:`ev3dev.clock.get_clock`).
+        """
+        self._period = period
+        self._capacity = capacity
+        self._clock = clock or get_clock()
+
+        # the channels, in declaration order, and their index, by name
+        self._channels = []
+        self._channel_index = {}
+        # the reads done at each period: (device, attribute names, channel indexes)
+        self._reads = []
+
+        self._timestamps = RingBuffer(capacity, 'd')
+        self._values = []
+        self._lock = threading.Lock()
+
+        self._thread = None
+        self._stop = False
+        self._overruns = 0
+        self._errors = 0
+
+    @property
+    def period(self):
+        """ The sampling period, in seconds.
+
+        :type: float
+        """
+        return self._period
+
+    @property
+    def capacity(self):
+        """ The number of samples kept for each attribute.
+
+        :type: int
+        """
+        return self._capacity
+
+    @property
+    def channels(self):
+        """ The names of the sampled attributes, in declaration order.
+
+        :type: list[str]
+        """
+        return list(self._channels)
+
+    @property
+    def samples(self):
+        """ The number of samples taken since the sampler was started.
+
+        :type: int
+        """
+        return self._timestamps.count
+
+    @property
+    def overruns(self):
+        """ The number of periods skipped because the sampling was late.
+
+        :type: int
+        """
+        return self._overruns
+
+    @property
+    def errors(self):
+        """ The number of failed device reads. The previous values of the attributes are
+        kept for the sample in this case.
+
+        :type: int
+        """
+        return self._errors
+
+    @property
+    def running(self):
+        """ Tells if the sampler is running.
+
+        :type: bool
+        """
+        return self._thread is not None
+
+    def add(self, device, attribute, name=None):
+        """ Declares an attribute to be sampled.
+
+        Attributes must be declared before the sampler is started, and their values must be
+        integers.
+
+        Args:
+            device (ev3dev.core.Device): the device
+            attribute (str): the attribute name (e.g. `value0` or `position`)
+            name (Optional[str]): the name of the channel. Default to `<port_name>:<attribute>`.
+
+        Returns:
+            str: the name of the channel
+
+        Raises:
+            ValueError: if the sampler is running, or if the name is already used
+        """
+        if self._thread:
+            raise ValueError('attributes cannot be added while sampling')
+        if name is None:
+            name = '%s:%s' % (device.port_name, attribute)
+        if name in self._channel_index:
+            raise ValueError('channel already defined: %s' % name)
+
+        index = len(self._channels)
+        self._channels.append(name)
+        self._channel_index[name] = index
+        self._values.append(RingBuffer(self._capacity, 'l'))
+
+        for device_reads in self._reads:
+            if device_reads[0] is device:
+                device_reads[1].append(attribute)
+                device_reads[2].append(index)
+                break
+        else:
+            self._reads.append((device, [attribute], [index]))
+
+        return name
+
+    def start(self):
+        """ Clears the history and starts sampling.
+
+        Returns:
+            bool: True if the sampler has been started, False if it was already running
+        """
+        if self._thread:
+            return False
+
+        with self._lock:
+            self._timestamps.clear()
+            for values in self._values:
+                values.clear()
+        self._overruns = self._errors = 0
+        self._stop = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """ Stops sampling. The history is kept.
+
+        Returns:
+            bool: True if the sampler has been stopped, False if it was not running
+        """
+        if not self._thread:
+            return False
+
+        self._stop = True
+        self._thread.join(10)
+        self._thread = None
+        return True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        clock = self._clock
+        period = self._period
+        start = clock.time()
+        tick = 0
+        while not self._stop:
+            self._sample(clock.time())
+
+            tick += 1
+            deadline = start + tick * period
+            now = clock.time()
+            if now >= deadline:
+                # late: skip the periods already passed, staying on the initial schedule
+                missed = int((now - deadline) / period) + 1
+                self._overruns += missed
+                tick += missed
+                deadline = start + tick * period
+            clock.sleep_until(deadline)
+
+    def _sample(self, timestamp):
+        # the devices are read first, so that the lock is held only while storing the values
+        samples = []
+        for device, attributes, indexes in self._reads:
+            try:
+                values = [int(value) for value in device.read_many(attributes)]
+            except (IOError, OSError, ValueError):
+                self._errors += 1
+                values = [self._values[index].latest() if self._timestamps.count else 0 for index in indexes]
+            samples.append((indexes, values))
+
+        with self._lock:
+            for indexes, values in samples:
+                for index, value in zip(indexes, values):
+                    self._values[index].append(value)
+            self._timestamps.append(timestamp)
+
+    def latest(self, name):
+        """ Returns the latest sample of an attribute.
+
+        Args:
+            name (str): the name of the channel
+
+        Returns:
+            tuple[float, int]: the timestamp and the value, or None if no sample has been
+            taken yet
+
+        Raises:
+            KeyError: if the channel does not exist
+        """
+        values = self._values[self._channel_index[name]]
+        with self._lock:
+            if not self._timestamps.count:
+                return None
+            return self._timestamps.latest(), values.latest()
+
+    def history(self, name, count=None):
+        """ Returns a copy of the latest samples of an attribute, oldest first.
+
+        Args:
+            name (str): the name of the channel
+            count (Optional[int]): the maximum number of samples. Default to all the
+                samples kept.
+
+        Returns:
+            list[tuple[float, int]]: the timestamps and values
+
+        Raises:
+            KeyError: if the channel does not exist
+        """
+        values = self._values[self._channel_index[name]]
+        with self._lock:
+            return list(zip(self._timestamps.tolist(count), values.tolist(count)))
+
+    def window(self, name, count=None):
+        """ Returns the latest samples of an attribute, oldest first, as views of the
+        buffers of the sampler (see :py:meth:`RingBuffer.window`).
+
+        The views are not copies, and `numpy.asarray` can wrap them without copying either.
+        While the sampler is running, they stay unchanged during the next `capacity - count`
+        samples only.
+
+        Args:
+            name (str): the name of the channel
+            count (Optional[int]): the maximum number of samples. Default to all the
+                samples kept.
+
+        Returns:
+            tuple[memoryview, memoryview]: the timestamps and the values
+
+        Raises:
+            KeyError: if the channel does not exist
+        """
+        values = self._values[self._channel_index[name]]
+        with self._lock:
+            return self._timestamps.window(count), values.window(count)
@@ -1,9 +1,41 @@
 # -*- coding: utf-8 -*-
 
-from struct import unpack
+from collections import namedtuple
+from struct import Struct
 
 from ev3dev.core import PluggedDevice, ButtonManagerBase
 
+__all__ = [
+    'ModeInfo', 'Sensor', 'I2cSensor', 'ColorSensor', 'UltrasonicSensor', 'GyroSensor',
+    'InfraredSensor', 'SoundSensor', 'LightSensor', 'TouchSensor', 'RemoteControl',
+]
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#: The metadata describing the values of a sensor mode
+#:
+#: `bin_data_struct` is the `struct.Struct` decoding the values of the mode in `bin_data`,
+#: or None if the format is unknown.
+ModeInfo = namedtuple('ModeInfo', 'num_values decimals units bin_data_format bin_data_size bin_data_struct')
+
+# the names of the value<N> attributes
+_VALUE_ATTRIBUTES = tuple('value%d' % n for n in range(8))
+
+# the structs compiled for the formats passed to Sensor.bin_data
+_structs = {}
+
+
+def _struct(fmt):
+    try:
+        return _structs[fmt]
+    except KeyError:
+        _structs[fmt] = compiled = Struct(fmt)
+        return compiled
+
 
 class Sensor(PluggedDevice):
     """ The sensor class provides a uniform interface for using most of the
@@ -20,24 +52,33 @@ class Sensor(PluggedDevice):
     have more than one sensor of each type, you can just look for a matching
     `driver_name`. Then it will not matter which port a sensor is plugged in to - your
     program will still work.
+
+    The current mode and the metadata of the modes (`num_values`, `decimals`, `units` and
+    `bin_data_format`) are read on the first visit of each mode, and remembered afterwards.
+    Switching between already visited modes thus does not involve any metadata read. If the
+    mode of the sensor can be changed by other means than this instance (e.g. another
+    instance bound to the same sensor), :py:meth:`invalidate_modes_info` must be called.
     """
 
     SYSTEM_CLASS_NAME = 'lego-sensor'
     SYSTEM_DEVICE_NAME_CONVENTION = 'sensor*'
 
+    STATIC_ATTRIBUTES = PluggedDevice.STATIC_ATTRIBUTES | frozenset(('modes',))
+
     #: The list of driver names associated to this type of sensor. Must
     #: be defined by concrete sub-classes. Trying to instantiate a class not
     #: defining this results in a :py:class:`NotImplementedError`
     DRIVERS = None
 
-    _bin_data_sizes = {
-        "u8":     1,
-        "s8":     1,
-        "u16":    2,
-        "s16":    2,
-        "s16_be": 2,
-        "s32":    4,
-        "float":  4
+    # the struct byte order and type code, and the NumPy data type of the bin_data formats
+    _bin_data_types = {
+        "u8":     ('<', 'B', 'u1'),
+        "s8":     ('<', 'b', 'i1'),
+        "u16":    ('<', 'H', '<u2'),
+        "s16":    ('<', 'h', '<i2'),
+        "s16_be": ('>', 'h', '>i2'),
+        "s32":    ('<', 'i', '<i4'),
+        "float":  ('<', 'f', '<f4'),
     }
 
     def __init__(self, **kwargs):
@@ -46,8 +87,64 @@ class Sensor(PluggedDevice):
 
         super(Sensor, self).__init__(driver_name=self.DRIVERS, **kwargs)
 
-        # will be initialized on first read on binary data
-        self._bin_data_size = None
+        # the metadata of the modes visited so far, and the current mode and its metadata
+        # (will be initialized on first use)
+        self._modes_info = {}
+        self._mode = None
+        self._mode_info = None
+
+    def _get_mode_info(self):
+        """ Returns the metadata of the current mode, reading them if it is visited for
+        the first time.
+        """
+        info = self._mode_info
+        if info is None:
+            mode = self.mode
+            try:
+                info = self._modes_info[mode]
+            except KeyError:
+                num_values, decimals, units, bin_data_format = self.read_many(
+                    ('num_values', 'decimals', 'units', 'bin_data_format')
+                )
+                num_values = int(num_values)
+                try:
+                    byte_order, code, _ = self._bin_data_types[bin_data_format]
+                except KeyError:
+                    bin_data_struct = None
+                    bin_data_size = num_values
+                else:
+                    bin_data_struct = Struct('%s%d%s' % (byte_order, num_values, code))
+                    bin_data_size = bin_data_struct.size
+                info = self._modes_info[mode] = ModeInfo(
+                    num_values, int(decimals), units, bin_data_format, bin_data_size, bin_data_struct
+                )
+            self._mode_info = info
+        return info
+
+    @property
+    def mode_info(self):
+        """ The metadata of the current mode.
+
+        :type: ModeInfo
+        """
+        return self._get_mode_info()
+
+    def rebind(self):
+        """ See :py:meth:`ev3dev.core.Device.rebind`.
+
+        Since the re-connected sensor starts in its default mode, the remembered mode and
+        modes metadata are discarded.
+        """
+        self.invalidate_modes_info()
+        return super(Sensor, self).rebind()
+
+    def invalidate_modes_info(self):
+        """ Forgets the current mode and the metadata of the visited modes, so that they
+        are read again on next use.
+        """
+        self._modes_info.clear()
+        self._mode = None
+        self._mode_info = None
 
     @property
     def decimals(self):
@@ -56,7 +153,7 @@ class Sensor(PluggedDevice):
 
         :type: int
         """
-        return self.get_attr_int('decimals')
+        return self._get_mode_info().decimals
 
     @property
     def mode(self):
@@ -66,12 +163,22 @@ class Sensor(PluggedDevice):
 
         :type: str
         """
-        return self.get_attr_string('mode')
+        if self._mode is None:
+            self._mode = self.get_attr_string('mode')
+        return self._mode
 
     @mode.setter
     def mode(self, value):
         self.set_attr_string('mode', value)
 
+    def _set_attribute(self, attribute, value):
+        super(Sensor, self)._set_attribute(attribute, value)
+        # the remembered mode is updated here, so that it follows the writes not made
+        # through the `mode` property (e.g. with set_attr_string)
+        if attribute == 'mode':
+            self._mode = value
+            self._mode_info = self._modes_info.get(value)
+
     @property
     def modes(self):
         """ The list of the valid modes for the sensor.
@@ -87,7 +194,7 @@ class Sensor(PluggedDevice):
 
         :type: int
         """
-        return self.get_attr_int('num_values')
+        return self._get_mode_info().num_values
 
     @property
     def units(self):
@@ -96,7 +203,7 @@ class Sensor(PluggedDevice):
 
         :type: str
         """
-        return self.get_attr_string('units')
+        return self._get_mode_info().units
 
     def value(self, n=0):
         """ Returns the (optionally indexed) sensor value.
@@ -112,6 +219,42 @@ class Sensor(PluggedDevice):
         except ValueError:
             return 0
 
+    def values(self, scaled=False):
+        """ Returns all the values of the current mode, read at once.
+
+        The values are decoded from a single read of `bin_data`, instead of reading the
+        `value<N>` attributes one by one. This saves syscalls for the modes returning
+        several values (e.g. `RGB-RAW` or `IR-SEEK`), and guarantees that they all come
+        from the same update of the driver.
+
+        If the format of the mode is unknown, or if `bin_data` does not hold all the values
+        yet, the `value<N>` attributes are read instead.
+
+        Example:
+
+            >>> color_sensor.mode = ColorSensor.MODE_RGB_RAW
+            >>> r, g, b = color_sensor.values()
+
+        Args:
+            scaled (Optional[bool]): if True, the values are divided by 10 ^ `decimals`
+                and returned as floats. Default to False.
+
+        Returns:
+            tuple: the values
+        """
+        info = self._get_mode_info()
+        decoder = info.bin_data_struct
+        raw = self._attribute_cache.read_bytes('bin_data', info.bin_data_size) if decoder is not None else b''
+        if decoder is not None and len(raw) == info.bin_data_size:
+            values = decoder.unpack(raw)
+        else:
+            values = tuple(int(v) for v in self.read_many(_VALUE_ATTRIBUTES[:info.num_values]))
+
+        if scaled:
+            scale = float(10 ** info.decimals)
+            return tuple(v / scale for v in values)
+        return values
+
     @property
     def bin_data_format(self):
         """ The format of the values in `bin_data` for the current mode.
@@ -130,13 +273,16 @@ class Sensor(PluggedDevice):
 
         :type: str
         """
-        return self.get_attr_string('bin_data_format')
+        return self._get_mode_info().bin_data_format
 
     def bin_data(self, fmt=None):
         """ Returns the unscaled raw values in the `value<N>` attributes as raw byte
         array. Use `bin_data_format`, `num_values` and the individual sensor
         documentation to determine how to interpret the data.
 
+        The structs compiled for the formats are cached, so that passing the same format
+        again does not parse it again.
+
         Args:
             fmt (str): format to be used for unpacking the raw bytes into a struct.
 
@@ -149,17 +295,60 @@ class Sensor(PluggedDevice):
             >>> ir.bin_data('<b')
             (28,)
         """
-        if not self._bin_data_size:
-            self._bin_data_size = self._bin_data_sizes.get(self.bin_data_format, 1) * self.num_values
+        bin_data_size = self._get_mode_info().bin_data_size
 
-        f = self._attribute_cache.file_handle('/bin_data', binary=True)
-        f.seek(0)
-        raw = bytearray(f.read(self._bin_data_size))
+        raw = self._attribute_cache.read_bytes('bin_data', bin_data_size)
 
         if fmt:
-            return unpack(fmt, raw)
+            return _struct(fmt).unpack(raw)
+        else:
+            return bytearray(raw)
+
+    def decode_bin_data(self, data, mode=None):
+        """ Decodes many raw `bin_data` samples at once, as returned by :py:meth:`bin_data`
+        without format.
+
+        The samples are decoded by NumPy, without any copy if they are passed as a single
+        bytes-like object.
+
+        Example:
+
+            >>> samples = [gyro.bin_data() for _ in range(100)]
+            >>> angles = gyro.decode_bin_data(samples)[:, 0]
+
+        Args:
+            data (bytes or list[bytes]): the samples, concatenated or as a list
+            mode (Optional[str]): the mode of the sensor when the samples were read, which
+                must have been visited already. Default to the current mode.
+
+        Returns:
+            numpy.ndarray: the values, with a line per sample and a column per value
+
+        Raises:
+            ImportError: if NumPy is not available
+            ValueError: if the mode has not been visited, if its format is unknown, or if
+                the data size is not a multiple of the sample size
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for batch decoding')
+
+        if mode is None:
+            info = self._get_mode_info()
         else:
-            return raw
+            try:
+                info = self._modes_info[mode]
+            except KeyError:
+                raise ValueError('mode not visited yet: %s' % mode)
+        try:
+            dtype = self._bin_data_types[info.bin_data_format][2]
+        except KeyError:
+            raise ValueError('unknown bin_data format: %s' % info.bin_data_format)
+
+        if isinstance(data, (list, tuple)):
+            data = b''.join(data)
+        if len(data) % info.bin_data_size:
+            raise ValueError('data size is not a multiple of %d bytes' % info.bin_data_size)
+        return numpy.frombuffer(data, dtype=dtype).reshape(-1, info.num_values)
 
 
 class I2cSensor(Sensor):
@@ -167,6 +356,8 @@ class I2cSensor(Sensor):
     """
     DRIVERS = ['nxt-i2c-sensor']
 
+    STATIC_ATTRIBUTES = Sensor.STATIC_ATTRIBUTES | frozenset(('fw_version',))
+
     @property
     def fw_version(self):
         """ The firmware version of the sensor if available. Currently only
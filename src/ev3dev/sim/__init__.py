@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+""" Simulated devices, used with the :py:class:`ev3dev.core.MemoryBackend` for running and
+benchmarking programs without the hardware.
+"""
+
+from .motors import *
+from .sensors import *
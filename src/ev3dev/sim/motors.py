@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Simulation of the tacho motors (EV3 large and medium motors), behind the attributes
+interface of the `tacho-motor` class.
+
+The simulator implements the kernel semantics relied upon by :py:class:`ev3dev.motors.RegulatedMotor`
+(commands, stop commands, ramps, speed regulation and state flags), on top of a first order
+model of the motor dynamics. The state of the motor is integrated with a fixed step, up to the
+time given by the clock of the simulator each time an attribute is accessed.
+
+The clock is any callable returning a time in seconds, the process-wide clock being used by
+default. Using a :py:class:`ev3dev.clock.VirtualClock` allows running control loops faster than
+real time.
+
+Example:
+
+    >>> backend = MemoryBackend()
+    >>> add_tacho_motor(backend, 'outB')
+    >>> m = LargeMotor(port='outB', backend=backend)
+    >>> m.run_to_rel_pos(position_sp=360)
+"""
+
+import errno
+import math
+import threading
+from collections import namedtuple
+
+from ev3dev.clock import get_clock
+from ev3dev.core import MemoryDevice
+from ev3dev.sim._common import free_device_name
+
+__all__ = ['MotorParameters', 'TachoMotorSimulator', 'add_tacho_motor']
+
+#: The physical characteristics of a motor model
+#:
+#: - `max_speed`: the no-load speed at full duty cycle, in counts per second
+#: - `time_constant`: the time constant of the speed response when powered or braked, in seconds
+#: - `coast_time_constant`: the time constant of the speed decay when coasting, in seconds
+MotorParameters = namedtuple('MotorParameters', 'max_speed time_constant coast_time_constant')
+
+# operating modes of the simulated driver
+_IDLE, _RUN, _TIMED, _TO_POSITION, _DIRECT, _HOLD = range(6)
+
+_RUN_MODES = (_RUN, _TIMED, _TO_POSITION)
+
+
+def _clamp(value, limit=1.0):
+    return max(-limit, min(limit, value))
+
+
+def _invalid(name, value):
+    return IOError(errno.EINVAL, 'invalid value for %s: %r' % (name, value))
+
+
+class TachoMotorSimulator(MemoryDevice):
+    """ A simulated `tacho-motor` device, to be added to a :py:class:`ev3dev.core.MemoryBackend`.
+
+    Positions are expressed in encoder counts and speeds in counts per second, as for the real
+    devices. The gains exposed in the `speed_pid` and `hold_pid` attributes are accepted, but
+    the simulator uses its own controllers.
+
+    Mechanical limits (such as the end stops of a gripper) can be given as a range of positions
+    in which the motor shaft can move. The motor is reported as `stalled` when it is powered but
+    cannot move.
+
+    Invalid writes raise `IOError`, with the same `errno` as the kernel driver.
+    """
+
+    #: The characteristics of the supported motors, by driver name
+    MOTOR_PARAMETERS = {
+        'lego-ev3-l-motor': MotorParameters(max_speed=1020, time_constant=0.08, coast_time_constant=0.6),
+        'lego-ev3-m-motor': MotorParameters(max_speed=1560, time_constant=0.03, coast_time_constant=0.25),
+    }
+
+    #: The integration step, in seconds
+    STEP = 0.001
+
+    #: The commands accepted by the simulated driver
+    COMMANDS = ('run-forever', 'run-to-abs-pos', 'run-to-rel-pos', 'run-timed', 'run-direct', 'stop', 'reset')
+
+    #: The stop commands accepted by the simulated driver
+    STOP_COMMANDS = ('coast', 'brake', 'hold')
+
+    #: The values of the parameters attributes after a `reset` command
+    DEFAULTS = {
+        'duty_cycle_sp': '0',
+        'encoder_polarity': 'normal',
+        'hold_pid/Kd': '0',
+        'hold_pid/Ki': '0',
+        'hold_pid/Kp': '4000',
+        'polarity': 'normal',
+        'position_sp': '0',
+        'ramp_down_sp': '0',
+        'ramp_up_sp': '0',
+        'speed_pid/Kd': '0',
+        'speed_pid/Ki': '60',
+        'speed_pid/Kp': '1000',
+        'speed_regulation': 'off',
+        'speed_sp': '0',
+        'stop_command': 'coast',
+        'time_sp': '0',
+    }
+
+    # attributes computed from the simulation state
+    _DYNAMIC_ATTRIBUTES = frozenset(('position', 'speed', 'duty_cycle', 'state'))
+
+    # attributes which cannot be written
+    _READ_ONLY_ATTRIBUTES = frozenset((
+        'address', 'commands', 'count_per_rot', 'driver_name', 'duty_cycle', 'port_name', 'speed',
+        'state', 'stop_commands',
+    ))
+
+    # attributes which values are integers, with their range if any
+    _INT_ATTRIBUTES = {
+        'duty_cycle_sp': 100, 'position': None, 'position_sp': None, 'ramp_down_sp': None,
+        'ramp_up_sp': None, 'speed_sp': None, 'time_sp': None, 'hold_pid/Kd': None,
+        'hold_pid/Ki': None, 'hold_pid/Kp': None, 'speed_pid/Kd': None, 'speed_pid/Ki': None,
+        'speed_pid/Kp': None,
+    }
+
+    # attributes which values are taken in a fixed set
+    _CHOICE_ATTRIBUTES = {
+        'encoder_polarity': ('normal', 'inversed'),
+        'polarity': ('normal', 'inversed'),
+        'speed_regulation': ('on', 'off'),
+        'stop_command': STOP_COMMANDS,
+    }
+
+    # gains of the speed regulation, relative to the maximum speed
+    _SPEED_KP = 2.0
+    _SPEED_KI = 20.0
+
+    # gains of the position holding, per count and per count/s
+    _HOLD_KP = 0.02
+    _HOLD_KD = 0.0004
+
+    # deceleration used when the ramp down is not set, in fraction of full scale per second
+    _DEFAULT_DECELERATION = 10.0
+
+    # delay after which a powered motor which does not move is reported as stalled
+    _STALL_DELAY = 0.1
+
+    def __init__(self, driver_name='lego-ev3-l-motor', port_name='outA', position_limits=None,
+                 clock=None, count_per_rot=360):
+        """
+        Args:
+            driver_name (Optional[str]): the driver of the simulated motor, which must be one of
+                :py:attr:`MOTOR_PARAMETERS` keys. Default to the large motor.
+            port_name (Optional[str]): the output port. Default to `outA`.
+            position_limits (Optional[tuple[int, int]]): the range of absolute positions the
+                shaft can reach, in counts. Default to unlimited.
+            clock (Optional[callable]): the clock of the simulation. Default to the
+                process-wide one (see :py:func:`ev3dev.clock.get_clock`).
+            count_per_rot (Optional[int]): the number of encoder counts per revolution.
+                Default to 360.
+
+        Raises:
+            ValueError: if the driver is not supported
+        """
+        try:
+            self._parameters = self.MOTOR_PARAMETERS[driver_name]
+        except KeyError:
+            raise ValueError('unsupported driver: %s' % driver_name)
+
+        attributes = dict(self.DEFAULTS)
+        attributes.update({
+            'address': port_name,
+            'command': '',
+            'commands': ' '.join(self.COMMANDS),
+            'count_per_rot': count_per_rot,
+            'driver_name': driver_name,
+            'port_name': port_name,
+            'stop_commands': ' '.join(self.STOP_COMMANDS),
+        })
+        super(TachoMotorSimulator, self).__init__(attributes)
+
+        self._clock = clock or get_clock()
+        self._lock = threading.Lock()
+        self._time = self._clock()
+        self._limits = position_limits
+
+        # physical state (the positions are the absolute ones of the shaft)
+        self._position = 0.0
+        self._speed = 0.0
+        self._duty = 0.0
+        self._stalled_for = 0.0
+
+        # position read as 0 (changed by a reset or when the position attribute is written)
+        self._origin = 0.0
+
+        # driver state
+        self._mode = _IDLE
+        self._braking = False
+        self._run_setpoint = 0.0
+        self._setpoint = 0.0
+        self._integral = 0.0
+        self._deadline = None
+        self._target_position = 0.0
+        self._direction = 1
+
+    @property
+    def parameters(self):
+        """ The physical characteristics of the simulated motor.
+
+        :type: MotorParameters
+        """
+        return self._parameters
+
+    # Values exchanged through the attributes are expressed in the frame defined by the
+    # polarity, the encoder polarity and the origin of positions.
+
+    def _sign(self):
+        return -1 if self.attributes['polarity'] == 'inversed' else 1
+
+    def _encoder_sign(self):
+        return self._sign() * (-1 if self.attributes['encoder_polarity'] == 'inversed' else 1)
+
+    def _int(self, name):
+        return int(self.attributes[name])
+
+    def read_attribute(self, name):
+        with self._lock:
+            self._advance()
+            if name not in self._DYNAMIC_ATTRIBUTES:
+                return super(TachoMotorSimulator, self).read_attribute(name)
+
+            if name == 'position':
+                return str(int(round((self._position - self._origin) * self._encoder_sign())))
+            elif name == 'speed':
+                return str(int(round(self._speed * self._encoder_sign())))
+            elif name == 'duty_cycle':
+                return str(int(round(self._duty * 100 * self._sign())))
+            else:
+                return ' '.join(self._state_flags())
+
+    def write_attribute(self, name, value):
+        with self._lock:
+            self._advance()
+
+            if name in self._READ_ONLY_ATTRIBUTES:
+                raise IOError(errno.EACCES, 'attribute %s is read-only' % name)
+
+            value = value.strip()
+            if name in self._INT_ATTRIBUTES:
+                try:
+                    number = int(value)
+                except ValueError:
+                    raise _invalid(name, value)
+                limit = self._INT_ATTRIBUTES[name]
+                if limit is not None and abs(number) > limit:
+                    raise _invalid(name, value)
+            elif name in self._CHOICE_ATTRIBUTES and value not in self._CHOICE_ATTRIBUTES[name]:
+                raise _invalid(name, value)
+
+            if name == 'command':
+                self._execute(value)
+            elif name == 'position':
+                self._origin = self._position - number * self._encoder_sign()
+                if self._mode == _HOLD:
+                    self._target_position = self._position
+            else:
+                super(TachoMotorSimulator, self).write_attribute(name, value)
+
+    def _state_flags(self):
+        flags = []
+        if self._mode in _RUN_MODES or self._mode == _DIRECT:
+            flags.append('running')
+            if self._mode in _RUN_MODES and self._setpoint != self._run_target():
+                flags.append('ramping')
+        elif self._mode == _HOLD:
+            flags.append('holding')
+        if self._stalled_for >= self._STALL_DELAY:
+            flags.append('stalled')
+        return flags
+
+    def _execute(self, command):
+        """ Executes a command written to the `command` attribute.
+        """
+        if command not in self.COMMANDS:
+            raise _invalid('command', command)
+
+        self.attributes['command'] = command
+
+        if command == 'stop':
+            self._stop()
+        elif command == 'reset':
+            self.attributes.update(self.DEFAULTS)
+            self._origin = self._position
+            self._mode = _IDLE
+            self._braking = False
+            self._setpoint = 0.0
+        elif command == 'run-direct':
+            self._mode = _DIRECT
+        else:
+            # the setpoints of the other run commands are latched when the command is issued
+            if self.attributes['speed_regulation'] == 'on':
+                setpoint = _clamp(float(self._int('speed_sp')) / self._parameters.max_speed)
+            else:
+                setpoint = self._int('duty_cycle_sp') / 100.
+            self._run_setpoint = setpoint * self._sign()
+            if self._mode not in _RUN_MODES:
+                self._integral = 0.0
+
+            if command == 'run-forever':
+                self._mode = _RUN
+            elif command == 'run-timed':
+                self._mode = _TIMED
+                self._deadline = self._time + self._int('time_sp') / 1000.
+            else:
+                target = self._int('position_sp') * self._encoder_sign()
+                if command == 'run-to-abs-pos':
+                    self._target_position = self._origin + target
+                else:
+                    self._target_position = self._position + target
+                self._direction = 1 if self._target_position >= self._position else -1
+                self._mode = _TO_POSITION
+
+    def _stop(self):
+        """ Stops the motor as specified by the `stop_command` attribute.
+        """
+        stop_command = self.attributes['stop_command']
+        if stop_command == 'hold':
+            if self._mode != _TO_POSITION:
+                self._target_position = self._position
+            self._mode = _HOLD
+        else:
+            self._mode = _IDLE
+            self._braking = stop_command == 'brake'
+        self._setpoint = 0.0
+
+    def _run_target(self):
+        """ Returns the setpoint the current run command tends to, as a fraction of full scale.
+        """
+        if self._mode != _TO_POSITION:
+            return self._run_setpoint
+
+        # Slow down when approaching the target, so that it can be reached without overshooting.
+        # The distance covered while the speed follows the setpoint is compensated.
+        parameters = self._parameters
+        error = self._target_position - self._position - self._speed * parameters.time_constant
+        if error * self._direction <= 0:
+            return 0.0
+        ramp_down = self._int('ramp_down_sp')
+        deceleration = 1000. / ramp_down if ramp_down > 0 else self._DEFAULT_DECELERATION
+        reachable = math.sqrt(2 * deceleration * abs(error) / parameters.max_speed)
+        return self._direction * min(abs(self._run_setpoint), reachable)
+
+    def _ramp(self, target, dt):
+        """ Moves the current setpoint towards a target, according to the ramp attributes.
+        """
+        delta = target - self._setpoint
+        accelerating = abs(target) > abs(self._setpoint) and target * self._setpoint >= 0
+        ramp_time = self._int('ramp_up_sp' if accelerating else 'ramp_down_sp') / 1000.
+        max_delta = dt / ramp_time if ramp_time > 0 else abs(delta)
+        if abs(delta) <= max_delta:
+            self._setpoint = target
+        else:
+            self._setpoint += math.copysign(max_delta, delta)
+
+    def _regulate(self, dt):
+        """ Returns the duty cycle applied for running at the current setpoint.
+        """
+        if self.attributes['speed_regulation'] != 'on':
+            return _clamp(self._setpoint)
+
+        error = self._setpoint - self._speed / self._parameters.max_speed
+        # anti wind-up: stop integrating when saturated
+        duty = self._setpoint + self._SPEED_KP * error + self._SPEED_KI * self._integral
+        if abs(duty) < 1 or duty * error < 0:
+            self._integral += error * dt
+        return _clamp(duty)
+
+    def _advance(self):
+        """ Integrates the state of the motor up to the current time of the clock.
+        """
+        now = self._clock()
+        settled = self._mode == _IDLE or (
+            self._mode == _HOLD and abs(self._target_position - self._position) < 0.5
+        )
+        if settled and abs(self._speed) < 0.01:
+            # nothing moves, no need to iterate
+            self._speed = self._duty = 0.0
+            self._stalled_for = 0.0
+            self._time = max(self._time, now)
+            return
+
+        step = self.STEP
+        while self._time < now:
+            dt = min(step, now - self._time)
+            self._step(dt)
+            self._time += dt
+
+    def _step(self, dt):
+        """ Integrates the state of the motor over a time step.
+        """
+        mode = self._mode
+        parameters = self._parameters
+
+        if mode in _RUN_MODES:
+            target = self._run_target()
+            if mode == _TO_POSITION and abs(target) < abs(self._setpoint):
+                # the approach profile already includes the ramp down
+                self._setpoint = target
+            else:
+                self._ramp(target, dt)
+            duty = self._regulate(dt)
+        elif mode == _DIRECT:
+            duty = self._int('duty_cycle_sp') / 100. * self._sign()
+        elif mode == _HOLD:
+            error = self._target_position - self._position
+            duty = _clamp(self._HOLD_KP * error - self._HOLD_KD * self._speed)
+        else:
+            duty = 0.0
+        self._duty = duty
+
+        if mode == _IDLE and not self._braking:
+            time_constant = parameters.coast_time_constant
+        else:
+            time_constant = parameters.time_constant
+        self._speed += (duty * parameters.max_speed - self._speed) * min(1.0, dt / time_constant)
+        self._position += self._speed * dt
+
+        if self._limits:
+            low, high = self._limits
+            if self._position < low or self._position > high:
+                self._position = max(low, min(high, self._position))
+                self._speed = 0.0
+
+        if abs(duty) > 0.05 and abs(self._speed) < abs(duty) * parameters.max_speed * 0.05:
+            self._stalled_for += dt
+        else:
+            self._stalled_for = 0.0
+
+        if mode == _TIMED and self._time + dt >= self._deadline:
+            self._stop()
+        elif mode == _TO_POSITION:
+            error = self._target_position - self._position
+            if abs(error) < 0.5 or error * self._direction < 0:
+                self._stop()
+
+
+def add_tacho_motor(backend, port_name, driver_name='lego-ev3-l-motor', name=None, **kwargs):
+    """ Creates a simulated motor and adds it to a memory backend.
+
+    Args:
+        backend (MemoryBackend): the backend
+        port_name (str): the output port of the motor (e.g. `outA`)
+        driver_name (Optional[str]): the driver name. Default to the large motor.
+        name (Optional[str]): the device name. Default to the first free `motor<N>` name.
+        \**kwargs: the other arguments of :py:class:`TachoMotorSimulator`
+
+    Returns:
+        TachoMotorSimulator: the simulator
+    """
+    return backend.add_device(
+        'tacho-motor', name or free_device_name(backend, 'tacho-motor', 'motor'),
+        TachoMotorSimulator(driver_name, port_name, **kwargs)
+    )
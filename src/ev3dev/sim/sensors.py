@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+""" Simulation of the sensors published in the `lego-sensor` class.
+
+A :py:class:`SensorSimulator` serves the attributes read by :py:class:`ev3dev.sensors.Sensor`
+(`mode`, `modes`, `num_values`, `decimals`, `units`, `bin_data_format`, `value<N>` and
+`bin_data`) for the modes of the simulated driver. The values of each mode are produced by
+a signal source, which is any of:
+
+    - a number, or a tuple of numbers for modes with several values
+    - a callable, returning the value(s) for a given time, in seconds since the creation
+      of the simulator
+    - a :py:class:`SampledSignal`, replaying scripted or recorded samples
+
+As for the real devices, the values are the raw integers, not scaled by `decimals`.
+
+The latency of mode switches is modeled: once a new mode has been written, the values read
+as 0 until the switch delay of the sensor is elapsed, as for UART sensors until they have
+sent their first data in the new mode. The refresh rate of the values can be modeled too.
+
+Example:
+
+    >>> backend = MemoryBackend()
+    >>> add_sensor(backend, 'lego-ev3-color', 'in1', signals={
+    >>>     'COL-COLOR': SampledSignal([(0, 0), (1.5, 5)]),     # a red brick shows up after 1.5s
+    >>>     'COL-REFLECT': lambda t: 20 + 10 * math.sin(t),
+    >>> })
+    >>> cs = ColorSensor(port='in1', backend=backend)
+"""
+
+import bisect
+import errno
+import math
+import struct
+import threading
+from collections import namedtuple
+
+from ev3dev.clock import get_clock
+from ev3dev.core import MemoryDevice
+from ev3dev.sim._common import free_device_name
+
+__all__ = ['SensorMode', 'SensorParameters', 'SampledSignal', 'SensorSimulator', 'add_sensor']
+
+#: The description of a sensor mode
+SensorMode = namedtuple('SensorMode', 'name num_values decimals units bin_data_format')
+
+#: The timing characteristics of a sensor
+#:
+#: - `mode_switch_delay`: the time needed for a mode switch to be effective, in seconds
+#: - `sample_period`: the refresh period of the values, in seconds (0 if continuous)
+SensorParameters = namedtuple('SensorParameters', 'mode_switch_delay sample_period')
+
+# the struct formats of the bin_data formats
+_BIN_DATA_FORMATS = {
+    'u8': '<B',
+    's8': '<b',
+    'u16': '<H',
+    's16': '<h',
+    's16_be': '>h',
+    's32': '<i',
+    'float': '<f',
+}
+
+# the number of value<N> attributes published by the drivers
+_VALUE_ATTRIBUTES = 8
+
+
+def _modes(*modes):
+    return tuple(SensorMode(*mode) for mode in modes)
+
+_US_EV3_MODES = _modes(
+    ('US-DIST-CM', 1, 1, 'cm', 's16'),
+    ('US-DIST-IN', 1, 1, 'in', 's16'),
+    ('US-LISTEN', 1, 0, '', 'u8'),
+    ('US-SI-CM', 1, 1, 'cm', 's16'),
+    ('US-SI-IN', 1, 1, 'in', 's16'),
+)
+
+_US_NXT_MODES = _modes(
+    ('US-DIST-CM', 1, 0, 'cm', 'u8'),
+    ('US-DIST-IN', 1, 1, 'in', 'u8'),
+    ('US-SI-CM', 1, 0, 'cm', 'u8'),
+    ('US-SI-IN', 1, 1, 'in', 'u8'),
+    ('US-LISTEN', 1, 0, '', 'u8'),
+)
+
+
+class SampledSignal(object):
+    """ A signal source replaying a sequence of samples.
+
+    The value of a sample is held until the time of the next one. Before the first sample,
+    the value of the first one is returned.
+    """
+
+    def __init__(self, samples, period=None):
+        """
+        Args:
+            samples (sequence[tuple]): the `(time, value)` pairs, the value being a number or
+                a tuple of numbers
+            period (Optional[float]): if provided, the samples are replayed in loop with
+                this period, in seconds
+
+        Raises:
+            ValueError: if there is no sample
+        """
+        if not samples:
+            raise ValueError('no sample')
+        samples = sorted(samples, key=lambda sample: sample[0])
+        self._times = [sample[0] for sample in samples]
+        self._values = [sample[1] for sample in samples]
+        self._period = period
+
+    @property
+    def samples(self):
+        """ The samples, sorted by time.
+
+        :type: list[tuple]
+        """
+        return list(zip(self._times, self._values))
+
+    def __call__(self, t):
+        if self._period:
+            t %= self._period
+        return self._values[max(0, bisect.bisect_right(self._times, t) - 1)]
+
+    @classmethod
+    def load(cls, path, period=None):
+        """ Loads samples saved with :py:meth:`save`.
+
+        Args:
+            path (str): the path of the file
+            period (Optional[float]): the replay period, if any
+
+        Returns:
+            SampledSignal: the signal
+        """
+        samples = []
+        with open(path) as fp:
+            for line in fp:
+                fields = line.split('#', 1)[0].split()
+                if fields:
+                    values = tuple(int(v) for v in fields[1:])
+                    samples.append((float(fields[0]), values if len(values) > 1 else values[0]))
+        return cls(samples, period)
+
+    def save(self, path):
+        """ Saves the samples in a text file, one sample per line, made of the time followed
+        by the value(s), separated by spaces.
+
+        Args:
+            path (str): the path of the file
+        """
+        with open(path, 'w') as fp:
+            for t, value in zip(self._times, self._values):
+                values = value if isinstance(value, (tuple, list)) else (value,)
+                fp.write('%.6f %s\n' % (t, ' '.join(str(v) for v in values)))
+
+    @classmethod
+    def record(cls, sensor, duration, period=0.01, clock=None):
+        """ Records the values of a sensor in its current mode.
+
+        Args:
+            sensor (ev3dev.sensors.Sensor): the sensor
+            duration (float): the duration of the recording, in seconds
+            period (Optional[float]): the sampling period, in seconds. Default to 10ms.
+            clock (Optional[Clock]): the clock timestamping the samples and timing the
+                reads. Default to the process-wide one.
+
+        Returns:
+            SampledSignal: the recorded signal
+        """
+        clock = clock or get_clock()
+        num_values = sensor.num_values
+        samples = []
+        start = clock.time()
+        t = 0
+        while t < duration:
+            values = tuple(sensor.value(n) for n in range(num_values))
+            samples.append((t, values if num_values > 1 else values[0]))
+            clock.sleep(period)
+            t = clock.time() - start
+        return cls(samples)
+
+
+def _as_signal(source):
+    """ Returns a callable source for any of the accepted source types.
+    """
+    if callable(source):
+        return source
+    return lambda t: source
+
+
+def _invalid(name, value):
+    return IOError(errno.EINVAL, 'invalid value for %s: %r' % (name, value))
+
+
+class SensorSimulator(MemoryDevice):
+    """ A simulated `lego-sensor` device, to be added to a :py:class:`ev3dev.core.MemoryBackend`.
+
+    The modes which are not given a signal source produce zeros.
+
+    Invalid writes raise `IOError`, with the same `errno` as the kernel driver.
+    """
+
+    #: The modes of the supported drivers, the first one being the default mode
+    SENSOR_MODES = {
+        'lego-ev3-color': _modes(
+            ('COL-REFLECT', 1, 0, 'pct', 's8'),
+            ('COL-AMBIENT', 1, 0, 'pct', 's8'),
+            ('COL-COLOR', 1, 0, 'col', 's8'),
+            ('REF-RAW', 2, 0, '', 's16'),
+            ('RGB-RAW', 3, 0, '', 's16'),
+        ),
+        'lego-ev3-us': _US_EV3_MODES,
+        'lego-nxt-us': _US_NXT_MODES,
+        'lego-ev3-gyro': _modes(
+            ('GYRO-ANG', 1, 0, 'deg', 's16'),
+            ('GYRO-RATE', 1, 0, 'd/s', 's16'),
+            ('GYRO-FAS', 1, 0, '', 's16'),
+            ('GYRO-G&A', 2, 0, '', 's16'),
+            ('GYRO-CAL', 4, 0, '', 's16'),
+        ),
+        'lego-ev3-ir': _modes(
+            ('IR-PROX', 1, 0, 'pct', 's8'),
+            ('IR-SEEK', 8, 0, 'pct', 's8'),
+            ('IR-REMOTE', 4, 0, 'btn', 's8'),
+            ('IR-REM-A', 1, 0, '', 's16'),
+            ('IR-CAL', 2, 0, '', 's16'),
+        ),
+        'lego-ev3-touch': _modes(
+            ('TOUCH', 1, 0, '', 's8'),
+        ),
+        'lego-nxt-touch': _modes(
+            ('TOUCH', 1, 0, '', 's8'),
+        ),
+        'lego-nxt-sound': _modes(
+            ('DB', 1, 1, 'pct', 's16'),
+            ('DBA', 1, 1, 'pct', 's16'),
+        ),
+        'lego-nxt-light': _modes(
+            ('REFLECT', 1, 1, 'pct', 's16'),
+            ('AMBIENT', 1, 1, 'pct', 's16'),
+        ),
+    }
+
+    #: The timing characteristics of the supported drivers
+    SENSOR_PARAMETERS = {
+        'lego-ev3-color': SensorParameters(mode_switch_delay=0.03, sample_period=0.001),
+        'lego-ev3-us': SensorParameters(mode_switch_delay=0.05, sample_period=0.01),
+        'lego-nxt-us': SensorParameters(mode_switch_delay=0.05, sample_period=0.05),
+        'lego-ev3-gyro': SensorParameters(mode_switch_delay=0.03, sample_period=0.001),
+        'lego-ev3-ir': SensorParameters(mode_switch_delay=0.03, sample_period=0.01),
+        'lego-ev3-touch': SensorParameters(mode_switch_delay=0, sample_period=0),
+        'lego-nxt-touch': SensorParameters(mode_switch_delay=0, sample_period=0),
+        'lego-nxt-sound': SensorParameters(mode_switch_delay=0, sample_period=0),
+        'lego-nxt-light': SensorParameters(mode_switch_delay=0.01, sample_period=0),
+    }
+
+    # attributes computed from the simulation state
+    _DYNAMIC_ATTRIBUTES = frozenset(('mode', 'num_values', 'decimals', 'units', 'bin_data_format'))
+
+    # the value<N> attribute names, and their index
+    _VALUE_INDEXES = dict(('value%d' % n, n) for n in range(_VALUE_ATTRIBUTES))
+
+    def __init__(self, driver_name, port_name='in1', signals=None, clock=None,
+                 mode_switch_delay=None, sample_period=None):
+        """
+        Args:
+            driver_name (str): the driver of the simulated sensor, which must be one of
+                :py:attr:`SENSOR_MODES` keys
+            port_name (Optional[str]): the input port. Default to `in1`.
+            signals (Optional[dict]): the signal sources, by mode name
+            clock (Optional[callable]): the clock of the simulation. Default to the
+                process-wide one (see :py:func:`ev3dev.clock.get_clock`).
+            mode_switch_delay (Optional[float]): the delay of mode switches, in seconds.
+                Default to the one of the driver.
+            sample_period (Optional[float]): the refresh period of the values, in seconds.
+                Default to the one of the driver.
+
+        Raises:
+            ValueError: if the driver is not supported, or a signal is given for an unknown mode
+        """
+        try:
+            modes = self.SENSOR_MODES[driver_name]
+        except KeyError:
+            raise ValueError('unsupported driver: %s' % driver_name)
+        parameters = self.SENSOR_PARAMETERS[driver_name]
+
+        super(SensorSimulator, self).__init__({
+            'address': port_name,
+            'commands': '',
+            'driver_name': driver_name,
+            'modes': ' '.join(mode.name for mode in modes),
+            'port_name': port_name,
+        })
+
+        self._modes = dict((mode.name, mode) for mode in modes)
+        self._clock = clock or get_clock()
+        self._lock = threading.Lock()
+        self._start = self._clock()
+        self._mode_switch_delay = parameters.mode_switch_delay if mode_switch_delay is None \
+            else mode_switch_delay
+        self._sample_period = parameters.sample_period if sample_period is None else sample_period
+
+        self._signals = {}
+        for mode, source in (signals or {}).items():
+            self.set_signal(mode, source)
+
+        self._mode = modes[0]
+        self._mode_ready_at = self._start
+        self._mode_switches = 0
+
+    @property
+    def mode_switches(self):
+        """ The number of mode switches done so far.
+
+        :type: int
+        """
+        return self._mode_switches
+
+    def set_signal(self, mode, source):
+        """ Changes the signal source of a mode.
+
+        Args:
+            mode (str): the mode name
+            source: the signal source, as documented for the module
+
+        Raises:
+            ValueError: if the mode is not one of the sensor
+        """
+        if mode not in self._modes:
+            raise ValueError('unknown mode: %s' % mode)
+        self._signals[mode] = _as_signal(source)
+
+    def _values(self):
+        """ Returns the current values, as a tuple of integers with one item per value
+        of the current mode.
+        """
+        mode = self._mode
+        now = self._clock()
+        signal = self._signals.get(mode.name)
+        if signal is None or now < self._mode_ready_at:
+            return (0,) * mode.num_values
+
+        t = now - self._start
+        if self._sample_period:
+            t = math.floor(t / self._sample_period) * self._sample_period
+        values = signal(t)
+        if not isinstance(values, (tuple, list)):
+            values = (values,)
+        values = tuple(int(round(v)) for v in values[:mode.num_values])
+        return values + (0,) * (mode.num_values - len(values))
+
+    def read_attribute(self, name):
+        with self._lock:
+            index = self._VALUE_INDEXES.get(name)
+            if index is not None:
+                values = self._values()
+                return str(values[index]) if index < len(values) else '0'
+
+            if name in self._DYNAMIC_ATTRIBUTES:
+                mode = self._mode
+                if name == 'mode':
+                    return mode.name
+                return str(getattr(mode, name))
+
+            return super(SensorSimulator, self).read_attribute(name)
+
+    def read_bytes(self, name, size):
+        if name != 'bin_data':
+            return super(SensorSimulator, self).read_bytes(name, size)
+
+        with self._lock:
+            fmt = _BIN_DATA_FORMATS[self._mode.bin_data_format]
+            return b''.join(struct.pack(fmt, v) for v in self._values())[:size]
+
+    def write_attribute(self, name, value):
+        with self._lock:
+            value = value.strip()
+            if name == 'mode':
+                try:
+                    mode = self._modes[value]
+                except KeyError:
+                    raise _invalid(name, value)
+                if mode is not self._mode:
+                    self._mode = mode
+                    self._mode_ready_at = self._clock() + self._mode_switch_delay
+                    self._mode_switches += 1
+            elif name in self._DYNAMIC_ATTRIBUTES or name in self._VALUE_INDEXES or name in self.attributes:
+                raise IOError(errno.EACCES, 'attribute %s is read-only' % name)
+            else:
+                super(SensorSimulator, self).write_attribute(name, value)
+
+
+def add_sensor(backend, driver_name, port_name, name=None, **kwargs):
+    """ Creates a simulated sensor and adds it to a memory backend.
+
+    Args:
+        backend (MemoryBackend): the backend
+        driver_name (str): the driver name (e.g. `lego-ev3-color`)
+        port_name (str): the input port of the sensor (e.g. `in1`)
+        name (Optional[str]): the device name. Default to the first free `sensor<N>` name.
+        \**kwargs: the other arguments of :py:class:`SensorSimulator`
+
+    Returns:
+        SensorSimulator: the simulator
+    """
+    return backend.add_device(
+        'lego-sensor', name or free_device_name(backend, 'lego-sensor', 'sensor'),
+        SensorSimulator(driver_name, port_name, **kwargs)
+    )
@@ -42,6 +42,8 @@
 import os
 import subprocess
 
+__all__ = ['Sound', 'NOTE_FREQUENCIES', 'NOTE_VALUES']
+
 
 class Sound(object):
     """ Sound-related functions. The class has only static methods and is not
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+# ------------------------------------------------------------------------------
+# Copyright (c) 2015 Eric Pascual
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NON INFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+# -----------------------------------------------------------------------------
+
+
+""" Recording of the device I/O in binary trace files, for offline analysis.
+
+A :py:class:`TraceRecorder` registered as an I/O observer (see
+:py:func:`ev3dev.core.add_io_observer`) logs every attribute read and write, every input
+device key state query and every framebuffer update, with its monotonic timestamp, its
+duration, the device, the attribute and the value. The identity of the devices is
+logged too, so that the trace can be replayed (see :py:mod:`ev3dev.replay`).
+
+The recording costs only the queuing of the event in the thread doing the I/O. The
+events are encoded and appended to the file by a background thread.
+
+Example:
+
+    >>> with TraceRecorder('run.trace'):
+    >>>     robot.run()
+    >>>
+    >>> for record in read_trace('run.trace'):
+    >>>     print(record.timestamp, record.device, record.name, record.value)
+
+The content of a trace can be displayed with::
+
+    $ python -m ev3dev.trace [--summary] run.trace
+
+File format
+-----------
+
+The file starts with the 6 bytes magic `EV3TRC`, the format version (u16), and the wall
+clock and monotonic times of the start of the recording (doubles). All the numbers are
+little-endian. It then contains records, made of a kind byte followed by:
+
+    - for string definitions (kind 1): the string id (u32), its length (u16) and its
+      UTF-8 bytes. Device paths, attribute and operation names are written once, and
+      referred to by their id afterwards.
+    - for events (kind 2): the timestamp (double), the duration (float), the device,
+      attribute and operation ids (u32), the flags (u8) and the value length (u32),
+      followed by the value bytes. The flags tell if the operation has failed (bit 0),
+      if the value is binary data (bit 1) and if there is no value (bit 2).
+
+The version 1 of the format, which used u16 string ids, can still be read.
+"""
+
+import argparse
+import collections
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from ev3dev.clock import monotonic
+from ev3dev.core import IOObserver, IOStats, add_io_observer, remove_io_observer
+
+__all__ = ['TraceRecord', 'TraceRecorder', 'read_trace', 'main']
+
+#: A trace event
+#:
+#: - `timestamp`: the monotonic time of the start of the operation
+#: - `device`: the device path
+#: - `name`: the attribute or the operation name
+#: - `operation`: the kind of operation (`read`, `write`, `ioctl`, `fb` or `bind`)
+#: - `value`: the value, as a str for text attributes and bytes for binary data, None
+#:   if the operation has failed
+#: - `elapsed`: the duration of the operation, in seconds
+#: - `error`: True if the operation has failed
+TraceRecord = namedtuple('TraceRecord', 'timestamp device name operation value elapsed error')
+
+_MAGIC = b'EV3TRC'
+_VERSION = 2
+_HEADER = struct.Struct('<6sHdd')
+_STRING = struct.Struct('<BIH')
+_EVENT = struct.Struct('<BdfIIIBI')
+
+# the string and event records of the readable versions
+_RECORDS = {
+    1: (struct.Struct('<BHH'), struct.Struct('<BdfHHHBI')),
+    _VERSION: (_STRING, _EVENT),
+}
+
+_KIND_STRING = 1
+_KIND_EVENT = 2
+
+_FLAG_ERROR = 1
+_FLAG_BINARY = 2
+_FLAG_NONE = 4
+
+
+class TraceRecorder(IOObserver):
+    """ Records the device I/O in a binary trace file.
+
+    The events are queued by the observed threads and written by a background one, every
+    `flush_period` seconds. If the writer cannot keep up, the events exceeding
+    `max_pending` are dropped and counted in :py:attr:`dropped`.
+    """
+
+    def __init__(self, path, flush_period=0.1, max_pending=100000):
+        """
+        Args:
+            path (str): the path of the trace file, which is overwritten if it exists
+            flush_period (Optional[float]): the period of the writes, in seconds.
+                Default to 0.1.
+            max_pending (Optional[int]): the maximum number of events waiting to be written.
+                Default to 100000.
+        """
+        self._path = path
+        self._flush_period = flush_period
+        self._max_pending = max_pending
+        self._pending = collections.deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stop = False
+        self._file = None
+        self._string_ids = {}
+        self._recorded = 0
+        self._dropped = 0
+
+    @property
+    def path(self):
+        """ The path of the trace file.
+
+        :type: str
+        """
+        return self._path
+
+    @property
+    def recorded(self):
+        """ The number of events written so far.
+
+        :type: int
+        """
+        return self._recorded
+
+    @property
+    def dropped(self):
+        """ The number of events dropped because the writer could not keep up.
+
+        :type: int
+        """
+        return self._dropped
+
+    def on_io(self, timestamp, device_path, name, operation, value, elapsed, error):
+        if len(self._pending) >= self._max_pending:
+            self._dropped += 1
+            return
+        self._pending.append((timestamp, device_path, name, operation, value, elapsed, error))
+
+    def start(self):
+        """ Creates the trace file and starts recording.
+
+        Returns:
+            bool: True if the recording has been started, False if it was already running
+        """
+        if self._thread:
+            return False
+
+        self._file = open(self._path, 'wb')
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, time.time(), monotonic()))
+        self._string_ids.clear()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        add_io_observer(self)
+        return True
+
+    def stop(self):
+        """ Stops recording, writes the pending events and closes the file.
+
+        Returns:
+            bool: True if the recording has been stopped, False if it was not running
+        """
+        if not self._thread:
+            return False
+
+        remove_io_observer(self)
+        self._stop = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+        return True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _run(self):
+        while not self._stop:
+            self._wakeup.wait(self._flush_period)
+            self._wakeup.clear()
+            self._write_pending()
+        # the events queued before the observer removal
+        self._write_pending()
+
+    def _write_pending(self):
+        pending = self._pending
+        if not pending:
+            return
+
+        chunks = []
+        while pending:
+            timestamp, device_path, name, operation, value, elapsed, error = pending.popleft()
+            ids = [self._string_id(s, chunks) for s in (device_path, name, operation)]
+
+            flags = _FLAG_ERROR if error else 0
+            if value is None:
+                flags |= _FLAG_NONE
+                data = b''
+            elif isinstance(value, bytearray) or (isinstance(value, bytes) and str is not bytes):
+                # (Python 2 cannot tell binary data from text)
+                flags |= _FLAG_BINARY
+                data = bytes(value)
+            else:
+                data = value if isinstance(value, bytes) else value.encode('utf-8')
+
+            chunks.append(_EVENT.pack(_KIND_EVENT, timestamp, elapsed, ids[0], ids[1], ids[2], flags, len(data)))
+            chunks.append(data)
+            self._recorded += 1
+
+        self._file.write(b''.join(chunks))
+        self._file.flush()
+
+    def _string_id(self, s, chunks):
+        try:
+            return self._string_ids[s]
+        except KeyError:
+            self._string_ids[s] = string_id = len(self._string_ids)
+            data = s.encode('utf-8')
+            chunks.append(_STRING.pack(_KIND_STRING, string_id, len(data)))
+            chunks.append(data)
+            return string_id
+
+
+def _read_exactly(fp, size):
+    data = fp.read(size)
+    if len(data) != size:
+        raise ValueError('truncated trace file')
+    return data
+
+
+def read_trace(path):
+    """ Reads the events of a trace file.
+
+    Args:
+        path (str): the path of the file
+
+    Yields:
+        TraceRecord: the events, in the order they have been recorded
+
+    Raises:
+        ValueError: if the file is not a trace file, or is truncated
+    """
+    with open(path, 'rb') as fp:
+        magic, version, _, _ = _HEADER.unpack(_read_exactly(fp, _HEADER.size))
+        if magic != _MAGIC or version not in _RECORDS:
+            raise ValueError('not a version %s trace file: %s' % (
+                ' or '.join(str(v) for v in sorted(_RECORDS)), path
+            ))
+        string_record, event_record = _RECORDS[version]
+
+        strings = {}
+        while True:
+            kind = fp.read(1)
+            if not kind:
+                return
+
+            if ord(kind) == _KIND_STRING:
+                _, string_id, size = string_record.unpack(kind + _read_exactly(fp, string_record.size - 1))
+                strings[string_id] = _read_exactly(fp, size).decode('utf-8')
+                if str is bytes:
+                    strings[string_id] = strings[string_id].encode('utf-8')
+
+            elif ord(kind) == _KIND_EVENT:
+                _, timestamp, elapsed, device_id, name_id, op_id, flags, size = \
+                    event_record.unpack(kind + _read_exactly(fp, event_record.size - 1))
+                data = _read_exactly(fp, size)
+                if flags & _FLAG_NONE:
+                    value = None
+                elif flags & _FLAG_BINARY or str is bytes:
+                    value = data
+                else:
+                    value = data.decode('utf-8')
+                yield TraceRecord(
+                    timestamp, strings[device_id], strings[name_id], strings[op_id], value, elapsed,
+                    bool(flags & _FLAG_ERROR)
+                )
+
+            else:
+                raise ValueError('invalid record kind: %d' % ord(kind))
+
+
+def main(args=None):
+    """ The command line entry point, displaying the content of a trace file.
+
+    Args:
+        args (Optional[list[str]]): the command line arguments. Default to the ones of the process.
+    """
+    parser = argparse.ArgumentParser(prog='python -m ev3dev.trace', description='Displays a device I/O trace.')
+    parser.add_argument('path', help='the trace file')
+    parser.add_argument('-s', '--summary', action='store_true',
+                        help='display the statistics per device and attribute instead of the events')
+    options = parser.parse_args(args)
+
+    if options.summary:
+        stats = IOStats()
+        for record in read_trace(options.path):
+            stats.on_io(*record)
+        print(stats.snapshot().report())
+        return
+
+    start = None
+    for record in read_trace(options.path):
+        if start is None:
+            start = record.timestamp
+        value = record.value
+        if isinstance(value, (bytes, bytearray)) and str is not bytes:
+            value = '<%d bytes>' % len(value)
+        elif value:
+            # device descriptions are multi-lines
+            value = value.replace('\n', ' ')
+        print('%12.6f %8.1fus %-5s %-40s %-16s %s%s' % (
+            record.timestamp - start, record.elapsed * 1e6, record.operation, record.device,
+            record.name, value, ' (error)' if record.error else ''
+        ))
+
+
+if __name__ == '__main__':
+    main()